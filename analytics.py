@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+analytics.py — аналитика ответов по вопросам
+
+Работает только с агрегатами question_stats, таблица answers не читается.
+Пересчёт агрегатов: python analytics.py rebuild
+"""
+
+import sys
+import config
+from database import init_database, get_question_stats, rebuild_question_stats
+
+
+def month_order(month):
+    """Порядковый номер месяца для сортировки (неизвестные — в конец)"""
+    try:
+        return config.MONTHS.index(month.capitalize())
+    except ValueError:
+        return len(config.MONTHS)
+
+
+def question_trends(form_name, year, months=None):
+    """
+    Сводка по каждому вопросу формы за год (или только за месяцы months)
+
+    Returns:
+        list: словари question_hash, question_text, answers, yes, no, comments, no_months
+        (месяцы с ответом "Нет" по порядку), отсортированные по числу "Нет"
+    """
+    questions = {}
+    for row in get_question_stats(form_name, year, months):
+        item = questions.setdefault(row['question_hash'], {
+            'question_hash': row['question_hash'],
+            'question_text': row['question_text'],
+            'answers': 0,
+            'yes': 0,
+            'no': 0,
+            'comments': 0,
+            'no_months': []
+        })
+        item['answers'] += row['answer_count']
+        item['yes'] += row['yes_count']
+        item['no'] += row['no_count']
+        item['comments'] += row['comment_count']
+        if row['no_count'] > 0:
+            item['no_months'].append(row['month'])
+
+    trends = list(questions.values())
+    for item in trends:
+        item['no_months'].sort(key=month_order)
+    trends.sort(key=lambda item: (-item['no'], item['question_text']))
+    return trends
+
+
+def recurring_nonconformities(form_name, year, min_months=2):
+    """Вопросы, получавшие "Нет" не менее чем в min_months месяцах года"""
+    return [
+        item for item in question_trends(form_name, year)
+        if len(item['no_months']) >= min_months
+    ]
+
+
+def main(argv):
+    """Командная строка: rebuild — пересчитать агрегаты"""
+    if len(argv) < 2 or argv[1] != "rebuild":
+        print("Использование: python analytics.py rebuild")
+        return 1
+
+    # Создаёт question_stats в старой базе (и заполняет, если таблица была пуста)
+    init_database()
+    count = rebuild_question_stats()
+    print(f"Агрегаты пересчитаны: {count} строк")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
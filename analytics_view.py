@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+analytics_view.py — вкладка "Аналитика" в архиве отчётов
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import datetime
+import config
+from analytics import question_trends
+from database import rebuild_question_stats
+from rollup import build_rollup, quarter_months
+
+
+def make_tree(parent, columns, widths, height=None):
+    """Таблица с вертикальной прокруткой"""
+    tree_frame = tk.Frame(parent)
+    tree_frame.pack(pady=4, fill=tk.BOTH, expand=True)
+
+    scrollbar = tk.Scrollbar(tree_frame)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    tree = ttk.Treeview(
+        tree_frame,
+        columns=columns,
+        show="headings",
+        yscrollcommand=scrollbar.set,
+        **({'height': height} if height else {})
+    )
+    scrollbar.config(command=tree.yview)
+
+    for col, width in zip(columns, widths):
+        tree.heading(col, text=col)
+        tree.column(col, width=width)
+    tree.pack(fill=tk.BOTH, expand=True)
+    return tree
+
+
+class AnalyticsTab:
+    """Сводка ответов по вопросам формы за год (из question_stats)"""
+
+    COLUMNS = ["Вопрос", "Ответов", "Да", "Нет", "Комментариев", "Месяцы с «Нет»"]
+    WIDTHS = [450, 80, 60, 60, 110, 250]
+
+    def __init__(self, app, parent, forms):
+        self.app = app
+
+        filter_frame = tk.Frame(parent)
+        filter_frame.pack(pady=app.PADY * 2, fill=tk.X)
+
+        tk.Label(filter_frame, text="Форма:", font=("Arial", app.FONT_SMALL)).pack(side=tk.LEFT, padx=app.PADX)
+        self.form_var = tk.StringVar(value=forms[0] if forms else "")
+        ttk.Combobox(
+            filter_frame,
+            textvariable=self.form_var,
+            values=forms,
+            font=("Arial", app.FONT_SMALL),
+            width=30,
+            state="readonly"
+        ).pack(side=tk.LEFT, padx=app.PADX)
+
+        tk.Label(filter_frame, text="Год:", font=("Arial", app.FONT_SMALL)).pack(side=tk.LEFT, padx=app.PADX)
+        self.year_var = tk.StringVar(value=str(datetime.now().year))
+        tk.Entry(
+            filter_frame,
+            textvariable=self.year_var,
+            font=("Arial", app.FONT_SMALL),
+            width=8
+        ).pack(side=tk.LEFT, padx=app.PADX)
+
+        self.recurring_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            filter_frame,
+            text="Только повторяющиеся «Нет»",
+            variable=self.recurring_var,
+            font=("Arial", app.FONT_SMALL)
+        ).pack(side=tk.LEFT, padx=app.PADX)
+
+        self.btn_show = tk.Button(
+            filter_frame,
+            text="Показать",
+            font=("Arial", app.FONT_SMALL),
+            width=12,
+            command=self.load
+        )
+        self.btn_show.pack(side=tk.LEFT, padx=app.PADX)
+
+        self.btn_rebuild = tk.Button(
+            filter_frame,
+            text="Пересчитать",
+            font=("Arial", app.FONT_SMALL),
+            width=12,
+            command=self.rebuild
+        )
+        self.btn_rebuild.pack(side=tk.RIGHT, padx=app.PADX)
+
+        self.tree = make_tree(parent, self.COLUMNS, self.WIDTHS)
+
+    def load(self):
+        """Загрузить сводку по выбранной форме и году"""
+        form_name = self.form_var.get()
+        year = self.year_var.get().strip()
+        if not form_name or not year:
+            messagebox.showerror(
+                config.DIALOG_TITLES["error"],
+                config.ERROR_MESSAGES["fill_all_fields"]
+            )
+            return
+
+        self.app.tasks.run(
+            question_trends,
+            form_name,
+            year,
+            title="Загрузка аналитики...",
+            on_done=self.show,
+            on_error=self.app.show_task_error,
+            widgets=[self.btn_show, self.btn_rebuild]
+        )
+
+    def show(self, trends):
+        """Заполнить таблицу"""
+        if not self.tree.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+
+        if self.recurring_var.get():
+            trends = [item for item in trends if len(item['no_months']) >= 2]
+
+        for item in trends:
+            self.tree.insert("", tk.END, values=[
+                item['question_text'],
+                item['answers'],
+                item['yes'],
+                item['no'],
+                item['comments'],
+                ", ".join(item['no_months'])
+            ])
+
+    def rebuild(self):
+        """Пересчитать агрегаты с нуля"""
+        self.app.tasks.run(
+            rebuild_question_stats,
+            title="Пересчёт аналитики...",
+            on_done=lambda count: self.load() if self.form_var.get() else None,
+            on_error=self.app.show_task_error,
+            widgets=[self.btn_show, self.btn_rebuild],
+            cancellable=False
+        )
+
+
+class RollupTab:
+    """Сводка месячных отчётов формы за квартал или год"""
+
+    PERIODS = ["1 квартал", "2 квартал", "3 квартал", "4 квартал", "Год"]
+
+    QUESTION_COLUMNS = ["Вопрос", "Ответов", "Да", "Нет", "Доля «Нет»", "Месяцы с «Нет»"]
+    QUESTION_WIDTHS = [450, 80, 60, 60, 90, 250]
+
+    COMMENT_COLUMNS = ["Вопрос", "Замечание", "Повторов", "Месяцы"]
+    COMMENT_WIDTHS = [350, 400, 80, 200]
+
+    def __init__(self, app, parent, forms):
+        self.app = app
+        self.rollup = None
+
+        filter_frame = tk.Frame(parent)
+        filter_frame.pack(pady=app.PADY * 2, fill=tk.X)
+
+        tk.Label(filter_frame, text="Форма:", font=("Arial", app.FONT_SMALL)).pack(side=tk.LEFT, padx=app.PADX)
+        self.form_var = tk.StringVar(value=forms[0] if forms else "")
+        ttk.Combobox(
+            filter_frame,
+            textvariable=self.form_var,
+            values=forms,
+            font=("Arial", app.FONT_SMALL),
+            width=30,
+            state="readonly"
+        ).pack(side=tk.LEFT, padx=app.PADX)
+
+        tk.Label(filter_frame, text="Год:", font=("Arial", app.FONT_SMALL)).pack(side=tk.LEFT, padx=app.PADX)
+        self.year_var = tk.StringVar(value=str(datetime.now().year))
+        tk.Entry(
+            filter_frame,
+            textvariable=self.year_var,
+            font=("Arial", app.FONT_SMALL),
+            width=8
+        ).pack(side=tk.LEFT, padx=app.PADX)
+
+        tk.Label(filter_frame, text="Период:", font=("Arial", app.FONT_SMALL)).pack(side=tk.LEFT, padx=app.PADX)
+        self.period_var = tk.StringVar(value=self.PERIODS[(datetime.now().month - 1) // 3])
+        ttk.Combobox(
+            filter_frame,
+            textvariable=self.period_var,
+            values=self.PERIODS,
+            font=("Arial", app.FONT_SMALL),
+            width=12,
+            state="readonly"
+        ).pack(side=tk.LEFT, padx=app.PADX)
+
+        self.btn_show = tk.Button(
+            filter_frame,
+            text="Показать",
+            font=("Arial", app.FONT_SMALL),
+            width=12,
+            command=self.load
+        )
+        self.btn_show.pack(side=tk.LEFT, padx=app.PADX)
+
+        self.btn_export = tk.Button(
+            filter_frame,
+            text="Экспорт в Excel",
+            font=("Arial", app.FONT_SMALL),
+            width=16,
+            state=tk.DISABLED,
+            command=self.export
+        )
+        self.btn_export.pack(side=tk.LEFT, padx=app.PADX)
+
+        self.summary_label = tk.Label(parent, text="", font=("Arial", app.FONT_SMALL))
+        self.summary_label.pack(anchor="w", padx=app.PADX)
+
+        self.questions_tree = make_tree(parent, self.QUESTION_COLUMNS, self.QUESTION_WIDTHS)
+
+        tk.Label(
+            parent,
+            text="Повторяющиеся замечания",
+            font=("Arial", app.FONT_SMALL, "bold")
+        ).pack(anchor="w", padx=app.PADX)
+        self.comments_tree = make_tree(parent, self.COMMENT_COLUMNS, self.COMMENT_WIDTHS, height=6)
+
+    def selected_months(self):
+        """Месяцы выбранного периода"""
+        period = self.period_var.get()
+        if period == "Год":
+            return list(config.MONTHS)
+        return quarter_months(self.PERIODS.index(period) + 1)
+
+    def load(self):
+        """Построить сводку в фоне"""
+        form_name = self.form_var.get()
+        year = self.year_var.get().strip()
+        if not form_name or not year:
+            messagebox.showerror(
+                config.DIALOG_TITLES["error"],
+                config.ERROR_MESSAGES["fill_all_fields"]
+            )
+            return
+
+        self.app.tasks.run(
+            build_rollup,
+            form_name,
+            year,
+            self.selected_months(),
+            title="Построение сводки...",
+            on_done=self.show,
+            on_error=self.app.show_task_error,
+            widgets=[self.btn_show, self.btn_export]
+        )
+
+    def show(self, rollup):
+        """Заполнить таблицы сводки"""
+        if not self.questions_tree.winfo_exists():
+            return
+        self.rollup = rollup
+
+        counts = ", ".join(f"{m}: {rollup['report_counts'].get(m, 0)}" for m in rollup['months'])
+        self.summary_label.config(text=f"{rollup['title']}. Отчётов по месяцам — {counts}")
+
+        self.questions_tree.delete(*self.questions_tree.get_children())
+        for q in rollup['questions']:
+            self.questions_tree.insert("", tk.END, values=[
+                q['question_text'], q['answers'], q['yes'], q['no'],
+                f"{q['no_rate']:.0%}", ", ".join(q['no_months'])
+            ])
+
+        self.comments_tree.delete(*self.comments_tree.get_children())
+        for c in rollup['recurring_comments']:
+            self.comments_tree.insert("", tk.END, values=[
+                c['question_text'], c['comment'], c['count'], ", ".join(c['months'])
+            ])
+
+        self.btn_export.config(state=tk.NORMAL)
+
+    def export(self):
+        """Сохранить сводку в Excel"""
+        if not self.rollup:
+            return
+
+        def on_saved(path):
+            messagebox.showinfo(
+                config.DIALOG_TITLES["success"],
+                f"Сводка сохранена:\n{path}"
+            )
+
+        from export_excel import create_rollup_report
+
+        self.app.tasks.run(
+            create_rollup_report,
+            self.rollup,
+            title="Экспорт сводки в Excel...",
+            on_done=on_saved,
+            on_error=self.app.show_task_error,
+            widgets=[self.btn_show, self.btn_export],
+            cancellable=False
+        )
@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+"""
+backup.py — резервные копии reports.db в папку BACKUP_FOLDER
+
+Копия снимается через sqlite3 backup API порциями по BACKUP_PAGES_PER_STEP
+страниц с паузой между ними, поэтому запись в базу во время копирования
+не блокируется; если запись раз за разом перезапускает копирование
+(BACKUP_MAX_RESTARTS), копия снимается за один шаг. Копия пишется во временный файл, проверяется
+PRAGMA integrity_check и только потом получает итоговое имя.
+
+Годовые архивы (архив/reports_<год>.db, см. year_archive.py) входят в копию
+как единый набор с reports.db: они копируются в папку <копия>_архив/ рядом
+с файлом копии и восстанавливаются вместе с ним.
+
+Фоновый BackupScheduler делает копию раз в BACKUP_INTERVAL_MIN минут
+и после каждых BACKUP_EVERY_N_SAVES сохранённых отчётов; старые копии
+удаляются по BACKUP_KEEP / BACKUP_MAX_AGE_DAYS.
+
+Командная строка:
+    python backup.py create
+    python backup.py list
+    python backup.py verify <файл>
+    python backup.py restore <файл>   (программа должна быть закрыта)
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import config
+import database
+
+BACKUP_PREFIX = "reports_"
+BACKUP_SUFFIX = ".db"
+# Страховочная копия текущей базы перед восстановлением (не участвует в ротации)
+BEFORE_RESTORE_PREFIX = "before_restore_"
+# Папка с копиями годовых архивов рядом с файлом копии
+ARCHIVE_DIR_SUFFIX = "_архив"
+
+
+def _backup_dir():
+    folder = config.BACKUP_FOLDER.rstrip('/') or "backups"
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+class _BackupRestarted(Exception):
+    """Постраничное копирование перезапускалось слишком часто"""
+
+
+def _copy(source_path, dest_path, progress=None):
+    """
+    Постраничное копирование базы source_path в dest_path
+    SQLite начинает копирование заново после каждой записи в базу другим
+    соединением; после BACKUP_MAX_RESTARTS перезапусков копия снимается
+    за один шаг (запись в базу на это время ждет)
+    """
+    state = {'remaining': None, 'total': 0, 'restarts': 0}
+
+    def on_step(status, remaining, total):
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] >= config.BACKUP_MAX_RESTARTS:
+                raise _BackupRestarted()
+        state['remaining'] = remaining
+        state['total'] = total
+        if progress:
+            progress(total - remaining, total)
+
+    source = sqlite3.connect(source_path, timeout=10.0)
+    dest = sqlite3.connect(dest_path)
+    try:
+        try:
+            source.backup(dest, pages=config.BACKUP_PAGES_PER_STEP, progress=on_step,
+                          sleep=config.BACKUP_STEP_SLEEP_SEC)
+        except _BackupRestarted:
+            if config.DEBUG_MODE:
+                print(f"Копирование {source_path} перезапускалось {state['restarts']} раз "
+                      f"из-за записи в базу — копия снимается за один шаг")
+            source.backup(dest, pages=-1)
+            if progress:
+                progress(state['total'], state['total'])
+    finally:
+        dest.close()
+        source.close()
+
+
+def _archive_dir(path):
+    """Папка с копиями годовых архивов для файла копии"""
+    return path[:-len(BACKUP_SUFFIX)] + ARCHIVE_DIR_SUFFIX
+
+
+def _archive_files(folder):
+    """Файлы годовых архивов в папке: {год: путь}"""
+    if not os.path.isdir(folder):
+        return {}
+    files = {}
+    for name in os.listdir(folder):
+        if name.startswith("reports_") and name.endswith(BACKUP_SUFFIX) and name[8:-3].isdigit():
+            files[int(name[8:-3])] = os.path.join(folder, name)
+    return files
+
+
+def _copy_archives(dest_folder, progress=None):
+    """Скопировать текущие годовые архивы в dest_folder (если они есть)"""
+    for year in database.list_archive_years():
+        os.makedirs(dest_folder, exist_ok=True)
+        _copy(database.archive_path(year), os.path.join(dest_folder, f"reports_{year}{BACKUP_SUFFIX}"), progress)
+
+
+def _count_overlap(main_path, archives):
+    """Число отчетов, которые есть и в рабочей базе, и в годовом архиве набора"""
+    conn = sqlite3.connect(f"file:{os.path.abspath(main_path)}?mode=ro", uri=True)
+    try:
+        overlap = 0
+        for year, path in archives.items():
+            conn.execute("ATTACH DATABASE ? AS archive", (f"file:{os.path.abspath(path)}?mode=ro",))
+            overlap += conn.execute(
+                "SELECT COUNT(*) FROM archive.reports a JOIN main.reports m ON m.id = a.id"
+            ).fetchone()[0]
+            conn.execute("DETACH DATABASE archive")
+        return overlap
+    finally:
+        conn.close()
+
+
+def verify_backup(path, archive_dir=None):
+    """
+    Проверить копию вместе с копиями годовых архивов
+    (archive_dir — папка архивов, по умолчанию <копия>_архив/)
+    Returns: (success, message)
+    """
+    ok, message = _verify_file(path)
+    if not ok:
+        return ok, message
+
+    archives = _archive_files(archive_dir or _archive_dir(path))
+    for year, archive in sorted(archives.items()):
+        archive_ok, archive_message = _verify_file(archive)
+        if not archive_ok:
+            return False, f"Архив {year} года: {archive_message}"
+    if archives:
+        try:
+            overlap = _count_overlap(path, archives)
+        except sqlite3.Error as e:
+            return False, f"{config.ERROR_MESSAGES['db_error']}: {e}"
+        if overlap:
+            return False, f"Отчёты есть и в базе, и в годовом архиве: {overlap}"
+        message += f", годовых архивов {len(archives)}"
+    return True, message
+
+
+def _verify_file(path):
+    """
+    Проверить файл базы: целостность и наличие таблиц отчётов
+    Returns: (success, message)
+    """
+    if not os.path.exists(path):
+        return False, f"Файл не найден: {path}"
+    conn = None
+    try:
+        conn = sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+        if result != "ok":
+            return False, f"{config.ERROR_MESSAGES['db_corrupted']}: {result}"
+        reports = conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+        answers = conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return True, f"Копия исправна: отчётов {reports}, ответов {answers}"
+    except sqlite3.Error as e:
+        return False, f"{config.ERROR_MESSAGES['db_error']}: {e}"
+    finally:
+        if conn:
+            conn.close()
+
+
+def create_backup(progress=None):
+    """
+    Снять проверенную копию текущей базы
+    Returns: путь к копии
+    Raises: Exception если копирование или проверка не удались
+    """
+    folder = _backup_dir()
+    name = f"{BACKUP_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}{BACKUP_SUFFIX}"
+    path = os.path.join(folder, name)
+    tmp_path = path + ".tmp"
+
+    archive_dir = _archive_dir(path)
+    tmp_archive_dir = archive_dir + ".tmp"
+
+    try:
+        _copy(database.DB_FILE, tmp_path, progress)
+        _copy_archives(tmp_archive_dir)
+        ok, message = verify_backup(tmp_path, tmp_archive_dir)
+        if not ok:
+            raise Exception(message)
+        # Папка архивов получает итоговое имя раньше файла копии: без файла
+        # копия в list_backups() не видна, так что набор появляется целиком
+        if os.path.isdir(tmp_archive_dir):
+            os.replace(tmp_archive_dir, archive_dir)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        shutil.rmtree(tmp_archive_dir, ignore_errors=True)
+
+    if config.DEBUG_MODE:
+        print(f"Резервная копия создана: {path}")
+    rotate_backups()
+    return path
+
+
+def list_backups():
+    """Копии по убыванию времени создания: словари path, name, created, size"""
+    folder = _backup_dir()
+    backups = []
+    for name in os.listdir(folder):
+        if name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX):
+            path = os.path.join(folder, name)
+            backups.append({
+                'path': path,
+                'name': name,
+                'created': datetime.fromtimestamp(os.path.getmtime(path)),
+                'size': os.path.getsize(path)
+            })
+    backups.sort(key=lambda b: b['name'], reverse=True)
+    return backups
+
+
+def rotate_backups(keep=None, max_age_days=None):
+    """
+    Удалить лишние копии: сверх keep последних и старше max_age_days
+    Самая свежая копия не удаляется никогда
+    Returns: список удалённых файлов
+    """
+    keep = config.BACKUP_KEEP if keep is None else keep
+    max_age_days = config.BACKUP_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    now = datetime.now()
+
+    removed = []
+    for index, backup in enumerate(list_backups()):
+        if index == 0:
+            continue
+        too_many = keep and index >= keep
+        too_old = max_age_days and (now - backup['created']).days > max_age_days
+        if too_many or too_old:
+            try:
+                os.remove(backup['path'])
+                shutil.rmtree(_archive_dir(backup['path']), ignore_errors=True)
+                removed.append(backup['path'])
+            except OSError as e:
+                if config.DEBUG_MODE:
+                    print(f"Не удалось удалить старую копию {backup['path']}: {e}")
+    return removed
+
+
+def restore_backup(path):
+    """
+    Восстановить базу из копии (программа должна быть закрыта)
+    База и годовые архивы восстанавливаются одним набором: архивы, которых
+    нет в копии, убираются (их отчеты в восстановленной базе — в рабочей).
+    Копия проверяется до восстановления, текущий набор сохраняется
+    в before_restore_*, результат проверяется после
+    Returns: (success, message)
+    """
+    ok, message = verify_backup(path)
+    if not ok:
+        return False, f"Восстановление отменено: {message}"
+
+    archive_folder = config.YEAR_ARCHIVE_FOLDER.rstrip('/')
+    try:
+        safety_path = None
+        if os.path.exists(database.DB_FILE):
+            safety_path = os.path.join(
+                _backup_dir(),
+                f"{BEFORE_RESTORE_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}{BACKUP_SUFFIX}"
+            )
+            _copy(database.DB_FILE, safety_path)
+            _copy_archives(_archive_dir(safety_path))
+
+        _copy(path, database.DB_FILE)
+        for archive in _archive_files(archive_folder).values():
+            os.remove(archive)
+        for year, archive in _archive_files(_archive_dir(path)).items():
+            os.makedirs(archive_folder, exist_ok=True)
+            _copy(archive, database.archive_path(year))
+        database.report_cache.clear()
+    except (sqlite3.Error, OSError) as e:
+        return False, f"{config.ERROR_MESSAGES['db_error']}: {e}"
+
+    ok, message = verify_backup(database.DB_FILE, archive_folder)
+    if not ok:
+        return False, f"База после восстановления не прошла проверку: {message}"
+
+    note = f"\nПрежняя база сохранена: {safety_path}" if safety_path else ""
+    return True, f"База восстановлена из {path}. {message}{note}"
+
+
+class BackupScheduler:
+    """Фоновые копии по расписанию и после N сохранений"""
+
+    def __init__(self, interval_min=None, every_n_saves=None):
+        self.interval = (interval_min or config.BACKUP_INTERVAL_MIN) * 60
+        self.every_n_saves = every_n_saves if every_n_saves is not None else config.BACKUP_EVERY_N_SAVES
+        self._saves = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+
+        backups = list_backups()
+        self._last_backup = backups[0]['created'].timestamp() if backups else 0.0
+
+        self._thread = threading.Thread(target=self._run, name="db-backup", daemon=True)
+        self._thread.start()
+
+    def report_saved(self):
+        """Отметить сохранённый отчёт (вызывается после записи в БД)"""
+        with self._lock:
+            self._saves += 1
+            due = self.every_n_saves and self._saves >= self.every_n_saves
+        if due:
+            self._wake.set()
+
+    def _due(self):
+        with self._lock:
+            by_saves = self.every_n_saves and self._saves >= self.every_n_saves
+        return by_saves or time.time() - self._last_backup >= self.interval
+
+    def _run(self):
+        while not self._stopping:
+            if self._due():
+                with self._lock:
+                    self._saves = 0
+                try:
+                    create_backup()
+                except Exception as e:
+                    if config.DEBUG_MODE:
+                        print(f"Ошибка резервного копирования: {e}")
+                # Время отмечается и при ошибке, чтобы не повторять попытку в цикле
+                self._last_backup = time.time()
+
+            timeout = max(1.0, self.interval - (time.time() - self._last_backup))
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def stop(self, timeout=30.0):
+        """Остановить планировщик, дождавшись текущей копии"""
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(timeout)
+
+
+# Планировщик процесса (запускается main.py / server.py)
+scheduler = None
+
+
+def start_scheduler():
+    """Запустить фоновые копии, если они включены в config"""
+    global scheduler
+    if scheduler is None and config.BACKUP_ENABLED and config.BACKUP_FOLDER:
+        scheduler = BackupScheduler()
+    return scheduler
+
+
+def stop_scheduler():
+    global scheduler
+    if scheduler is not None:
+        scheduler.stop()
+        scheduler = None
+
+
+def notify_report_saved():
+    """Сообщить планировщику о сохранённом отчёте (если он запущен)"""
+    if scheduler is not None:
+        scheduler.report_saved()
+
+
+def main(argv):
+    """Командная строка: create | list | verify <файл> | restore <файл>"""
+    command = argv[1] if len(argv) > 1 else ""
+
+    if command == "create":
+        path = create_backup(progress=lambda done, total: print(f"\r{done}/{total} страниц", end=""))
+        print(f"\nКопия: {path}")
+        return 0
+
+    if command == "list":
+        for backup in list_backups():
+            print(f"{backup['name']}  {backup['created']:%d.%m.%Y %H:%M}  {backup['size'] // 1024} КБ")
+        return 0
+
+    if command in ("verify", "restore") and len(argv) > 2:
+        action = verify_backup if command == "verify" else restore_backup
+        ok, message = action(argv[2])
+        print(message)
+        return 0 if ok else 1
+
+    print("Использование: python backup.py create | list | verify <файл> | restore <файл>")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""
+benchmark.py — замеры производительности на синтетических данных
+
+Создаёт во временной папке формы в раскладке формы/ (от 100 до 5000
+вопросов) и базы на 1k–200k отчётов, затем замеряет разбор формы,
+init_report, save_report_to_db, get_all_reports, get_report_by_id,
+create_excel_report и подготовку сообщения Telegram (форматирование
+и разбиение на части). Работает без GUI и без сети.
+
+    python benchmark.py --output bench.json
+    python benchmark.py --questions 100,5000 --reports 1000,200000 --output new.json
+    python benchmark.py --baseline bench.json --tolerance 0.2
+
+С --baseline результаты сравниваются с прошлым запуском по медиане,
+замедление больше tolerance считается регрессией (код выхода 1).
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import config
+import database
+from logic import ReportLogic
+from export_excel import create_excel_report
+from telegram_service import TelegramService, split_message
+from memory_diag import tracker
+
+DEFAULT_QUESTIONS = (100, 1000, 5000)
+DEFAULT_REPORTS = (1000, 10000)
+DEFAULT_ANSWERS_PER_REPORT = 20
+DEFAULT_REPEAT = 5
+
+WORDS = ("проверка", "выполнение", "требований", "документации", "персонала", "оборудования",
+         "контроль", "качества", "процесса", "записей", "анализ", "несоответствий", "обучение",
+         "поставщиков", "измерений", "корректирующих", "действий", "руководство", "аудита")
+
+
+def synthetic_text(rng, min_words, max_words):
+    """Случайная фраза из словаря"""
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))).capitalize()
+
+
+# -----------------------------------------------------------------------------
+# Синтетические данные
+# -----------------------------------------------------------------------------
+
+def make_template():
+    """Минимальный шаблон шаблоны/отчет.xlsx, если его нет"""
+    import openpyxl
+    path = os.path.join(config.TEMPLATES_FOLDER, "отчет.xlsx")
+    if not os.path.exists(path):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws['A1'] = "Отчёт"
+        ws['A2'] = "Вопрос"
+        ws['B2'] = "Ответ"
+        ws['A6'] = "Дата создания отчета:"
+        wb.save(path)
+    return path
+
+
+def make_form(question_count, rng):
+    """Форма формы/Бенчмарк_<N>.xlsx с question_count вопросами"""
+    import openpyxl
+    form_name = f"Бенчмарк_{question_count}"
+    path = os.path.join(config.FORMS_FOLDER, f"{form_name}.xlsx")
+    if not os.path.exists(path):
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(["Вопрос", "ГОСТ ИСО 9001", "Руководство по качеству", "Документы"])
+        for i in range(question_count):
+            ws.append([
+                f"{i + 1}. {synthetic_text(rng, 6, 20)}?",
+                f"п. {rng.randint(4, 10)}.{rng.randint(1, 9)} {synthetic_text(rng, 5, 15)}",
+                synthetic_text(rng, 5, 15),
+                synthetic_text(rng, 2, 6)
+            ])
+        wb.save(path)
+    return form_name, path
+
+
+def make_answers(question_count, rng):
+    """Ответы отчёта: около трети с комментарием"""
+    return [{
+        'question_text': f"{i + 1}. {synthetic_text(rng, 6, 20)}?",
+        'answer_yes_no': "Да" if rng.random() < 0.85 else "Нет",
+        'comment': synthetic_text(rng, 3, 12) if rng.random() < 0.3 else "",
+        'gost_text': synthetic_text(rng, 5, 15),
+        'quality_text': synthetic_text(rng, 5, 15),
+        'documents_text': synthetic_text(rng, 2, 6)
+    } for i in range(question_count)]
+
+
+def make_database(db_file, report_count, answers_per_report, rng):
+    """База на report_count отчётов, заполняется пачками в одной транзакции"""
+    database.DB_FILE = db_file
+    if os.path.exists(db_file):
+        return db_file
+
+    database.init_database()
+    questions = [f"{i + 1}. {synthetic_text(rng, 6, 20)}?" for i in range(answers_per_report)]
+    forms = [f"Форма_{i}" for i in range(10)]
+
+    # Прямое соединение: массовая вставка без трассировки и замеров
+    conn = sqlite3.connect(db_file)
+    try:
+        batch = 1000
+        for start in range(0, report_count, batch):
+            reports = []
+            for report_id in range(start + 1, min(start + batch, report_count) + 1):
+                year = 2015 + report_id % 10
+                month = config.MONTHS[report_id % 12]
+                reports.append((
+                    report_id, rng.choice(forms), month, year, f"01.01.{year}",
+                    f"{(report_id % 28) + 1:02d}.{(report_id % 12) + 1:02d}.{year} 12:00:00",
+                    f"отчеты/bench_{report_id}.xlsx"
+                ))
+            conn.executemany(
+                'INSERT INTO reports (id, form_name, month, year, report_date, created_at, file_path) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', reports
+            )
+            conn.executemany(
+                'INSERT INTO answers (report_id, question_text, answer_yes_no, comment, '
+                'gost_text, quality_text, documents_text) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (report[0], question, "Да" if rng.random() < 0.85 else "Нет",
+                     synthetic_text(rng, 3, 12) if rng.random() < 0.3 else "",
+                     "п. 7.5 Документированная информация", "Раздел 4", "СТП 01")
+                    for report in reports for question in questions
+                ]
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+    database.rebuild_question_stats()
+    return db_file
+
+
+# -----------------------------------------------------------------------------
+# Замеры
+# -----------------------------------------------------------------------------
+
+def time_call(func, repeat, setup=None):
+    """Выполнить func repeat раз; setup() перед каждым запуском не замеряется"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'runs': repeat,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'max_ms': round(max(timings), 3)
+    }
+
+
+def bench_forms(question_counts, repeat, rng, results):
+    """Разбор формы, init_report, сохранение, Excel и Telegram по размерам форм"""
+    make_template()
+    telegram = TelegramService()
+    database.DB_FILE = "bench_save.db"
+    database.init_database()
+
+    for count in question_counts:
+        form_name, path = make_form(count, rng)
+        logic = ReportLogic()
+
+        results[f"parse_form[{count}q]"] = time_call(lambda: logic.load_questions_from_excel(path), repeat)
+        results[f"init_report[{count}q]"] = time_call(
+            lambda: logic.init_report(form_name, "Март", 2025, "31.03.2025"), repeat)
+
+        answers = make_answers(count, rng)
+        report_data = {'form_name': form_name, 'month': "Март", 'year': 2025, 'report_date': "31.03.2025"}
+        results[f"save_report_to_db[{count}q]"] = time_call(
+            lambda: database.save_report_to_db(report_data, answers, "bench.xlsx"), repeat)
+
+        results[f"create_excel_report[{count}q]"] = time_call(
+            lambda: os.remove(create_excel_report(f"{form_name}_Март_2025", form_name, "Март", 2025, answers)),
+            repeat)
+
+        message_data = dict(report_data, created_at="31.03.2025 12:00:00", answers=answers)
+        results[f"telegram_format[{count}q]"] = time_call(
+            lambda: telegram._format_message(message_data), repeat)
+        text = telegram._format_message(message_data)
+        results[f"telegram_split[{count}q]"] = time_call(lambda: split_message(text), repeat)
+
+        tracker.checkpoint(f"формы {count}q", verbose=False)
+
+
+def bench_databases(report_counts, answers_per_report, repeat, rng, results):
+    """Чтение архива и отчёта по размерам базы"""
+    for count in report_counts:
+        make_database(f"bench_{count}.db", count, answers_per_report, rng)
+
+        results[f"get_all_reports[{count}r]"] = time_call(database.get_all_reports, repeat)
+
+        ids = [rng.randint(1, count) for _ in range(repeat)]
+        results[f"get_report_by_id[{count}r]"] = time_call(
+            lambda: database.get_report_by_id(ids.pop()), repeat, setup=database.report_cache.clear)
+        # Первый вызов вне замера: отчет попадает в кэш, замеряются только попадания
+        database.get_report_by_id(1)
+        results[f"get_report_by_id_cached[{count}r]"] = time_call(
+            lambda: database.get_report_by_id(1), repeat)
+
+        tracker.checkpoint(f"база {count}r", verbose=False)
+
+
+# -----------------------------------------------------------------------------
+# Сравнение с базовым запуском
+# -----------------------------------------------------------------------------
+
+def compare(results, baseline, tolerance):
+    """
+    Сравнить медианы с базовым запуском
+    Returns: (строки сравнения, число регрессий)
+    """
+    rows = []
+    regressions = 0
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get('median_ms'):
+            rows.append((name, None, current['median_ms'], None, "новый"))
+            continue
+        ratio = current['median_ms'] / previous['median_ms']
+        if ratio > 1 + tolerance:
+            status = "РЕГРЕССИЯ"
+            regressions += 1
+        elif ratio < 1 - tolerance:
+            status = "быстрее"
+        else:
+            status = "="
+        rows.append((name, previous['median_ms'], current['median_ms'], ratio, status))
+    return rows, regressions
+
+
+def print_comparison(rows):
+    print(f"{'Операция':45} {'было, мс':>12} {'стало, мс':>12} {'×':>7}  статус")
+    for name, before, after, ratio, status in rows:
+        before_text = f"{before:.3f}" if before is not None else "—"
+        ratio_text = f"{ratio:.2f}" if ratio is not None else "—"
+        print(f"{name:45} {before_text:>12} {after:>12.3f} {ratio_text:>7}  {status}")
+
+
+def parse_sizes(text):
+    return tuple(int(part) for part in text.split(",") if part.strip())
+
+
+def main(argv=None):
+    """Точка входа командной строки"""
+    parser = argparse.ArgumentParser(description="Замеры производительности на синтетических данных")
+    parser.add_argument("--questions", type=parse_sizes, default=DEFAULT_QUESTIONS,
+                        help="размеры форм через запятую (по умолчанию 100,1000,5000)")
+    parser.add_argument("--reports", type=parse_sizes, default=DEFAULT_REPORTS,
+                        help="размеры баз через запятую (по умолчанию 1000,10000)")
+    parser.add_argument("--answers", type=int, default=DEFAULT_ANSWERS_PER_REPORT,
+                        help="ответов в отчёте синтетической базы")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="повторов каждого замера")
+    parser.add_argument("--seed", type=int, default=1, help="зерно генератора данных")
+    parser.add_argument("--workdir", help="папка для данных (по умолчанию временная, удаляется)")
+    parser.add_argument("--output", help="файл JSON с результатами")
+    parser.add_argument("--baseline", help="JSON прошлого запуска для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="допустимое замедление медианы (0.2 = 20%%)")
+    parser.add_argument("--memory", action="store_true",
+                        help="отслеживать память tracemalloc (замедляет замеры времени)")
+    parser.add_argument("--memory-budget-mb", type=float, default=config.MEMORY_BUDGET_MB,
+                        help="допустимый пик памяти с --memory, МБ")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)['results']
+    output = os.path.abspath(args.output) if args.output else None
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_")
+    os.makedirs(workdir, exist_ok=True)
+    previous_dir = os.getcwd()
+    os.chdir(workdir)
+    config.ensure_work_folders()
+
+    # Служебная печать модулей не нужна в выводе замеров
+    config.DEBUG_MODE = False
+    rng = random.Random(args.seed)
+    results = {}
+    if args.memory:
+        tracker.start()
+    started = time.perf_counter()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            bench_forms(args.questions, args.repeat, rng, results)
+            bench_databases(args.reports, args.answers, args.repeat, rng, results)
+    finally:
+        os.chdir(previous_dir)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec="seconds"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'questions': list(args.questions),
+            'reports': list(args.reports),
+            'answers_per_report': args.answers,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'elapsed_sec': round(time.perf_counter() - started, 1)
+        },
+        'results': results
+    }
+
+    memory_exceeded = False
+    if args.memory:
+        peak_mb = tracker.peak_mb()
+        memory_exceeded = peak_mb > args.memory_budget_mb
+        report['memory'] = {
+            'peak_mb': peak_mb,
+            'budget_mb': args.memory_budget_mb,
+            'checkpoints': list(tracker.history)
+        }
+        tracker.stop()
+
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.memory:
+        for entry in report['memory']['checkpoints']:
+            print(f"[Память] {entry['label']:20} {entry['current_mb']:>8} МБ  ({entry['growth_mb']:+.2f})")
+        print(f"Пик памяти: {report['memory']['peak_mb']} МБ (бюджет {args.memory_budget_mb} МБ)"
+              + (" — ПРЕВЫШЕН" if memory_exceeded else ""))
+
+    regressions = 0
+    if baseline is None:
+        for name, result in results.items():
+            print(f"{name:45} медиана {result['median_ms']:>10.3f} мс  (мин {result['min_ms']:.3f})")
+    else:
+        rows, regressions = compare(results, baseline, args.tolerance)
+        print_comparison(rows)
+        if regressions:
+            print(f"Регрессий: {regressions}")
+
+    return 1 if regressions or memory_exceeded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
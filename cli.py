@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+cli.py — пакетное создание отчётов без графического интерфейса
+
+Ответы читаются из JSON, NDJSON или CSV (файлы или stdin), отчёты
+создаются параллельно пулом потоков через ReportLogic и слой экспорта.
+Итог печатается в stdout в формате JSON; служебный вывод идёт в stderr.
+
+Формат задания (JSON-объект, элемент JSON-массива или строка NDJSON):
+    {"form_name": "Главный_инженер", "month": "Март", "year": 2025,
+     "report_date": "31.03.2025",
+     "answers": [{"number": 1, "answer": "Да", "comment": ""}, ...]}
+Ответ можно указать по номеру (number), по тексту вопроса (question)
+или по порядку в списке; answers может быть и словарём {вопрос: ответ}.
+
+CSV: колонки form_name, month, year, report_date, number или question,
+answer, comment; строки одного отчёта группируются по форме и периоду.
+
+Примеры:
+    python cli.py ответы.json
+    python cli.py --format csv --workers 8 ответы.csv > итог.json
+    cat ответы.ndjson | python cli.py --format ndjson -
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import config
+from database import init_database, question_hash
+from logic import ReportLogic, find_form_file
+from report_diff import period_key
+
+YES_VALUES = {"да", "yes", "y", "true", "1", "+"}
+NO_VALUES = {"нет", "no", "n", "false", "0", "-"}
+
+
+class JobError(Exception):
+    """Ошибка в данных задания"""
+
+
+def normalize_answer(value):
+    """Привести ответ к "Да"/"Нет" или вернуть пустую строку"""
+    if isinstance(value, bool):
+        return "Да" if value else "Нет"
+    text = str(value if value is not None else "").strip().lower()
+    if text in YES_VALUES:
+        return "Да"
+    if text in NO_VALUES:
+        return "Нет"
+    if text:
+        raise JobError(f"Недопустимый ответ: {value!r} (ожидается Да/Нет)")
+    return ""
+
+
+# -----------------------------------------------------------------------------
+# Чтение заданий
+# -----------------------------------------------------------------------------
+
+def detect_format(path, text):
+    """Формат по расширению файла, иначе по содержимому"""
+    ext = os.path.splitext(path)[1].lower() if path != "-" else ""
+    if ext in (".json", ".ndjson", ".csv"):
+        return ext[1:]
+    if ext == ".jsonl":
+        return "ndjson"
+
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        return "json"
+    if stripped.startswith("{"):
+        first_line = stripped.split("\n", 1)[0].strip()
+        try:
+            json.loads(first_line)
+            return "ndjson"
+        except ValueError:
+            return "json"
+    return "csv"
+
+
+def parse_jobs(text, fmt):
+    """Список заданий из текста в формате json / ndjson / csv"""
+    if fmt == "json":
+        data = json.loads(text)
+        return data if isinstance(data, list) else [data]
+
+    if fmt == "ndjson":
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    if fmt == "csv":
+        jobs = {}
+        for row in csv.DictReader(io.StringIO(text)):
+            key = (row.get("form_name", ""), row.get("month", ""), row.get("year", ""))
+            job = jobs.setdefault(key, {
+                "form_name": key[0],
+                "month": key[1],
+                "year": key[2],
+                "report_date": row.get("report_date", ""),
+                "answers": []
+            })
+            job["answers"].append({
+                "number": row.get("number") or None,
+                "question": row.get("question") or None,
+                "answer": row.get("answer", ""),
+                "comment": row.get("comment", "")
+            })
+        return list(jobs.values())
+
+    raise ValueError(f"Неизвестный формат: {fmt}")
+
+
+def read_jobs(paths, fmt=None):
+    """Прочитать задания из файлов ('-' — stdin)"""
+    jobs = []
+    for path in paths:
+        if path == "-":
+            text = sys.stdin.read()
+        else:
+            with open(path, encoding="utf-8-sig") as f:
+                text = f.read()
+        jobs.extend(parse_jobs(text, fmt or detect_format(path, text)))
+    return jobs
+
+
+# -----------------------------------------------------------------------------
+# Выполнение
+# -----------------------------------------------------------------------------
+
+class FormCache:
+    """Вопросы форм, разобранные один раз на весь запуск"""
+
+    def __init__(self):
+        self._forms = {}
+        self._lock = threading.Lock()
+
+    def questions(self, file_path):
+        """Вопросы формы; файл перечитывается, если изменился на диске"""
+        key = (file_path, os.path.getmtime(file_path))
+        with self._lock:
+            entry = self._forms.get(key)
+            if entry is None:
+                entry = self._forms[key] = {"lock": threading.Lock(), "questions": None}
+
+        with entry["lock"]:
+            if entry["questions"] is None:
+                logic = ReportLogic()
+                if not logic.load_questions_from_excel(file_path):
+                    raise JobError(f"Не удалось загрузить вопросы из файла: {file_path}")
+                entry["questions"] = logic.questions_list
+            return entry["questions"]
+
+
+def apply_answers(logic, answers):
+    """Перенести ответы задания в logic.answers_list"""
+    if isinstance(answers, dict):
+        answers = [
+            dict(value, question=question) if isinstance(value, dict)
+            else {"question": question, "answer": value}
+            for question, value in answers.items()
+        ]
+
+    by_hash = {}
+    for index, answer in enumerate(logic.answers_list):
+        by_hash.setdefault(question_hash(answer['question_text']), index)
+
+    for position, item in enumerate(answers):
+        if not isinstance(item, dict):
+            item = {"answer": item}
+
+        if item.get("number") not in (None, ""):
+            index = int(item["number"]) - 1
+        elif item.get("question"):
+            index = by_hash.get(question_hash(item["question"]))
+            if index is None:
+                raise JobError(f"Вопрос не найден в форме: {item['question'][:80]}")
+        else:
+            index = position
+
+        if not 0 <= index < len(logic.answers_list):
+            raise JobError(f"Номер вопроса вне формы: {index + 1}")
+
+        current = logic.answers_list[index]
+        answer = normalize_answer(item.get("answer")) or current['answer_yes_no']
+        comment = item.get("comment")
+        logic.save_answer(index, answer, current['comment'] if comment is None else str(comment))
+
+
+def run_job(job, forms, prefill=False):
+    """Создать один отчёт; возвращает запись итоговой сводки"""
+    started = time.perf_counter()
+    result = {
+        "form_name": job.get("form_name"),
+        "month": job.get("month"),
+        "year": job.get("year"),
+        "status": "error"
+    }
+    try:
+        form_name = str(job.get("form_name") or "").strip()
+        month = str(job.get("month") or "").strip().capitalize()
+        year = str(job.get("year") or "").strip()
+        if not form_name or not month or not year:
+            raise JobError("Не указаны form_name, month или year")
+        if month not in config.MONTHS:
+            raise JobError(f"Неизвестный месяц: {month}")
+        report_date = job.get("report_date") or datetime.now().strftime("%d.%m.%Y")
+
+        file_path, _ = find_form_file(form_name, month)
+        if not file_path:
+            raise JobError(f"Файл формы не найден: {form_name} ({month})")
+
+        logic = ReportLogic()
+        logic.questions_list = forms.questions(file_path)
+        logic.form_file = file_path
+        logic.init_report(form_name, month, year, report_date)
+
+        if prefill:
+            logic.prefill_from_previous()
+            logic.confirm_prefilled()
+
+        apply_answers(logic, job.get("answers") or [])
+
+        all_answered, missing = logic.check_all_answered()
+        if not all_answered:
+            raise JobError(f"{config.ERROR_MESSAGES['no_answer']} {missing}")
+
+        success, message = logic.save_report()
+        if not success:
+            raise JobError(message)
+
+        result.update({
+            "status": "ok",
+            "report_id": logic.last_report_id,
+            "file": message,
+            "questions": len(logic.answers_list)
+        })
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["elapsed_sec"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_jobs(jobs, workers=None, prefill=False):
+    """
+    Выполнить задания пулом потоков; результаты в порядке заданий
+    С prefill задания одной формы идут последовательно по периодам,
+    чтобы каждый отчёт предзаполнялся из только что созданного предыдущего
+    """
+    forms = FormCache()
+    workers = max(1, workers or config.CLI_MAX_WORKERS)
+    results = [None] * len(jobs)
+
+    if prefill:
+        groups = {}
+        for index, job in enumerate(jobs):
+            groups.setdefault(str(job.get("form_name") or "").strip(), []).append(index)
+        batches = [sorted(indices, key=lambda i: period_key(jobs[i])) for indices in groups.values()]
+    else:
+        batches = [[index] for index in range(len(jobs))]
+
+    def run_batch(indices):
+        for index in indices:
+            results[index] = run_job(jobs[index], forms, prefill)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cli") as pool:
+        list(pool.map(run_batch, batches))
+    return results
+
+
+def main(argv=None):
+    """Точка входа командной строки"""
+    parser = argparse.ArgumentParser(description="Пакетное создание отчётов без GUI")
+    parser.add_argument("inputs", nargs="*", default=["-"],
+                        help="файлы с ответами (по умолчанию stdin)")
+    parser.add_argument("--format", choices=["json", "ndjson", "csv"],
+                        help="формат входных данных (по умолчанию — по расширению)")
+    parser.add_argument("--workers", type=int, default=config.CLI_MAX_WORKERS,
+                        help="число параллельных потоков")
+    parser.add_argument("--workdir", help="рабочая директория с папками формы/ и отчеты/")
+    parser.add_argument("--prefill", action="store_true",
+                        help="недостающие ответы взять из прошлого отчёта той же формы")
+    args = parser.parse_args(argv)
+
+    summary_out = sys.stdout
+    started = time.perf_counter()
+
+    # Служебные сообщения модулей не должны смешиваться с JSON-итогом
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.workdir:
+            os.chdir(args.workdir)
+        config.ensure_work_folders()
+        init_database()
+
+        try:
+            jobs = read_jobs(args.inputs, args.format)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка чтения входных данных: {e}", file=sys.stderr)
+            return 2
+
+        results = run_jobs(jobs, args.workers, args.prefill)
+
+    succeeded = sum(1 for r in results if r["status"] == "ok")
+    json.dump({
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "elapsed_sec": round(time.perf_counter() - started, 3),
+        "reports": results
+    }, summary_out, ensure_ascii=False, indent=2)
+    summary_out.write("\n")
+
+    return 0 if succeeded == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,38 +5,6 @@
 """
 
 import os
-import sys
-import platform
-
-# =============================================================================
-# ОПРЕДЕЛЕНИЕ РАБОЧЕЙ ДИРЕКТОРИИ
-# =============================================================================
-
-def get_base_path():
-    """Получить базовую директорию для работы программы"""
-    if getattr(sys, 'frozen', False):
-        # Запущен как .exe/.app
-        if platform.system() == 'Windows':
-            # На Windows - папка Documents пользователя
-            return os.path.join(os.path.expanduser('~'), 'Documents', 'SistemaOtchetov')
-        else:
-            # На macOS - рядом с программой
-            return os.path.dirname(sys.executable)
-    else:
-        # Запущен из исходников
-        return os.path.dirname(os.path.abspath(__file__))
-
-BASE_DIR = get_base_path()
-
-# Папки для работы программы
-FORMS_DIR = os.path.join(BASE_DIR, "формы")
-REPORTS_DIR = os.path.join(BASE_DIR, "отчеты")
-TEMPLATES_DIR = os.path.join(BASE_DIR, "шаблоны")
-DB_PATH = os.path.join(BASE_DIR, "reports.db")
-
-# Создать папки при импорте
-for directory in [BASE_DIR, FORMS_DIR, REPORTS_DIR, TEMPLATES_DIR]:
-    os.makedirs(directory, exist_ok=True)
 
 # =============================================================================
 # ПУТИ К ФАЙЛАМ И ПАПКАМ
@@ -49,11 +17,74 @@ WORK_DIR_NAME = "Система отчетов"
 DB_FILE = "reports.db"
 BACKUP_FOLDER = "backups/"
 
+# Резервные копии (backup.py): по расписанию и после N сохранений, с ротацией
+BACKUP_ENABLED = True
+BACKUP_INTERVAL_MIN = 60
+BACKUP_EVERY_N_SAVES = 10
+BACKUP_KEEP = 10
+BACKUP_MAX_AGE_DAYS = 90
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP_SEC = 0.05
+# Запись в базу другим соединением (автосохранение черновика) перезапускает
+# постраничное копирование; после стольких перезапусков копия снимается за один шаг
+BACKUP_MAX_RESTARTS = 5
+
+# Годовые архивы (year_archive.py): отчеты закрытых лет переносятся
+# в архив/reports_<год>.db и подключаются к запросам через ATTACH.
+# В рабочей базе остаются ARCHIVE_HOT_YEARS последних лет (текущий и предыдущий)
+YEAR_ARCHIVE_FOLDER = "архив/"
+ARCHIVE_HOT_YEARS = 2
+ARCHIVE_BATCH_SIZE = 200
+ARCHIVE_BATCH_PAUSE_SEC = 0.05
+
+# Срок хранения (retention.py): отчеты за годы старше RETENTION_YEARS последних
+# удаляются вместе с файлами Excel (0 — не удалять). Файлы удаляются ("delete")
+# или переносятся в PURGE_FILES_FOLDER ("archive")
+RETENTION_YEARS = 5
+PURGE_BATCH_SIZE = 50
+PURGE_BATCH_PAUSE_SEC = 0.05
+PURGE_FILES_ACTION = "archive"
+PURGE_FILES_FOLDER = "архив/отчеты/"
+# Страниц за шаг PRAGMA incremental_vacuum после удаления
+PURGE_VACUUM_PAGES = 1000
+
+# Сжатие длинных текстов ответов (text_codec.py): комментарий и справочные поля
+# длиннее порога (байт UTF-8) хранятся сжатыми zlib; 0 — не сжимать новые записи
+TEXT_COMPRESS_MIN_BYTES = 256
+TEXT_COMPRESS_LEVEL = 6
+TEXT_COMPRESS_BATCH_SIZE = 1000
+
+# Кэш отчётов в памяти (архив, Telegram, повторный экспорт)
+REPORT_CACHE_MAX_ENTRIES = 32
+REPORT_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
 # Папки для работы
 FORMS_FOLDER = "формы/"
 REPORTS_FOLDER = "отчеты/"
 TEMPLATES_FOLDER = "шаблоны/"
 
+# Файлы отчетов раскладываются по папкам отчеты/<год>/<форма>/ (report_files.py
+# переносит старые файлы); False — все файлы в одной папке отчеты/
+REPORTS_SHARDED = True
+REPORTS_MIGRATE_BATCH_SIZE = 500
+
+# Сводки за период и сравнения отчетов в БД не записываются — они лежат
+# отдельно от отчеты/, в сводки/<год>/<форма>/ (раскладка по REPORTS_SHARDED)
+SUMMARIES_FOLDER = "сводки/"
+
+
+def ensure_work_folders():
+    """
+    Создать рабочие папки в текущей директории (один раз при запуске)
+    Returns: список созданных папок (пустой, если все уже были)
+    """
+    created = []
+    for folder in (FORMS_FOLDER, REPORTS_FOLDER, TEMPLATES_FOLDER, BACKUP_FOLDER):
+        if folder and not os.path.isdir(folder):
+            os.makedirs(folder, exist_ok=True)
+            created.append(folder.rstrip('/'))
+    return created
+
 # =============================================================================
 # НАСТРОЙКИ ПРИЛОЖЕНИЯ
 # =============================================================================
@@ -61,6 +92,38 @@ TEMPLATES_FOLDER = "шаблоны/"
 APP_TITLE = "Система автоматизации отчётов"
 QUESTIONS_PER_PAGE = 5
 
+MONTHS = [
+    "Январь", "Февраль", "Март", "Апрель", "Май", "Июнь",
+    "Июль", "Август", "Сентябрь", "Октябрь", "Ноябрь", "Декабрь"
+]
+
+# Формы с таким числом вопросов и больше заполняются одним списком с прокруткой;
+# VIRTUAL_ROW_HEIGHT — оценка высоты строки до её первого показа (затем измеряется)
+VIRTUAL_LIST_MIN_QUESTIONS = 50
+VIRTUAL_ROW_HEIGHT = 190
+VIRTUAL_LIST_BUFFER_ROWS = 3
+
+# Просмотр отчёта: первая порция ответов выводится сразу, остальные частями
+VIEW_FIRST_CHUNK_ANSWERS = 40
+VIEW_CHUNK_ANSWERS = 100
+VIEW_CHUNK_DELAY_MS = 10
+
+# Фоновые задачи (загрузка форм, сохранение, архив, Telegram)
+TASK_MAX_WORKERS = 2
+TASK_POLL_INTERVAL_MS = 100
+
+# Автосохранение черновика: запись после паузы во вводе, но не реже интервала
+DRAFT_AUTOSAVE_DEBOUNCE_SEC = 1.5
+DRAFT_AUTOSAVE_INTERVAL_SEC = 5.0
+
+# Пакетная генерация отчётов из командной строки (cli.py)
+CLI_MAX_WORKERS = 4
+
+# Серверный режим (server.py): общий reports.db для нескольких рабочих мест
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_PAGE_SIZE = 50
+
 # =============================================================================
 # НАСТРОЙКИ ИНТЕРФЕЙСА
 # =============================================================================
@@ -152,7 +215,8 @@ INFO_MESSAGES = {
     "no_reports": "Нет сохранённых отчётов",
     "templates_folder_created": "Папка 'шаблоны' создана.\nПоместите туда файлы шаблонов документов.",
     "work_dir_set": "Рабочая папка: {path}",
-    "all_questions_answered": "Все вопросы заполнены.\n\nСохранить отчёт в базу данных и экспортировать в Excel?"
+    "all_questions_answered": "Все вопросы заполнены.\n\nСохранить отчёт в базу данных и экспортировать в Excel?",
+    "draft_found": "Найден незавершённый отчёт:\n{form_name} {month} {year}\n(изменён {updated_at})\n\nДа — продолжить заполнение\nНет — удалить черновик\nОтмена — решить позже"
 }
 
 DIALOG_TITLES = {
@@ -163,7 +227,8 @@ DIALOG_TITLES = {
     "confirm_save": "Завершение отчёта",
     "confirm_delete": "Подтверждение",
     "help": "Справка",
-    "documents": "Связанные документы"
+    "documents": "Связанные документы",
+    "draft": "Черновик отчёта"
 }
 
 # =============================================================================
@@ -185,6 +250,27 @@ VALIDATE_FILE_ACCESS = True
 DEBUG_MODE = True
 PRINT_SQL_QUERIES = False
 
+# Медленные запросы (sql_trace.py): порог в мс (0 — не отслеживать), журнал с ротацией
+SLOW_QUERY_MS = 200
+SLOW_QUERY_LOG = "slow_queries.log"
+SLOW_QUERY_LOG_MAX_BYTES = 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 3
+
+# Замеры времени операций (metrics.py): число последних замеров на операцию для перцентилей
+METRICS_ENABLED = True
+METRICS_MAX_SAMPLES = 5000
+
+# Диагностика памяти (memory_diag.py): снимки tracemalloc при смене экранов и экспорте
+MEMORY_DIAGNOSTICS = False
+MEMORY_TRACE_FRAMES = 1
+MEMORY_TOP_SITES = 10
+MEMORY_HISTORY_MAX = 200
+# Пик памяти для benchmark.py --memory (МБ), превышение — ошибка запуска
+MEMORY_BUDGET_MB = 512
+
+# Бюджет запуска: время до появления главного окна (мс), в режиме отладки
+STARTUP_BUDGET_MS = 1500
+
 # =============================================================================
 # TELEGRAM НАСТРОЙКИ
 # =============================================================================
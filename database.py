@@ -4,26 +4,246 @@
 """
 
 import sqlite3
+import hashlib
+import re
+import threading
 from datetime import datetime
 import os
 import config
+from report_cache import ReportCache
+from text_codec import pack_text, unpack_text, COMPRESSED_FIELDS
+from metrics import instrument_module
+from sql_trace import TracedConnection, tracing_enabled
 
 
 DB_FILE = config.DB_FILE
 
+# Кэш отчетов для get_report_by_id (сбрасывается при записи и удалении)
+report_cache = ReportCache(config.REPORT_CACHE_MAX_ENTRIES, config.REPORT_CACHE_MAX_BYTES)
+
+
+def get_report_cache_stats():
+    """Статистика кэша отчетов: попадания, промахи, заполненность"""
+    return report_cache.stats()
+
+
+def normalize_question(text):
+    """Нормализовать текст вопроса для сравнения между отчетами и версиями форм"""
+    text = (text or '').lower().replace('ё', 'е')
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def question_hash(text):
+    """Короткий хэш нормализованного текста вопроса"""
+    return hashlib.sha1(normalize_question(text).encode('utf-8')).hexdigest()[:16]
+
+
+class SharedConnection:
+    """
+    Общее соединение серверного режима, выдаваемое get_connection()
+    Пока функция модуля держит соединение, другие потоки ждут на блокировке;
+    close() откатывает незавершённую транзакцию и отпускает блокировку
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._lock = threading.RLock()
+
+    def acquire(self):
+        self._lock.acquire()
+        return self
+
+    def close(self):
+        try:
+            if self._conn.in_transaction:
+                self._conn.rollback()
+        finally:
+            self._lock.release()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+# Общее соединение (включается open_shared_connection() в серверном режиме)
+_shared_connection = None
+
+
+def open_shared_connection():
+    """
+    Открыть одно соединение на процесс: дальше get_connection() выдаёт его
+    всем потокам по очереди вместо открытия нового файла на каждый вызов
+    """
+    global _shared_connection
+    if _shared_connection is None:
+        conn = get_connection()
+        conn.close()
+        conn = sqlite3.connect(DB_FILE, timeout=10.0, check_same_thread=False, factory=_connection_factory())
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        _attach_archives(conn)
+        _shared_connection = SharedConnection(conn)
+    return _shared_connection
+
+
+def close_shared_connection():
+    """Закрыть общее соединение и вернуться к соединению на вызов"""
+    global _shared_connection
+    if _shared_connection is not None:
+        shared = _shared_connection.acquire()
+        _shared_connection = None
+        try:
+            shared._conn.close()
+        finally:
+            shared._lock.release()
+
+
+# =============================================================================
+# Годовые архивы: отчеты закрытых лет в отдельных файлах (см. year_archive.py)
+# =============================================================================
+
+REPORT_COLUMNS = ('id', 'form_name', 'month', 'year', 'report_date', 'created_at', 'file_path')
+ANSWER_COLUMNS = ('id', 'report_id', 'question_text', 'answer_yes_no', 'comment',
+                  'gost_text', 'quality_text', 'documents_text')
+DELIVERY_COLUMNS = ('id', 'report_id', 'chat_id', 'content_hash', 'message_ids', 'sent_at')
+
+# Представления all_* объединяют рабочую базу и подключенные архивы;
+# колонка shard — схема, в которой лежит строка ('main' или 'y<год>')
+ARCHIVE_VIEWS = (
+    ('all_reports', 'reports', REPORT_COLUMNS),
+    ('all_answers', 'answers', ANSWER_COLUMNS),
+    ('all_deliveries', 'telegram_deliveries', DELIVERY_COLUMNS),
+)
+
+
+def archive_schema(year):
+    """Имя схемы ATTACH для архива года"""
+    return f"y{int(year)}"
+
+
+def archive_path(year):
+    """Путь к файлу архива года"""
+    return os.path.join(config.YEAR_ARCHIVE_FOLDER.rstrip('/'), f"reports_{int(year)}.db")
+
+
+def list_archive_years():
+    """Годы, для которых есть файлы архива (по убыванию)"""
+    folder = config.YEAR_ARCHIVE_FOLDER.rstrip('/')
+    if not folder or not os.path.isdir(folder):
+        return []
+    years = []
+    for name in os.listdir(folder):
+        match = re.fullmatch(r'reports_(\d{4})\.db', name)
+        if match:
+            years.append(int(match.group(1)))
+    return sorted(years, reverse=True)
+
+
+def max_archive_years(conn):
+    """
+    Сколько годовых архивов можно подключить к соединению
+    Одно место ATTACH остается свободным: его занимают VACUUM и перенос года
+    """
+    return conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) - 1
+
+
+def _attach_archives(conn):
+    """
+    Подключить файлы годовых архивов и пересоздать временные представления all_*
+    Повторный вызов переподключает архивы (после переноса очередного года)
+    """
+    attached = [row[1] for row in conn.execute("PRAGMA database_list") if re.fullmatch(r'y\d{4}', row[1])]
+    for schema in attached:
+        conn.execute(f"DETACH DATABASE {schema}")
+
+    years = list_archive_years()
+    # Без части архивов их отчеты пропали бы из всех запросов, поэтому это ошибка;
+    # year_archive.archive_year() не создает архивов сверх лимита
+    limit = max_archive_years(conn)
+    if len(years) > limit:
+        raise sqlite3.DatabaseError(
+            f"Годовых архивов {len(years)}, подключить можно не больше {limit}: "
+            f"объедините или удалите старые архивы в {config.YEAR_ARCHIVE_FOLDER}"
+        )
+
+    schemas = ['main']
+    for year in years:
+        conn.execute(f"ATTACH DATABASE ? AS {archive_schema(year)}", (archive_path(year),))
+        schemas.append(archive_schema(year))
+
+    for view, table, columns in ARCHIVE_VIEWS:
+        conn.execute(f"DROP VIEW IF EXISTS temp.{view}")
+        union = " UNION ALL ".join(
+            f"SELECT {', '.join(columns)}, '{schema}' AS shard FROM {schema}.{table}"
+            for schema in schemas
+        )
+        conn.execute(f"CREATE TEMP VIEW {view} AS {union}")
+
+
+def refresh_archives():
+    """Переподключить архивы в общем соединении серверного режима"""
+    if _shared_connection is not None:
+        conn = _shared_connection.acquire()
+        try:
+            _attach_archives(conn)
+        finally:
+            conn.close()
+
+
+def connect_file(path):
+    """
+    Отдельное соединение с файлом базы (рабочей или архива года) без ATTACH
+    и проверки целостности — для пакетных операций обслуживания
+    """
+    conn = sqlite3.connect(path, timeout=10.0, factory=_connection_factory())
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def each_shard(conn, max_year=None):
+    """
+    Перебрать рабочую базу и файлы годовых архивов (до max_year включительно)
+    по одному: архив подключается к conn на время своей итерации, поэтому
+    лимит ATTACH не мешает пакетным операциям обслуживания
+    Уже подключенные архивы (соединения get_connection) используются как есть
+    Yields: (схема, год архива или None для рабочей базы)
+    """
+    attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+    yield 'main', None
+    for year in sorted(list_archive_years()):
+        if max_year is not None and year > max_year:
+            continue
+        schema = archive_schema(year)
+        if schema in attached:
+            yield schema, year
+            continue
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (archive_path(year),))
+        try:
+            yield schema, year
+        finally:
+            conn.execute(f"DETACH DATABASE {schema}")
+
+
+def _connection_factory():
+    """Класс соединения: с трассировкой SQL, если она включена в config"""
+    return TracedConnection if tracing_enabled() else sqlite3.Connection
+
 
 def get_connection():
     """
     Получить соединение с БД
     Raises: Exception если не удалось подключиться
     """
+    if _shared_connection is not None:
+        return _shared_connection.acquire()
+
     try:
         # Проверка прав на запись в директорию
         db_dir = os.path.dirname(os.path.abspath(DB_FILE)) or '.'
         if not os.access(db_dir, os.W_OK):
             raise PermissionError(config.ERROR_MESSAGES["no_write_access"])
 
-        conn = sqlite3.connect(DB_FILE, timeout=10.0)
+        conn = sqlite3.connect(DB_FILE, timeout=10.0, factory=_connection_factory())
         conn.row_factory = sqlite3.Row
         conn.execute("PRAGMA foreign_keys = ON")
 
@@ -34,6 +254,9 @@ def get_connection():
         if result[0] != 'ok':
             raise sqlite3.DatabaseError(config.ERROR_MESSAGES["db_corrupted"])
 
+        # Годовые архивы подключаются после проверки: она идёт только по рабочей базе
+        _attach_archives(conn)
+
         return conn
 
     except sqlite3.OperationalError as e:
@@ -59,6 +282,10 @@ def init_database():
         conn = get_connection()
         cursor = conn.cursor()
 
+        # Место после удаления отчетов возвращается шагами (retention.py);
+        # для существующей базы режим вступит в силу только после VACUUM
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
         # Таблица отчетов
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS reports (
@@ -98,8 +325,86 @@ def init_database():
             ON reports(created_at)
         ''')
 
+        # Поиск отчетов формы за период (сводки, предзаполнение)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_reports_form_period
+            ON reports(form_name, year, month)
+        ''')
+
+        # Журнал доставки в Telegram (защита от повторной отправки)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS telegram_deliveries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                report_id INTEGER NOT NULL,
+                chat_id TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                message_ids TEXT NOT NULL,
+                sent_at TEXT NOT NULL,
+                FOREIGN KEY (report_id) REFERENCES reports (id) ON DELETE CASCADE
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_deliveries_key
+            ON telegram_deliveries(report_id, chat_id, content_hash)
+        ''')
+
+        # Агрегаты ответов по вопросам (обновляются при сохранении/удалении отчета)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS question_stats (
+                form_name TEXT NOT NULL,
+                question_hash TEXT NOT NULL,
+                year INTEGER NOT NULL,
+                month TEXT NOT NULL,
+                question_text TEXT NOT NULL,
+                answer_count INTEGER NOT NULL DEFAULT 0,
+                yes_count INTEGER NOT NULL DEFAULT 0,
+                no_count INTEGER NOT NULL DEFAULT 0,
+                comment_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (form_name, question_hash, year, month)
+            )
+        ''')
+
+        # Черновики незавершённых отчётов (автосохранение)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS drafts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                form_name TEXT NOT NULL,
+                month TEXT NOT NULL,
+                year TEXT NOT NULL,
+                report_date TEXT NOT NULL,
+                form_file TEXT NOT NULL,
+                question_count INTEGER NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS draft_answers (
+                draft_id INTEGER NOT NULL,
+                question_index INTEGER NOT NULL,
+                answer_yes_no TEXT NOT NULL,
+                comment TEXT,
+                question_hash TEXT,
+                PRIMARY KEY (draft_id, question_index),
+                FOREIGN KEY (draft_id) REFERENCES drafts (id) ON DELETE CASCADE
+            )
+        ''')
+
+        # Черновики старых версий сохранялись без хэша вопроса
+        draft_columns = [row[1] for row in cursor.execute('PRAGMA table_info(draft_answers)')]
+        if 'question_hash' not in draft_columns:
+            cursor.execute('ALTER TABLE draft_answers ADD COLUMN question_hash TEXT')
+
         conn.commit()
 
+        # Первое заполнение агрегатов для уже существующих отчетов
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM question_stats), EXISTS (SELECT 1 FROM all_answers)')
+        has_stats, has_answers = cursor.fetchone()
+        if has_answers and not has_stats:
+            _rebuild_question_stats(conn)
+            conn.commit()
+
         if config.DEBUG_MODE:
             print(config.INFO_MESSAGES["db_initialized"])
 
@@ -146,6 +451,7 @@ def save_report_to_db(report_data, answers_list, file_path):
         ))
 
         report_id = cursor.lastrowid
+        report_cache.invalidate(report_id)
 
         for answer in answers_list:
             cursor.execute('''
@@ -155,12 +461,15 @@ def save_report_to_db(report_data, answers_list, file_path):
                 report_id,
                 answer['question_text'],
                 answer['answer_yes_no'],
-                answer['comment'],
-                answer['gost_text'],
-                answer['quality_text'],
-                answer.get('documents_text', '')
+                pack_text(answer['comment']),
+                pack_text(answer['gost_text']),
+                pack_text(answer['quality_text']),
+                pack_text(answer.get('documents_text', ''))
             ))
 
+        _update_question_stats(cursor, report_data['form_name'], report_data['year'],
+                               report_data['month'], answers_list, +1)
+
         conn.commit()
 
         if config.DEBUG_MODE:
@@ -197,8 +506,11 @@ def get_all_reports():
         cursor = conn.cursor()
 
         cursor.execute('''
-            SELECT id, form_name, month, year, report_date, created_at, file_path
-            FROM reports
+            SELECT id, form_name, month, year, report_date, created_at, file_path,
+                   EXISTS (
+                       SELECT 1 FROM all_deliveries d WHERE d.report_id = r.id
+                   ) AS telegram_sent
+            FROM all_reports r
             ORDER BY created_at DESC
         ''')
 
@@ -213,7 +525,8 @@ def get_all_reports():
                 'year': row['year'],
                 'report_date': row['report_date'],
                 'created_at': row['created_at'],
-                'file_path': row['file_path']
+                'file_path': row['file_path'],
+                'telegram_sent': bool(row['telegram_sent'])
             })
 
         return reports
@@ -225,9 +538,89 @@ def get_all_reports():
             conn.close()
 
 
-def get_report_by_id(report_id):
+def get_reports_page(limit=50, before_id=None, filters=None):
+    """
+    Страница архива по убыванию ID (постранично, без OFFSET)
+    before_id — ID последнего отчета предыдущей страницы; фильтры см. REPORT_FILTERS
+    Returns: (список отчетов без ответов, before_id следующей страницы или None)
+    Raises: Exception при ошибке чтения
+    """
+    conn = None
+    try:
+        where, params = _report_filter_sql(filters)
+        if before_id is not None:
+            where = (where + " AND " if where else "WHERE ") + "r.id < ?"
+            params.append(int(before_id))
+
+        conn = get_connection()
+        rows = conn.execute(f'''
+            SELECT r.id, r.form_name, r.month, r.year, r.report_date, r.created_at, r.file_path,
+                   EXISTS (
+                       SELECT 1 FROM all_deliveries d WHERE d.report_id = r.id
+                   ) AS telegram_sent
+            FROM all_reports r
+            {where}
+            ORDER BY r.id DESC
+            LIMIT ?
+        ''', params + [int(limit) + 1]).fetchall()
+
+        reports = []
+        for row in rows[:limit]:
+            report = _report_from_row(row)
+            del report['answers']
+            report['telegram_sent'] = bool(row['telegram_sent'])
+            reports.append(report)
+
+        next_before_id = reports[-1]['id'] if len(rows) > limit else None
+        return reports, next_before_id
+
+    except ValueError as e:
+        raise Exception(f"{config.ERROR_MESSAGES['validation_error']}: {e}")
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+# Поля ответа, доступные для выборки
+ANSWER_FIELDS = ('id', 'question_text', 'answer_yes_no', 'comment', 'gost_text', 'quality_text', 'documents_text')
+
+# Поля для просмотра, Telegram и Excel — без длинных справочных текстов
+LIGHT_ANSWER_FIELDS = ('id', 'question_text', 'answer_yes_no', 'comment')
+
+
+def _answer_columns(fields):
+    """
+    Проверить список полей ответа и вернуть его как кортеж
+    Raises: ValueError при неизвестном поле
+    """
+    fields = tuple(fields) if fields else ANSWER_FIELDS
+    unknown = [f for f in fields if f not in ANSWER_FIELDS]
+    if unknown:
+        raise ValueError(f"Неизвестные поля ответа: {', '.join(unknown)}")
+    return fields
+
+
+def _answer_from_row(row, fields):
+    """
+    Преобразовать строку answers в словарь (пустые справочные поля -> '')
+    Распаковываются только выбранные поля: справочные тексты в LIGHT_ANSWER_FIELDS не входят
+    """
+    answer = {}
+    for field in fields:
+        value = row[field]
+        if field in COMPRESSED_FIELDS:
+            value = unpack_text(value) if value is not None else ''
+        answer[field] = value
+    return answer
+
+
+def get_report_by_id(report_id, fields=None):
     """
     Получить отчет по ID со всеми ответами
+    fields - какие поля ответов читать (по умолчанию все, см. ANSWER_FIELDS / LIGHT_ANSWER_FIELDS)
+    Повторные запросы того же отчета обслуживаются из report_cache
     Returns: словарь с данными отчета или None если не найден
     Raises: Exception при ошибке чтения
     """
@@ -237,12 +630,18 @@ def get_report_by_id(report_id):
         if not isinstance(report_id, int) or report_id <= 0:
             raise ValueError(f"Некорректный ID отчета: {report_id}")
 
+        fields = _answer_columns(fields)
+
+        cached = report_cache.get(report_id, fields)
+        if cached is not None:
+            return cached
+
         conn = get_connection()
         cursor = conn.cursor()
 
         cursor.execute('''
             SELECT id, form_name, month, year, report_date, created_at, file_path
-            FROM reports
+            FROM all_reports
             WHERE id = ?
         ''', (report_id,))
 
@@ -253,15 +652,13 @@ def get_report_by_id(report_id):
                 print(f"Отчет с ID {report_id} не найден")
             return None
 
-        cursor.execute('''
-            SELECT question_text, answer_yes_no, comment, gost_text, quality_text, documents_text
-            FROM answers
+        cursor.execute(f'''
+            SELECT {', '.join(fields)}
+            FROM all_answers
             WHERE report_id = ?
             ORDER BY id
         ''', (report_id,))
 
-        answer_rows = cursor.fetchall()
-
         report_data = {
             'id': report_row['id'],
             'form_name': report_row['form_name'],
@@ -270,18 +667,10 @@ def get_report_by_id(report_id):
             'report_date': report_row['report_date'],
             'created_at': report_row['created_at'],
             'file_path': report_row['file_path'],
-            'answers': []
+            'answers': [_answer_from_row(row, fields) for row in cursor.fetchall()]
         }
 
-        for answer_row in answer_rows:
-            report_data['answers'].append({
-                'question_text': answer_row['question_text'],
-                'answer_yes_no': answer_row['answer_yes_no'],
-                'comment': answer_row['comment'],
-                'gost_text': answer_row['gost_text'],
-                'quality_text': answer_row['quality_text'],
-                'documents_text': answer_row['documents_text'] if answer_row['documents_text'] else ''
-            })
+        report_cache.put(report_id, fields, report_data)
 
         return report_data
 
@@ -294,6 +683,203 @@ def get_report_by_id(report_id):
             conn.close()
 
 
+def iter_report_answers(report_id, fields=LIGHT_ANSWER_FIELDS, batch_size=500):
+    """
+    Построчно выдавать ответы отчета, не загружая их все в память
+    Соединение закрывается по окончании перебора (или при закрытии генератора)
+    Raises: Exception при ошибке чтения
+    """
+    conn = None
+    try:
+        if not isinstance(report_id, int) or report_id <= 0:
+            raise ValueError(f"Некорректный ID отчета: {report_id}")
+
+        fields = _answer_columns(fields)
+
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT {', '.join(fields)}
+            FROM all_answers
+            WHERE report_id = ?
+            ORDER BY id
+        ''', (report_id,))
+
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield _answer_from_row(row, fields)
+
+    except ValueError as e:
+        raise Exception(f"{config.ERROR_MESSAGES['validation_error']}: {e}")
+    except GeneratorExit:
+        raise
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+# Допустимые фильтры отчётов: ключ -> условие SQL
+REPORT_FILTERS = {
+    'form_name': 'r.form_name = ?',
+    'month': 'r.month = ?',
+    'year': 'r.year = ?',
+    'year_from': 'r.year >= ?',
+    'year_to': 'r.year <= ?',
+}
+
+
+def _report_filter_sql(filters):
+    """
+    Построить WHERE по словарю фильтров
+    Returns: (sql, params)
+    Raises: ValueError при неизвестном фильтре
+    """
+    conditions = []
+    params = []
+    for key, value in (filters or {}).items():
+        if value is None:
+            continue
+        if key not in REPORT_FILTERS:
+            raise ValueError(f"Неизвестный фильтр отчетов: {key}")
+        conditions.append(REPORT_FILTERS[key])
+        params.append(value)
+
+    sql = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+    return sql, params
+
+
+def _report_from_row(row):
+    """Преобразовать строку reports в словарь отчета (без ответов)"""
+    return {
+        'id': row['id'],
+        'form_name': row['form_name'],
+        'month': row['month'],
+        'year': row['year'],
+        'report_date': row['report_date'],
+        'created_at': row['created_at'],
+        'file_path': row['file_path'],
+        'answers': []
+    }
+
+
+def get_reports_by_ids(report_ids, fields=None):
+    """
+    Получить несколько отчетов с ответами двумя запросами вместо N
+    ID передаются через временную таблицу, ответы группируются за один проход
+    Returns: список отчетов в порядке report_ids (ненайденные пропускаются)
+    Raises: Exception при ошибке чтения
+    """
+    conn = None
+    try:
+        ids = []
+        for report_id in report_ids:
+            if not isinstance(report_id, int) or report_id <= 0:
+                raise ValueError(f"Некорректный ID отчета: {report_id}")
+            ids.append(report_id)
+        if not ids:
+            return []
+
+        fields = _answer_columns(fields)
+
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('CREATE TEMP TABLE IF NOT EXISTS temp_report_ids (id INTEGER PRIMARY KEY)')
+        cursor.execute('DELETE FROM temp_report_ids')
+        cursor.executemany('INSERT OR IGNORE INTO temp_report_ids (id) VALUES (?)', [(i,) for i in ids])
+
+        cursor.execute('''
+            SELECT r.id, r.form_name, r.month, r.year, r.report_date, r.created_at, r.file_path
+            FROM all_reports r
+            JOIN temp_report_ids t ON t.id = r.id
+        ''')
+        reports = {row['id']: _report_from_row(row) for row in cursor.fetchall()}
+
+        columns = ', '.join(f"a.{f}" for f in fields)
+        cursor.execute(f'''
+            SELECT a.report_id AS owner_id, {columns}
+            FROM all_answers a
+            JOIN temp_report_ids t ON t.id = a.report_id
+            ORDER BY a.report_id, a.id
+        ''')
+
+        current_id = None
+        current_answers = None
+        for row in cursor:
+            if row['owner_id'] != current_id:
+                current_id = row['owner_id']
+                current_answers = reports[current_id]['answers']
+            current_answers.append(_answer_from_row(row, fields))
+
+        cursor.execute('DROP TABLE temp_report_ids')
+
+        return [reports[i] for i in dict.fromkeys(ids) if i in reports]
+
+    except ValueError as e:
+        raise Exception(f"{config.ERROR_MESSAGES['validation_error']}: {e}")
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+def iter_reports(filters=None, fields=LIGHT_ANSWER_FIELDS):
+    """
+    Построчно выдавать отчеты с ответами, подходящие под фильтры (см. REPORT_FILTERS)
+    Отчеты и ответы читаются двумя упорядоченными по report_id курсорами
+    и сливаются за один проход — в памяти только текущий отчет
+    Raises: Exception при ошибке чтения
+    """
+    conn = None
+    try:
+        fields = _answer_columns(fields)
+        where, params = _report_filter_sql(filters)
+
+        conn = get_connection()
+
+        report_cursor = conn.execute(f'''
+            SELECT r.id, r.form_name, r.month, r.year, r.report_date, r.created_at, r.file_path
+            FROM all_reports r
+            {where}
+            ORDER BY r.id
+        ''', params)
+
+        columns = ', '.join(f"a.{f}" for f in fields)
+        answer_cursor = conn.execute(f'''
+            SELECT a.report_id AS owner_id, {columns}
+            FROM all_answers a
+            JOIN all_reports r ON r.id = a.report_id
+            {where}
+            ORDER BY a.report_id, a.id
+        ''', params)
+
+        pending = answer_cursor.fetchone()
+        for report_row in report_cursor:
+            report = _report_from_row(report_row)
+            while pending is not None and pending['owner_id'] < report['id']:
+                pending = answer_cursor.fetchone()
+            while pending is not None and pending['owner_id'] == report['id']:
+                report['answers'].append(_answer_from_row(pending, fields))
+                pending = answer_cursor.fetchone()
+            yield report
+
+    except ValueError as e:
+        raise Exception(f"{config.ERROR_MESSAGES['validation_error']}: {e}")
+    except GeneratorExit:
+        raise
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
 def delete_report(report_id):
     """
     Удалить отчет из базы данных
@@ -309,14 +895,23 @@ def delete_report(report_id):
         cursor = conn.cursor()
 
         # Проверка существования отчета
-        cursor.execute('SELECT id FROM reports WHERE id = ?', (report_id,))
-        if not cursor.fetchone():
+        cursor.execute('SELECT id, form_name, month, year, shard FROM all_reports WHERE id = ?', (report_id,))
+        report_row = cursor.fetchone()
+        if not report_row:
             raise ValueError(f"Отчет с ID {report_id} не найден")
 
-        # Удаление (ответы удалятся автоматически благодаря ON DELETE CASCADE)
-        cursor.execute('DELETE FROM reports WHERE id = ?', (report_id,))
+        # Вычитаем ответы отчета из агрегатов
+        cursor.execute('''
+            SELECT question_text, answer_yes_no, comment FROM all_answers WHERE report_id = ?
+        ''', (report_id,))
+        _update_question_stats(cursor, report_row['form_name'], report_row['year'],
+                               report_row['month'], cursor.fetchall(), -1)
+
+        # Удаление из той базы, где лежит отчет (ответы удалятся благодаря ON DELETE CASCADE)
+        cursor.execute(f'DELETE FROM {report_row["shard"]}.reports WHERE id = ?', (report_id,))
 
         conn.commit()
+        report_cache.invalidate(report_id)
 
         if config.DEBUG_MODE:
             print(f"Отчет {report_id} удален из БД")
@@ -331,4 +926,611 @@ def delete_report(report_id):
         raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
     finally:
         if conn:
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+
+def get_answer_reference(answer_id):
+    """
+    Получить справочные поля одного ответа (ГОСТ, руководство, документы)
+    Используется при раскрытии ответа в просмотре отчёта
+    Returns: словарь с полями или None если ответ не найден
+    Raises: Exception при ошибке чтения
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT gost_text, quality_text, documents_text
+            FROM all_answers
+            WHERE id = ?
+        ''', (answer_id,))
+
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        return {
+            'gost_text': unpack_text(row['gost_text']) or '',
+            'quality_text': unpack_text(row['quality_text']) or '',
+            'documents_text': unpack_text(row['documents_text']) or ''
+        }
+
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+def find_delivery(report_id, chat_id, content_hash):
+    """
+    Найти запись об уже выполненной отправке отчёта в Telegram
+    Returns: словарь с данными доставки или None если отчёт с таким содержимым не отправлялся
+    Raises: Exception при ошибке чтения
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT id, report_id, chat_id, content_hash, message_ids, sent_at
+            FROM all_deliveries
+            WHERE report_id = ? AND chat_id = ? AND content_hash = ?
+        ''', (report_id, str(chat_id), content_hash))
+
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        return {
+            'id': row['id'],
+            'report_id': row['report_id'],
+            'chat_id': row['chat_id'],
+            'content_hash': row['content_hash'],
+            'message_ids': [int(m) for m in row['message_ids'].split(',') if m],
+            'sent_at': row['sent_at']
+        }
+
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+def record_delivery(report_id, chat_id, content_hash, message_ids):
+    """
+    Записать отправку отчёта в журнал доставки: message_ids доставленных частей
+    (при обрыве длинного отчёта — только первых; по ним повтор досылает остальные)
+    Повторная запись с тем же ключом (report_id, chat_id, content_hash) обновляет message_ids
+    Raises: Exception при ошибке сохранения
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        # Журнал ведется в той же базе, где лежит отчет (рабочая или архив года)
+        row = cursor.execute('SELECT shard FROM all_reports WHERE id = ?', (report_id,)).fetchone()
+        shard = row['shard'] if row else 'main'
+
+        cursor.execute(f'''
+            INSERT INTO {shard}.telegram_deliveries (report_id, chat_id, content_hash, message_ids, sent_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(report_id, chat_id, content_hash)
+            DO UPDATE SET message_ids = excluded.message_ids, sent_at = excluded.sent_at
+        ''', (
+            report_id,
+            str(chat_id),
+            content_hash,
+            ",".join(str(m) for m in message_ids),
+            datetime.now().strftime("%d.%m.%Y %H:%M:%S")
+        ))
+
+        conn.commit()
+
+        if config.DEBUG_MODE:
+            print(f"Отправка отчета {report_id} в чат {chat_id} записана в журнал")
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+
+def create_draft(report_data, form_file, question_count):
+    """
+    Создать черновик отчёта (предыдущий черновик той же формы за тот же период заменяется)
+    Returns: draft_id
+    Raises: Exception при ошибке сохранения
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            DELETE FROM drafts WHERE form_name = ? AND month = ? AND year = ?
+        ''', (report_data['form_name'], report_data['month'], str(report_data['year'])))
+
+        cursor.execute('''
+            INSERT INTO drafts (form_name, month, year, report_date, form_file, question_count, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            report_data['form_name'],
+            report_data['month'],
+            str(report_data['year']),
+            report_data['report_date'],
+            form_file,
+            question_count,
+            datetime.now().strftime("%d.%m.%Y %H:%M:%S")
+        ))
+
+        draft_id = cursor.lastrowid
+        conn.commit()
+        return draft_id
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+def save_draft_answers(draft_id, changes, conn=None, question_count=None):
+    """
+    Сохранить изменённые ответы черновика одной транзакцией
+
+    Args:
+        changes: словарь {question_index: (question_hash, answer_yes_no, comment)}
+        conn: открытое соединение (фоновый писатель держит своё, чтобы не открывать БД на каждую запись)
+        question_count: число вопросов новой версии формы — ответы черновика
+                        заменяются целиком (перенос черновика на изменённую форму)
+
+    Raises: Exception при ошибке сохранения
+    """
+    own_conn = conn is None
+    try:
+        if own_conn:
+            conn = get_connection()
+        cursor = conn.cursor()
+
+        if question_count is not None:
+            cursor.execute('DELETE FROM draft_answers WHERE draft_id = ?', (draft_id,))
+            cursor.execute('UPDATE drafts SET question_count = ? WHERE id = ?', (question_count, draft_id))
+
+        cursor.executemany('''
+            INSERT INTO draft_answers (draft_id, question_index, answer_yes_no, comment, question_hash)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(draft_id, question_index)
+            DO UPDATE SET answer_yes_no = excluded.answer_yes_no, comment = excluded.comment,
+                          question_hash = excluded.question_hash
+        ''', [
+            (draft_id, index, answer_yes_no or '', comment or '', q_hash)
+            for index, (q_hash, answer_yes_no, comment) in changes.items()
+        ])
+
+        cursor.execute(
+            'UPDATE drafts SET updated_at = ? WHERE id = ?',
+            (datetime.now().strftime("%d.%m.%Y %H:%M:%S"), draft_id)
+        )
+
+        conn.commit()
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if own_conn and conn:
+            conn.close()
+
+
+def get_latest_draft():
+    """
+    Получить последний изменённый черновик с ответами
+    Returns: словарь с данными черновика или None если черновиков нет
+    Raises: Exception при ошибке чтения
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT id, form_name, month, year, report_date, form_file, question_count, updated_at
+            FROM drafts
+            ORDER BY id DESC
+            LIMIT 1
+        ''')
+
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        cursor.execute('''
+            SELECT question_index, question_hash, answer_yes_no, comment
+            FROM draft_answers
+            WHERE draft_id = ?
+            ORDER BY question_index
+        ''', (row['id'],))
+
+        return {
+            'id': row['id'],
+            'form_name': row['form_name'],
+            'month': row['month'],
+            'year': row['year'],
+            'report_date': row['report_date'],
+            'form_file': row['form_file'],
+            'question_count': row['question_count'],
+            'updated_at': row['updated_at'],
+            'answers': {
+                a['question_index']: (a['question_hash'], a['answer_yes_no'], a['comment'] or '')
+                for a in cursor.fetchall()
+            }
+        }
+
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+def delete_draft(draft_id):
+    """
+    Удалить черновик (ответы удалятся автоматически благодаря ON DELETE CASCADE)
+    Raises: Exception при ошибке удаления
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        conn.execute('DELETE FROM drafts WHERE id = ?', (draft_id,))
+        conn.commit()
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+
+def _update_question_stats(cursor, form_name, year, month, answers, sign):
+    """
+    Добавить (sign=+1) или вычесть (sign=-1) ответы отчета в question_stats
+    Выполняется в транзакции сохранения/удаления отчета
+    """
+    rows = []
+    for answer in answers:
+        answer_yes_no = answer['answer_yes_no']
+        # Сжатый комментарий (bytes) не распаковывается: сжимаются только длинные тексты
+        comment = answer['comment'] or ''
+        rows.append((
+            form_name,
+            question_hash(answer['question_text']),
+            year,
+            month,
+            answer['question_text'],
+            sign,
+            sign if answer_yes_no == 'Да' else 0,
+            sign if answer_yes_no == 'Нет' else 0,
+            sign if comment.strip() else 0
+        ))
+
+    cursor.executemany('''
+        INSERT INTO question_stats (form_name, question_hash, year, month, question_text,
+                                    answer_count, yes_count, no_count, comment_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(form_name, question_hash, year, month) DO UPDATE SET
+            answer_count = answer_count + excluded.answer_count,
+            yes_count = yes_count + excluded.yes_count,
+            no_count = no_count + excluded.no_count,
+            comment_count = comment_count + excluded.comment_count
+    ''', rows)
+
+    if sign < 0:
+        cursor.execute('DELETE FROM question_stats WHERE answer_count <= 0')
+
+
+def _rebuild_question_stats(conn):
+    """
+    Пересчитать question_stats целиком: по запросу на рабочую базу и каждый
+    годовой архив (each_shard), суммы складываются в одних и тех же строках
+    """
+    conn.create_function("question_hash", 1, question_hash, deterministic=True)
+    conn.execute('DELETE FROM question_stats')
+    for schema, _ in each_shard(conn):
+        conn.execute(f'''
+            INSERT INTO question_stats (form_name, question_hash, year, month, question_text,
+                                        answer_count, yes_count, no_count, comment_count)
+            SELECT r.form_name, question_hash(a.question_text), r.year, r.month, MIN(a.question_text),
+                   COUNT(*),
+                   SUM(a.answer_yes_no = 'Да'),
+                   SUM(a.answer_yes_no = 'Нет'),
+                   SUM(TRIM(COALESCE(a.comment, ''), ' ' || char(9) || char(10) || char(13)) <> '')
+            FROM {schema}.answers a
+            JOIN {schema}.reports r ON r.id = a.report_id
+            WHERE true
+            GROUP BY r.form_name, question_hash(a.question_text), r.year, r.month
+            ON CONFLICT(form_name, question_hash, year, month) DO UPDATE SET
+                answer_count = answer_count + excluded.answer_count,
+                yes_count = yes_count + excluded.yes_count,
+                no_count = no_count + excluded.no_count,
+                comment_count = comment_count + excluded.comment_count
+        ''')
+
+
+def rebuild_question_stats():
+    """
+    Пересчитать агрегаты по вопросам с нуля (после ручной правки БД или сбоя)
+    Returns: число строк в question_stats
+    Raises: Exception при ошибке
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        _rebuild_question_stats(conn)
+        conn.commit()
+
+        count = conn.execute('SELECT COUNT(*) FROM question_stats').fetchone()[0]
+        if config.DEBUG_MODE:
+            print(f"Агрегаты по вопросам пересчитаны: {count} строк")
+        return count
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+def compress_answer_texts(batch_size=None, progress=None, task=None, vacuum=False):
+    """
+    Сжать длинные тексты уже сохраненных ответов (рабочая база и годовые архивы)
+    Ответы перебираются по id порциями по TEXT_COMPRESS_BATCH_SIZE, каждая
+    порция — отдельная короткая транзакция; уже сжатые значения пропускаются
+    Args:
+        progress: вызывается как progress(файл базы, просмотрено ответов)
+        task: BackgroundTask для отмены (сжатые порции сохраняются)
+        vacuum: после сжатия выполнить VACUUM, чтобы вернуть место на диске
+    Returns: число сжатых значений
+    Raises: Exception при ошибке
+    """
+    batch_size = batch_size or config.TEXT_COMPRESS_BATCH_SIZE
+    columns = ', '.join(COMPRESSED_FIELDS)
+    assignments = ', '.join(f"{field} = ?" for field in COMPRESSED_FIELDS)
+    paths = [DB_FILE] + [archive_path(year) for year in list_archive_years()]
+
+    compressed = 0
+    for path in paths:
+        conn = None
+        try:
+            conn = connect_file(path)
+            last_id = 0
+            seen = 0
+            while not (task and task.cancelled):
+                rows = conn.execute(
+                    f'SELECT id, {columns} FROM answers WHERE id > ? ORDER BY id LIMIT ?',
+                    (last_id, batch_size)
+                ).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1]['id']
+                seen += len(rows)
+
+                updates = []
+                for row in rows:
+                    values = [pack_text(row[field]) for field in COMPRESSED_FIELDS]
+                    changed = sum(value is not row[field] for value, field in zip(values, COMPRESSED_FIELDS))
+                    if changed:
+                        updates.append((*values, row['id']))
+                        compressed += changed
+
+                if updates:
+                    conn.executemany(f'UPDATE answers SET {assignments} WHERE id = ?', updates)
+                    conn.commit()
+                if progress:
+                    progress(path, seen)
+
+            if vacuum and not (task and task.cancelled):
+                conn.execute('VACUUM')
+
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+        finally:
+            if conn:
+                conn.close()
+
+    # Тексты отчетов не меняются, но кэш сбрасывается, чтобы не держать копии из старых строк
+    report_cache.clear()
+    if config.DEBUG_MODE:
+        print(f"Сжато текстов ответов: {compressed}")
+    return compressed
+
+
+def get_question_stats(form_name=None, year=None, months=None):
+    """
+    Получить агрегаты ответов по вопросам (без чтения answers)
+    months - необязательный список месяцев (для квартальных сводок)
+    Returns: список словарей question_stats
+    Raises: Exception при ошибке чтения
+    """
+    conn = None
+    try:
+        conditions = []
+        params = []
+        if form_name is not None:
+            conditions.append('form_name = ?')
+            params.append(form_name)
+        if year is not None:
+            conditions.append('year = ?')
+            params.append(year)
+        if months:
+            conditions.append(f"month IN ({', '.join('?' for _ in months)})")
+            params.extend(months)
+        where = ("WHERE " + " AND ".join(conditions)) if conditions else ""
+
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT form_name, question_hash, year, month, question_text,
+                   answer_count, yes_count, no_count, comment_count
+            FROM question_stats
+            {where}
+            ORDER BY form_name, year, question_hash
+        ''', params)
+
+        return [dict(row) for row in cursor.fetchall()]
+
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+
+def count_period_reports(form_name, year, months):
+    """
+    Число отчетов формы за месяцы периода (по индексу idx_reports_form_period)
+    Returns: словарь {месяц: число отчетов}
+    Raises: Exception при ошибке чтения
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT month, COUNT(*) AS cnt
+            FROM all_reports
+            WHERE form_name = ? AND year = ? AND month IN ({', '.join('?' for _ in months)})
+            GROUP BY month
+        ''', [form_name, year, *months])
+
+        return {row['month']: row['cnt'] for row in cursor.fetchall()}
+
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+def iter_period_comments(form_name, year, months):
+    """
+    Построчно выдавать непустые комментарии ответов формы за месяцы периода
+    Yields: словари question_text, answer_yes_no, comment, month
+    Raises: Exception при ошибке чтения
+    """
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.execute(f'''
+            SELECT a.question_text, a.answer_yes_no, a.comment, r.month
+            FROM all_reports r
+            JOIN all_answers a ON a.report_id = r.id
+            WHERE r.form_name = ? AND r.year = ? AND r.month IN ({', '.join('?' for _ in months)})
+              AND a.comment IS NOT NULL AND a.comment <> ''
+        ''', [form_name, year, *months])
+
+        for row in cursor:
+            yield {
+                'question_text': row['question_text'],
+                'answer_yes_no': row['answer_yes_no'],
+                'comment': unpack_text(row['comment']),
+                'month': row['month']
+            }
+
+    except GeneratorExit:
+        raise
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+
+def _month_order_sql(column):
+    """SQL-выражение: номер месяца по названию (1-12, неизвестный — 0)"""
+    cases = " ".join(f"WHEN '{name}' THEN {i}" for i, name in enumerate(config.MONTHS, start=1))
+    return f"(CASE {column} {cases} ELSE 0 END)"
+
+
+def _month_number(month):
+    """Номер месяца по названию (1-12, неизвестный — 0), как в _month_order_sql"""
+    month = (month or '').capitalize()
+    return config.MONTHS.index(month) + 1 if month in config.MONTHS else 0
+
+
+def find_previous_report(form_name, year=None, month=None):
+    """
+    Найти последний отчет формы за период раньше year/month
+    (без year/month — самый свежий отчет формы)
+    Каждая база (рабочая и годовые архивы) опрашивается отдельно: индекс
+    idx_reports_form_period выдает отчеты формы по убыванию года, по месяцу
+    досортировываются только отчеты одного года, и LIMIT 1 останавливает
+    чтение на первом подходящем годе. Через all_reports (UNION ALL) индекс
+    порядка не дает, и сортировались бы все отчеты формы
+    Returns: словарь с данными отчета (без ответов) или None
+    Raises: Exception при ошибке чтения
+    """
+    conn = None
+    try:
+        month_order = _month_order_sql('month')
+        params = [form_name]
+        bound = ""
+        if year is not None and month is not None:
+            bound = f"AND (year < ? OR (year = ? AND {month_order} < ?))"
+            params += [year, year, _month_number(month)]
+
+        conn = get_connection()
+        best = None
+        for schema, _ in each_shard(conn, int(year) if year is not None else None):
+            row = conn.execute(f'''
+                SELECT id, form_name, month, year, report_date, created_at, file_path
+                FROM {schema}.reports
+                WHERE form_name = ? {bound}
+                ORDER BY year DESC, {month_order} DESC, id DESC
+                LIMIT 1
+            ''', params).fetchone()
+            if row and (best is None or (row['year'], _month_number(row['month']), row['id'])
+                        > (best['year'], _month_number(best['month']), best['id'])):
+                best = row
+
+        if not best:
+            return None
+
+        report = _report_from_row(best)
+        del report['answers']
+        return report
+
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+# Замеры времени всех функций модуля (кроме построчных помощников)
+instrument_module(globals(), "db.", exclude=(
+    'normalize_question', 'question_hash', 'get_report_cache_stats',
+    '_answer_columns', '_answer_from_row', '_report_from_row',
+    '_report_filter_sql', '_month_order_sql', '_month_number'
+))
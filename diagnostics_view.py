@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+diagnostics_view.py — скрытое окно диагностики (Ctrl+Shift+D)
+
+Показывает реестр замеров metrics.registry, статистику кэша отчётов
+и (при включённой диагностике памяти) последний снимок memory_diag,
+позволяет сохранить замеры в JSON/CSV и сбросить их.
+"""
+
+import tkinter as tk
+from tkinter import messagebox, filedialog
+from datetime import datetime
+import config
+from metrics import registry, SNAPSHOT_FIELDS
+from memory_diag import tracker
+from database import get_report_cache_stats
+from analytics_view import make_tree
+
+
+class DiagnosticsWindow:
+    """Окно с таблицей замеров времени операций"""
+
+    COLUMNS = ["Операция", "Вызовов", "Ошибок", "Всего, мс", "Среднее", "p50", "p95", "p99", "Макс."]
+    WIDTHS = [300, 70, 60, 90, 80, 80, 80, 80, 80]
+
+    def __init__(self, app):
+        self.app = app
+        self.window = tk.Toplevel(app.root)
+        self.window.title("Диагностика")
+        self.window.geometry("1000x600")
+
+        self.cache_label = tk.Label(self.window, font=("Arial", app.FONT_SMALL), anchor="w")
+        self.cache_label.pack(fill=tk.X, padx=app.PADX, pady=app.PADY)
+
+        self.tree = make_tree(self.window, self.COLUMNS, self.WIDTHS)
+
+        btn_frame = tk.Frame(self.window)
+        btn_frame.pack(pady=app.PADY * 2)
+        for text, command in (
+            ("Обновить", self.refresh),
+            ("Сохранить JSON", lambda: self.save("json")),
+            ("Сохранить CSV", lambda: self.save("csv")),
+            ("Сбросить", self.reset),
+        ):
+            tk.Button(btn_frame, text=text, font=("Arial", app.FONT_SMALL), width=16,
+                      command=command).pack(side=tk.LEFT, padx=app.PADX)
+
+        self.refresh()
+
+    def refresh(self):
+        """Перечитать реестр замеров"""
+        self.tree.delete(*self.tree.get_children())
+        for row in registry.snapshot():
+            self.tree.insert("", tk.END, values=[row[field] for field in SNAPSHOT_FIELDS])
+
+        cache = get_report_cache_stats()
+        text = (f"Кэш отчётов: {cache['entries']}/{cache['max_entries']} записей, "
+                f"{cache['bytes'] // 1024} КБ, попаданий {cache['hit_rate']:.0%}, "
+                f"вытеснений {cache['evictions']}")
+        if tracker.active and tracker.history:
+            last = tracker.history[-1]
+            text += f"    Память: {last['current_mb']} МБ после «{last['label']}», пик {tracker.peak_mb()} МБ"
+        self.cache_label.config(text=text)
+
+    def save(self, fmt):
+        """Сохранить замеры в файл"""
+        path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=f".{fmt}",
+            initialfile=f"metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}",
+            filetypes=[(fmt.upper(), f"*.{fmt}")]
+        )
+        if not path:
+            return
+        try:
+            if fmt == "json":
+                registry.dump_json(path)
+            else:
+                registry.dump_csv(path)
+            messagebox.showinfo(config.DIALOG_TITLES["success"], f"Замеры сохранены:\n{path}", parent=self.window)
+        except OSError as e:
+            messagebox.showerror(config.DIALOG_TITLES["error"], str(e), parent=self.window)
+
+    def reset(self):
+        """Очистить реестр замеров"""
+        registry.reset()
+        self.refresh()
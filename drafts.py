@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+drafts.py — автосохранение незавершённого отчёта в черновик
+
+Изменённые ответы копятся в памяти и записываются в БД фоновым потоком
+пачкой: после паузы во вводе (DRAFT_AUTOSAVE_DEBOUNCE_SEC), но не реже
+чем раз в DRAFT_AUTOSAVE_INTERVAL_SEC.
+"""
+
+import threading
+import time
+import config
+from database import get_connection, save_draft_answers
+
+
+class DraftAutosaver:
+    """Фоновый писатель изменений черновика"""
+
+    def __init__(self, draft_id):
+        self.draft_id = draft_id
+        self._pending = {}
+        self._first_change = None
+        self._last_change = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+
+        self._thread = threading.Thread(target=self._run, name="draft-autosave", daemon=True)
+        self._thread.start()
+
+    def mark_changed(self, question_index, question_hash, answer_yes_no, comment):
+        """Запомнить изменение ответа (вызывается из GUI, не блокирует)"""
+        now = time.monotonic()
+        with self._lock:
+            self._pending[question_index] = (question_hash, answer_yes_no, comment)
+            if self._first_change is None:
+                self._first_change = now
+            self._last_change = now
+
+    def _due(self):
+        """Пора ли записывать накопленные изменения"""
+        with self._lock:
+            if not self._pending:
+                return False
+            now = time.monotonic()
+            quiet = now - self._last_change >= config.DRAFT_AUTOSAVE_DEBOUNCE_SEC
+            overdue = now - self._first_change >= config.DRAFT_AUTOSAVE_INTERVAL_SEC
+            return quiet or overdue
+
+    def _take_pending(self):
+        with self._lock:
+            changes = self._pending
+            self._pending = {}
+            self._first_change = None
+            self._last_change = None
+            return changes
+
+    def _write(self, conn, changes):
+        """Записать пачку изменений; при ошибке вернуть их в очередь"""
+        try:
+            save_draft_answers(self.draft_id, changes, conn=conn)
+            if config.DEBUG_MODE:
+                print(f"Черновик {self.draft_id}: сохранено изменений {len(changes)}")
+        except Exception as e:
+            if config.DEBUG_MODE:
+                print(f"Ошибка автосохранения черновика: {e}")
+            with self._lock:
+                for index, value in changes.items():
+                    self._pending.setdefault(index, value)
+                if self._first_change is None:
+                    self._first_change = time.monotonic()
+                    self._last_change = self._first_change
+
+    def _run(self):
+        conn = None
+        try:
+            conn = get_connection()
+            while not self._stopping:
+                self._wake.wait(timeout=config.DRAFT_AUTOSAVE_DEBOUNCE_SEC / 2)
+                self._wake.clear()
+                if self._due():
+                    self._write(conn, self._take_pending())
+
+            # Остаток при остановке
+            changes = self._take_pending()
+            if changes:
+                self._write(conn, changes)
+        except Exception as e:
+            if config.DEBUG_MODE:
+                print(f"Автосохранение черновика остановлено: {e}")
+        finally:
+            if conn:
+                conn.close()
+
+    def close(self, timeout=5.0):
+        """Остановить писателя, дописав накопленные изменения"""
+        self._stopping = True
+        self._wake.set()
+        self._thread.join(timeout)
@@ -6,6 +6,11 @@ export_excel.py — создаёт Excel отчёты на основе шабл
 import os
 from datetime import datetime
 import openpyxl
+from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.utils import get_column_letter
+import config
+from metrics import timed
+from report_diff import STATUS_TITLES, FLIPPED, COMMENT_CHANGED, ADDED, REMOVED
 
 
 def _get_templates_dir():
@@ -14,17 +19,67 @@ def _get_templates_dir():
     return templates
 
 
-def _reports_dir():
+def _reports_dir(create=True):
     reports = os.path.join(os.getcwd(), "отчеты")
-    os.makedirs(reports, exist_ok=True)
+    if create:
+        os.makedirs(reports, exist_ok=True)
     return reports
 
 
+def report_output_dir(year=None, form_name=None, create=True):
+    """
+    Папка для файла отчета: отчеты/<год>/<форма>/ при REPORTS_SHARDED, иначе отчеты/
+    create=False — только путь, без создания папок (report_files.migrate_layout)
+    """
+    folder = _reports_dir(create)
+    if config.REPORTS_SHARDED and year and form_name:
+        folder = os.path.join(folder, str(year), sanitize_filename(form_name))
+        if create:
+            os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def summary_output_dir(year=None, form_name=None):
+    """Папка для сводок и сравнений: сводки/<год>/<форма>/ при REPORTS_SHARDED, иначе сводки/"""
+    folder = os.path.join(os.getcwd(), config.SUMMARIES_FOLDER.rstrip('/'))
+    if config.REPORTS_SHARDED and year and form_name:
+        folder = os.path.join(folder, str(year), sanitize_filename(form_name))
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
 def sanitize_filename(name):
     bad = r'\/:*?"<>|%#'
     return "".join(("_" if c in bad else c) for c in name).strip() or "report"
 
 
+def _save_workbook(wb, folder, stem):
+    """
+    Сохранить книгу в folder под именем <stem>_<время>.xlsx
+    Имя занимается через O_EXCL (при совпадении добавляется счетчик), поэтому
+    параллельные задачи (cli.py, server.py) не пишут в один и тот же файл
+    Returns: путь к файлу
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    counter = 0
+    while True:
+        suffix = f"_{counter}" if counter else ""
+        out_path = os.path.join(folder, sanitize_filename(f"{stem}_{timestamp}{suffix}.xlsx"))
+        try:
+            os.close(os.open(out_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            counter += 1
+
+    try:
+        wb.save(out_path)
+    except Exception:
+        os.remove(out_path)
+        raise
+    return out_path
+
+
+@timed("excel.hide_empty_comment_rows")
 def hide_empty_comment_rows(ws):
     """Скрывает все пустые строки (кроме разделителей)"""
     # Находим строку с датой
@@ -49,8 +104,9 @@ def hide_empty_comment_rows(ws):
             ws.row_dimensions[row_idx].hidden = True
 
 
-def create_excel_report(report_name, form_name, month, year, answers):
-    """Создаёт отчёт из шаблона"""
+@timed("excel.create_report")
+def create_excel_report(report_name, form_name, month, year, answers, out_dir=None):
+    """Создаёт отчёт из шаблона (out_dir — папка вместо отчеты/<год>/<форма>/)"""
 
     # Загружаем шаблон
     template_path = os.path.join(_get_templates_dir(), "отчет.xlsx")
@@ -95,22 +151,107 @@ def create_excel_report(report_name, form_name, month, year, answers):
             break
 
     # Сохраняем
-    reports_dir = _reports_dir()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    safe = sanitize_filename(f"{report_name}_{timestamp}.xlsx")
-    out_path = os.path.join(reports_dir, safe)
+    reports_dir = out_dir or report_output_dir(year, form_name)
+    return _save_workbook(wb, reports_dir, report_name)
 
-    wb.save(out_path)
 
-    # Показываем путь
-    try:
-        import tkinter as tk
-        from tkinter import messagebox
-        root = tk.Tk()
-        root.withdraw()
-        messagebox.showinfo("Отчёт сохранён", f"Файл сохранён в:\n\n{out_path}")
-        root.destroy()
-    except:
-        pass
-
-    return out_path
\ No newline at end of file
+def _write_table(ws, start_row, headers, rows, widths):
+    """Заголовки и строки таблицы на листе сводки"""
+    header_font = Font(**config.EXCEL_QUESTION_FONT)
+    normal_font = Font(**config.EXCEL_NORMAL_FONT)
+    wrap = Alignment(wrap_text=True, vertical="top")
+
+    for col, (title, width) in enumerate(zip(headers, widths), start=1):
+        cell = ws.cell(start_row, col, title)
+        cell.font = header_font
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+    for row_offset, values in enumerate(rows, start=1):
+        for col, value in enumerate(values, start=1):
+            cell = ws.cell(start_row + row_offset, col, value)
+            cell.font = normal_font
+            cell.alignment = wrap
+
+
+def create_rollup_report(rollup):
+    """Создаёт Excel со сводкой месячных отчётов за квартал/год (rollup.build_rollup)"""
+    wb = openpyxl.Workbook()
+
+    ws = wb.active
+    ws.title = "Сводка"
+    ws['A1'] = f"Сводка: {rollup['form_name']} — {rollup['title']}"
+    ws['A1'].font = Font(**config.EXCEL_TITLE_FONT)
+    counts = ", ".join(f"{m}: {rollup['report_counts'].get(m, 0)}" for m in rollup['months'])
+    ws['A2'] = f"Отчётов по месяцам — {counts}"
+    ws['A2'].font = Font(**config.EXCEL_COMMENT_FONT)
+
+    _write_table(
+        ws, 4,
+        ["Вопрос", "Ответов", "Да", "Нет", "Доля «Нет»", "Комментариев", "Месяцы с «Нет»"],
+        [
+            [q['question_text'], q['answers'], q['yes'], q['no'],
+             f"{q['no_rate']:.0%}", q['comments'], ", ".join(q['no_months'])]
+            for q in rollup['questions']
+        ],
+        [config.EXCEL_COLUMN_A_WIDTH, 10, 8, 8, 12, 14, 30]
+    )
+
+    ws_comments = wb.create_sheet("Повторяющиеся замечания")
+    _write_table(
+        ws_comments, 1,
+        ["Вопрос", "Замечание", "Повторов", "Из них «Нет»", "Месяцы"],
+        [
+            [c['question_text'], c['comment'], c['count'], c['no_count'], ", ".join(c['months'])]
+            for c in rollup['recurring_comments']
+        ],
+        [config.EXCEL_COLUMN_A_WIDTH, 60, 10, 14, 30]
+    )
+
+    return _save_workbook(wb, summary_output_dir(rollup['year'], rollup['form_name']),
+                          f"Сводка_{rollup['form_name']}_{rollup['title']}")
+
+
+
+# Цвета строк сравнения отчётов (по статусу report_diff)
+DIFF_FILLS = {
+    FLIPPED: "F4CCCC",
+    COMMENT_CHANGED: "FFF2CC",
+    ADDED: "CFE2F3",
+    REMOVED: "D9D9D9",
+}
+
+
+def create_diff_report(diff):
+    """Создаёт Excel со сравнением двух отчётов (report_diff.diff_reports)"""
+    old, new = diff['old'], diff['new']
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Сравнение"
+    ws['A1'] = f"Сравнение: {new['form_name']} — {old['month']} {old['year']} → {new['month']} {new['year']}"
+    ws['A1'].font = Font(**config.EXCEL_TITLE_FONT)
+    ws['A2'] = ", ".join(f"{STATUS_TITLES[k]}: {v}" for k, v in diff['counts'].items() if v)
+    ws['A2'].font = Font(**config.EXCEL_COMMENT_FONT)
+
+    _write_table(
+        ws, 4,
+        ["Вопрос", "Изменение", f"Было ({old['month']})", f"Стало ({new['month']})", "Комментарий было", "Комментарий стало"],
+        [
+            [r['question_text'], STATUS_TITLES[r['status']], r['old_answer'], r['new_answer'],
+             r['old_comment'], r['new_comment']]
+            for r in diff['rows']
+        ],
+        [config.EXCEL_COLUMN_A_WIDTH, 20, 14, 14, 40, 40]
+    )
+
+    for offset, row in enumerate(diff['rows'], start=5):
+        color = DIFF_FILLS.get(row['status'])
+        if color:
+            fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+            for col in range(1, 7):
+                ws.cell(offset, col).fill = fill
+
+    return _save_workbook(
+        wb, summary_output_dir(new['year'], new['form_name']),
+        f"Сравнение_{new['form_name']}_{old['month']}_{old['year']}_{new['month']}_{new['year']}"
+    )
@@ -11,7 +11,12 @@ import subprocess
 import os
 import sys
 import config
-from telegram_service import TelegramService, validate_settings
+from tasks import TaskRunner
+from question_view import QuestionPageView, VirtualQuestionList
+from report_view import ReportRenderer
+from analytics_view import AnalyticsTab, RollupTab
+from report_diff import diff_reports, diff_with_previous, period_key, STATUS_TITLES as DIFF_STATUS_TITLES
+from memory_diag import checkpoint_after
 from telegram_config import save_telegram_settings, load_telegram_settings
 
 
@@ -51,18 +56,70 @@ class ReportApp:
             self.root.geometry("1400x900")
 
         self.logic = ReportLogic()
+        self.tasks = TaskRunner(self.root)
         self.current_block_widgets = {}
+        self.question_page = None
 
         self.main_frame = tk.Frame(self.root)
         self.main_frame.pack(fill=tk.BOTH, expand=True)
 
         self.show_main_menu()
+        self.root.after(200, self.offer_draft_resume)
+
+        # Скрытое окно диагностики
+        self.root.bind_all("<Control-Shift-D>", self.show_diagnostics)
+        self.root.bind_all("<Control-Shift-d>", self.show_diagnostics)
+
+    def show_diagnostics(self, event=None):
+        """Открыть окно замеров времени операций"""
+        from diagnostics_view import DiagnosticsWindow
+        DiagnosticsWindow(self)
+
+    def offer_draft_resume(self):
+        """Предложить продолжить незавершённый отчёт из черновика"""
+        draft = self.logic.get_latest_draft()
+        if not draft:
+            return
+
+        choice = messagebox.askyesnocancel(
+            config.DIALOG_TITLES["draft"],
+            config.INFO_MESSAGES["draft_found"].format(
+                form_name=draft['form_name'],
+                month=draft['month'],
+                year=draft['year'],
+                updated_at=draft['updated_at']
+            )
+        )
+
+        if choice is None:
+            return
+        if not choice:
+            self.logic.discard_draft(draft['id'])
+            return
+
+        def on_resumed(outcome):
+            success, message = outcome
+            if not success:
+                messagebox.showerror(config.DIALOG_TITLES["error"], message)
+                return
+            if message:
+                messagebox.showwarning(config.DIALOG_TITLES["warning"], message)
+            self.show_questions_screen()
+
+        self.tasks.run(
+            self.logic.resume_draft,
+            draft,
+            title="Восстановление черновика...",
+            on_done=on_resumed,
+            on_error=self.show_task_error
+        )
 
     def clear_frame(self):
         """Очистка главного контейнера"""
         for widget in self.main_frame.winfo_children():
             widget.destroy()
 
+    @checkpoint_after("главное меню")
     def show_main_menu(self):
         """Показать главное меню с README слева и кнопками справа"""
         self.clear_frame()
@@ -170,6 +227,7 @@ class ReportApp:
             command=self.root.quit
         ).pack(pady=self.PADY * 2)
 
+    @checkpoint_after("создание отчёта")
     def show_report_creation(self):
         """Экран выбора формы и параметров отчёта"""
         self.clear_frame()
@@ -217,14 +275,10 @@ class ReportApp:
         ).grid(row=1, column=0, sticky="w", pady=self.PADY * 2)
 
         self.month_var = tk.StringVar()
-        months = [
-            "Январь", "Февраль", "Март", "Апрель", "Май", "Июнь",
-            "Июль", "Август", "Сентябрь", "Октябрь", "Ноябрь", "Декабрь"
-        ]
         ttk.Combobox(
             form_frame,
             textvariable=self.month_var,
-            values=months,
+            values=config.MONTHS,
             font=("Arial", self.FONT_MEDIUM),
             width=30,
             state="readonly"
@@ -260,17 +314,27 @@ class ReportApp:
             width=32
         ).grid(row=3, column=1, columnspan=2, pady=self.PADY * 2, padx=self.PADX, sticky="w")
 
+        # Предзаполнение по прошлому отчёту
+        self.prefill_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            form_frame,
+            text="Заполнить ответы по прошлому отчёту этой формы",
+            variable=self.prefill_var,
+            font=("Arial", self.FONT_MEDIUM)
+        ).grid(row=4, column=0, columnspan=3, sticky="w", pady=self.PADY * 2)
+
         # Кнопки управления
         btn_frame = tk.Frame(self.main_frame)
         btn_frame.pack(pady=30)
 
-        tk.Button(
+        self.btn_start_filling = tk.Button(
             btn_frame,
             text="Начать заполнение",
             font=("Arial", self.FONT_MEDIUM),
             width=20,
             command=self.start_filling
-        ).pack(side=tk.LEFT, padx=self.PADX)
+        )
+        self.btn_start_filling.pack(side=tk.LEFT, padx=self.PADX)
 
         tk.Button(
             btn_frame,
@@ -304,197 +368,90 @@ class ReportApp:
             )
             return
 
-        if not self.logic.load_questions_from_excel(excel_file):
-            messagebox.showerror(
-                config.DIALOG_TITLES["error"],
-                f"Не удалось загрузить вопросы из файла:\n{filename}"
-            )
-            return
+        prefill = self.prefill_var.get()
 
-        self.logic.init_report(form_name, month, year, report_date)
-        self.show_questions_screen()
+        def load(task):
+            if not self.logic.load_questions_from_excel(excel_file, progress=task.set_progress, task=task):
+                return False, None
+            if task.cancelled:
+                return False, None
+            self.logic.init_report(form_name, month, year, report_date)
+            return True, self.logic.prefill_from_previous() if prefill else None
 
-    def show_questions_screen(self):
-        """Экран заполнения вопросов блоками"""
-        self.clear_frame()
-
-        start, end = self.logic.get_current_block_questions()
-        total = len(self.logic.questions_list)
-
-        header = f"Отчёт: {self.logic.current_report_data['form_name']} {self.logic.current_report_data['month']} {self.logic.current_report_data['year']}"
-        tk.Label(
-            self.main_frame,
-            text=header,
-            font=("Arial", self.FONT_MEDIUM, "bold")
-        ).pack(pady=self.PADY)
-
-        tk.Label(
-            self.main_frame,
-            text=f"Вопросы {start + 1}-{end} из {total}",
-            font=("Arial", self.FONT_SMALL)
-        ).pack(pady=self.PADY // 2)
-
-        canvas_frame = tk.Frame(self.main_frame)
-        canvas_frame.pack(pady=self.PADY, fill=tk.BOTH, expand=True)
-
-        canvas = tk.Canvas(canvas_frame)
-        scrollbar = tk.Scrollbar(canvas_frame, orient="vertical", command=canvas.yview)
-        scrollable_frame = tk.Frame(canvas)
-
-        scrollable_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        self.current_block_widgets = {}
-        for i in range(start, end):
-            self.create_question_widget(scrollable_frame, i)
-
-        btn_frame = tk.Frame(self.main_frame)
-        btn_frame.pack(pady=self.PADY * 2)
-
-        btn_prev = tk.Button(
-            btn_frame,
-            text="← Назад",
-            font=("Arial", self.FONT_LARGE),
-            width=15,
-            command=self.on_prev_block
-        )
-        btn_prev.pack(side=tk.LEFT, padx=self.PADX)
-        if start == 0:
-            btn_prev.config(state=tk.DISABLED)
-
-        btn_next = tk.Button(
-            btn_frame,
-            text="Далее →" if end < total else "Завершить",
-            font=("Arial", self.FONT_LARGE),
-            width=15,
-            command=self.on_next_block
-        )
-        btn_next.pack(side=tk.LEFT, padx=self.PADX)
-
-    def create_question_widget(self, parent, question_index):
-        """Создать виджет для одного вопроса"""
-        question = self.logic.questions_list[question_index]
-        answer_data = self.logic.answers_list[question_index]
-
-        q_frame = tk.LabelFrame(
-            parent,
-            text=f"Вопрос {question_index + 1}",
-            font=("Arial", self.FONT_MEDIUM, "bold"),
-            padx=self.PADX,
-            pady=self.PADY
-        )
-        q_frame.pack(pady=self.PADY, padx=20, fill=tk.X)
-
-        top_frame = tk.Frame(q_frame)
-        top_frame.pack(fill=tk.X, pady=self.PADY // 2)
-
-        answer_frame = tk.Frame(top_frame)
-        answer_frame.pack(side=tk.LEFT, padx=(0, 15))
-
-        current_answer = answer_data['answer_yes_no']
-
-        btn_yes = tk.Button(
-            answer_frame,
-            text="ДА",
-            font=("Arial", self.FONT_LARGE, "bold"),
-            width=5,
-            bg="green" if current_answer == "Да" else "lightgray",
-            fg="white" if current_answer == "Да" else "darkgreen",
-            command=lambda idx=question_index: self.set_answer(idx, "Да")
-        )
-        btn_yes.pack(side=tk.LEFT, padx=3)
-
-        btn_no = tk.Button(
-            answer_frame,
-            text="НЕТ",
-            font=("Arial", self.FONT_LARGE, "bold"),
-            width=5,
-            bg="red" if current_answer == "Нет" else "lightgray",
-            fg="white" if current_answer == "Нет" else "darkred",
-            command=lambda idx=question_index: self.set_answer(idx, "Нет")
-        )
-        btn_no.pack(side=tk.LEFT, padx=3)
-
-        tk.Label(
-            top_frame,
-            text=question['question'],
-            font=("Arial", self.FONT_LARGE),
-            wraplength=800,
-            justify=tk.LEFT,
-            anchor='w'
-        ).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        def on_loaded(outcome):
+            loaded, prefill_result = outcome
+            if not loaded:
+                messagebox.showerror(
+                    config.DIALOG_TITLES["error"],
+                    f"Не удалось загрузить вопросы из файла:\n{filename}"
+                )
+                return
 
-        buttons_frame = tk.Frame(top_frame)
-        buttons_frame.pack(side=tk.RIGHT, padx=self.PADX)
+            self.logic.start_draft()
+            self.show_questions_screen()
 
-        tk.Button(
-            buttons_frame,
-            text="?",
-            font=("Arial", self.FONT_MEDIUM, "bold"),
-            width=3,
-            command=lambda: self.show_help(question)
-        ).pack(side=tk.LEFT, padx=2)
-
-        if question.get('documents'):
-            tk.Button(
-                buttons_frame,
-                text="📄",
-                font=("Arial", self.FONT_MEDIUM, "bold"),
-                width=3,
-                command=lambda: self.show_documents(question)
-            ).pack(side=tk.LEFT, padx=2)
-
-        comment_frame = tk.Frame(q_frame)
-        comment_frame.pack(fill=tk.X, pady=self.PADY // 2)
+            if prefill and prefill_result is None:
+                messagebox.showinfo(
+                    config.DIALOG_TITLES["info"],
+                    "Прошлый отчёт этой формы не найден — отчёт начат с чистого листа"
+                )
+            elif prefill_result:
+                source = prefill_result['report']
+                messagebox.showinfo(
+                    config.DIALOG_TITLES["info"],
+                    f"Ответы перенесены из отчёта за {source['month']} {source['year']}: {prefill_result['prefilled']}\n"
+                    f"Новых или изменённых вопросов: {prefill_result['new']}\n\n"
+                    f"Проверьте ответы и нажмите «Подтвердить перенесённые»."
+                )
 
-        tk.Label(
-            comment_frame,
-            text="Комментарий:",
-            font=("Arial", self.FONT_LARGE)
-        ).pack(side=tk.LEFT, padx=(0, self.PADX))
-
-        comment_text = tk.Text(
-            comment_frame,
-            height=self.COMMENT_HEIGHT,
-            font=("Arial", self.FONT_LARGE),
-            wrap=tk.WORD
+        self.tasks.run(
+            load,
+            title=f"Загрузка вопросов из {filename}...",
+            on_done=on_loaded,
+            on_error=self.show_task_error,
+            widgets=[self.btn_start_filling],
+            with_task=True
         )
-        comment_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        if answer_data['comment']:
-            comment_text.insert(1.0, answer_data['comment'])
-
-        def adjust_height(event=None):
-            lines = comment_text.get("1.0", tk.END).count('\n')
-            comment_text.config(height=max(self.COMMENT_HEIGHT, min(6, lines + 1)))
+    @checkpoint_after("вопросы")
+    def show_questions_screen(self):
+        """
+        Экран заполнения вопросов блоками (виджеты переиспользуются между блоками)
+        Большие формы показываются одним списком с прокруткой
+        """
+        if len(self.logic.questions_list) >= config.VIRTUAL_LIST_MIN_QUESTIONS:
+            page_class = VirtualQuestionList
+        else:
+            page_class = QuestionPageView
 
-        comment_text.bind('<KeyRelease>', adjust_height)
-        adjust_height()
+        if (self.question_page is None or not self.question_page.is_alive()
+                or not isinstance(self.question_page, page_class)):
+            self.clear_frame()
+            self.question_page = page_class(self, self.main_frame)
+            self.btn_prev = self.question_page.btn_prev
+            self.btn_next = self.question_page.btn_next
 
-        self.current_block_widgets[question_index] = {
-            'btn_yes': btn_yes,
-            'btn_no': btn_no,
-            'comment': comment_text
-        }
+        self.current_block_widgets = self.question_page.show_block()
 
     def set_answer(self, question_index, answer):
         """Установить ответ с инверсией цвета кнопок"""
         widgets = self.current_block_widgets[question_index]
-
-        if answer == "Да":
-            widgets['btn_yes'].config(bg="green", fg="white")
-            widgets['btn_no'].config(bg="lightgray", fg="darkred")
-        else:
-            widgets['btn_yes'].config(bg="lightgray", fg="darkgreen")
-            widgets['btn_no'].config(bg="red", fg="white")
+        widgets['slot'].show_answer(answer)
 
         comment = widgets['comment'].get(1.0, tk.END).strip()
         self.logic.save_answer(question_index, answer, comment)
 
+        if self.logic.prefill_flags or self.logic.prefill_source:
+            widgets['slot'].refresh_title()
+            self.question_page.update_confirm_button()
+
+    def confirm_prefilled_answers(self):
+        """Подтвердить все ответы, перенесённые из прошлого отчёта"""
+        self.logic.confirm_prefilled()
+        for widgets in self.current_block_widgets.values():
+            widgets['slot'].refresh_title()
+        self.question_page.update_confirm_button()
+
     def show_help(self, question):
         """Показать справку"""
         help_window = tk.Toplevel(self.root)
@@ -619,9 +576,7 @@ class ReportApp:
         """Сохранить ответы текущего блока"""
         for idx, widgets in self.current_block_widgets.items():
             comment = widgets['comment'].get(1.0, tk.END).strip()
-            current_answer = self.logic.answers_list[idx]['answer_yes_no']
-            if current_answer:
-                self.logic.save_answer(idx, current_answer, comment)
+            self.logic.save_comment(idx, comment)
 
     def on_prev_block(self):
         """Обработка кнопки Назад"""
@@ -651,26 +606,83 @@ class ReportApp:
         else:
             self.show_questions_screen()
 
+    def on_finish_list(self):
+        """Обработка кнопки Завершить в режиме списка"""
+        self.question_page.store_comments()
+
+        all_answered, question_number = self.logic.check_all_answered()
+        if not all_answered:
+            self.question_page.scroll_to(question_number - 1)
+            messagebox.showwarning(
+                config.DIALOG_TITLES["warning"],
+                f"{config.ERROR_MESSAGES['no_answer']} {question_number}"
+            )
+            return
+
+        if messagebox.askyesno(
+            config.DIALOG_TITLES["confirm_save"],
+            config.INFO_MESSAGES["all_questions_answered"]
+        ):
+            self.save_report()
+
     def save_report(self):
         """Сохранить отчёт"""
-        success, result = self.logic.save_report()
-        if success:
-            messagebox.showinfo(
-                config.DIALOG_TITLES["success"],
-                config.INFO_MESSAGES["report_saved"].format(
-                    filename=result,
-                    folder=config.REPORTS_FOLDER
+        unconfirmed = self.logic.unconfirmed_count()
+        if unconfirmed:
+            if not messagebox.askyesno(
+                config.DIALOG_TITLES["warning"],
+                f"{unconfirmed} ответов перенесены из прошлого отчёта и не подтверждены.\n\n"
+                f"Подтвердить их все и сохранить отчёт?"
+            ):
+                return
+            self.logic.confirm_prefilled()
+
+        def on_saved(outcome):
+            success, result = outcome
+            if success:
+                messagebox.showinfo(
+                    config.DIALOG_TITLES["success"],
+                    config.INFO_MESSAGES["report_saved"].format(
+                        filename=result,
+                        folder=os.path.relpath(os.path.dirname(self.logic.last_file_path))
+                    )
                 )
-            )
-            self.show_main_menu()
-        else:
-            messagebox.showerror(
-                config.DIALOG_TITLES["error"],
-                f"Ошибка при сохранении:\n{result}"
-            )
+                self.show_main_menu()
+            else:
+                messagebox.showerror(
+                    config.DIALOG_TITLES["error"],
+                    f"Ошибка при сохранении:\n{result}"
+                )
+
+        # Сохранение не отменяется: запись в БД и Excel должна завершиться
+        self.tasks.run(
+            self.logic.save_report,
+            title="Сохранение отчёта...",
+            on_done=on_saved,
+            on_error=self.show_task_error,
+            widgets=[self.btn_prev, self.btn_next],
+            cancellable=False
+        )
+
+    def show_task_error(self, error):
+        """Показать ошибку фоновой задачи"""
+        messagebox.showerror(
+            config.DIALOG_TITLES["error"],
+            f"{type(error).__name__}: {error}"
+        )
 
     def show_reports_archive(self):
-        """Архив отчётов"""
+        """Архив отчётов (список загружается в фоне)"""
+        self.tasks.run(
+            self.logic.get_all_reports_from_db,
+            title="Загрузка архива...",
+            on_done=self.build_reports_archive,
+            on_error=self.show_task_error
+        )
+
+    @checkpoint_after("архив")
+    def build_reports_archive(self, reports):
+        """Построить экран архива по загруженному списку отчётов"""
         self.clear_frame()
         tk.Label(
             self.main_frame,
@@ -678,54 +690,108 @@ class ReportApp:
             font=("Arial", self.FONT_LARGE, "bold")
         ).pack(pady=20)
 
-        reports = self.logic.get_all_reports_from_db()
+        notebook = ttk.Notebook(self.main_frame)
+        notebook.pack(fill=tk.BOTH, expand=True, padx=20)
+
+        reports_tab = tk.Frame(notebook)
+        notebook.add(reports_tab, text="Отчёты")
+
+        analytics_tab = tk.Frame(notebook)
+        notebook.add(analytics_tab, text="Аналитика")
+        forms = sorted({r['form_name'] for r in reports})
+        AnalyticsTab(self, analytics_tab, forms)
+
+        rollup_tab = tk.Frame(notebook)
+        notebook.add(rollup_tab, text="Сводка за период")
+        RollupTab(self, rollup_tab, forms)
+
+        self.archive_buttons = []
         if not reports:
             tk.Label(
-                self.main_frame,
+                reports_tab,
                 text=config.INFO_MESSAGES["no_reports"],
                 font=("Arial", self.FONT_SMALL)
             ).pack(pady=20)
         else:
             tree = self.create_reports_tree(
                 reports,
-                ["ID", "Форма", "Месяц", "Год", "Дата создания"],
-                [50, 250, 100, 80, 150]
+                ["ID", "Форма", "Месяц", "Год", "Дата создания", "Telegram"],
+                [50, 250, 100, 80, 150, 80],
+                parent=reports_tab
             )
 
-            btn_frame = tk.Frame(self.main_frame)
+            btn_frame = tk.Frame(reports_tab)
             btn_frame.pack(pady=20)
 
-            tk.Button(
+            btn = tk.Button(
                 btn_frame,
                 text="Просмотр",
                 font=("Arial", self.FONT_SMALL),
                 width=20,
                 command=lambda: self.open_report(tree)
-            ).pack(side=tk.LEFT, padx=self.PADX)
+            )
+            btn.pack(side=tk.LEFT, padx=self.PADX)
+            self.archive_buttons.append(btn)
 
-            tk.Button(
+            btn = tk.Button(
                 btn_frame,
                 text="📤 Отправить в Telegram",
                 font=("Arial", self.FONT_SMALL),
                 width=25,
                 command=lambda: self.send_report_to_telegram(tree)
-            ).pack(side=tk.LEFT, padx=self.PADX)
+            )
+            btn.pack(side=tk.LEFT, padx=self.PADX)
+            self.archive_buttons.append(btn)
 
-            tk.Button(
+            btn = tk.Button(
                 btn_frame,
                 text="⚙️ Настройки TG",
                 font=("Arial", self.FONT_SMALL),
                 width=18,
                 command=self.open_telegram_settings
-            ).pack(side=tk.LEFT, padx=self.PADX)
+            )
+            btn.pack(side=tk.LEFT, padx=self.PADX)
+            self.archive_buttons.append(btn)
+
+            btn = tk.Button(
+                btn_frame,
+                text="Сравнить",
+                font=("Arial", self.FONT_SMALL),
+                width=15,
+                command=lambda: self.compare_reports(tree)
+            )
+            btn.pack(side=tk.LEFT, padx=self.PADX)
+            self.archive_buttons.append(btn)
 
-            tk.Button(
+            btn = tk.Button(
                 btn_frame,
                 text="Удалить",
                 font=("Arial", self.FONT_SMALL),
                 width=20,
                 command=lambda: self.delete_report(tree)
-            ).pack(side=tk.LEFT, padx=self.PADX)
+            )
+            btn.pack(side=tk.LEFT, padx=self.PADX)
+            self.archive_buttons.append(btn)
+
+            btn = tk.Button(
+                btn_frame,
+                text="Архивировать годы",
+                font=("Arial", self.FONT_SMALL),
+                width=20,
+                command=self.archive_closed_years
+            )
+            btn.pack(side=tk.LEFT, padx=self.PADX)
+            self.archive_buttons.append(btn)
+
+            btn = tk.Button(
+                btn_frame,
+                text="Очистка по сроку",
+                font=("Arial", self.FONT_SMALL),
+                width=18,
+                command=self.purge_expired_reports
+            )
+            btn.pack(side=tk.LEFT, padx=self.PADX)
+            self.archive_buttons.append(btn)
 
         tk.Button(
             self.main_frame,
@@ -735,9 +801,88 @@ class ReportApp:
             command=self.show_main_menu
         ).pack(pady=self.PADY * 2)
 
-    def create_reports_tree(self, reports, columns, widths=None):
+    def archive_closed_years(self):
+        """Перенести отчеты закрытых лет в годовые файлы архива (в фоне, порциями)"""
+        from year_archive import closed_years, archive_closed_years
+
+        try:
+            years = closed_years()
+        except Exception as e:
+            self.show_task_error(e)
+            return
+        if not years:
+            messagebox.showinfo(config.DIALOG_TITLES["info"], "Нет закрытых лет для переноса в архив")
+            return
+        if not messagebox.askyesno(
+            config.DIALOG_TITLES["confirm_delete"],
+            f"Перенести отчёты за {', '.join(map(str, years))} в годовые файлы архива?\n\n"
+            f"Отчёты останутся доступны в архиве программы."
+        ):
+            return
+
+        def run(task):
+            return archive_closed_years(progress=lambda year, done, total: task.set_progress(done, total), task=task)
+
+        def on_done(result):
+            moved = sum(result.values())
+            messagebox.showinfo(config.DIALOG_TITLES["success"], f"Перенесено в архив отчётов: {moved}")
+            self.show_reports_archive()
+
+        self.tasks.run(
+            run,
+            title="Перенос в архив...",
+            on_done=on_done,
+            on_error=self.show_task_error,
+            widgets=self.archive_buttons,
+            with_task=True
+        )
+
+    def purge_expired_reports(self):
+        """Удалить отчеты старше срока хранения (в фоне, порциями)"""
+        from retention import cutoff_year, count_expired, purge_expired
+
+        cutoff = cutoff_year()
+        if cutoff is None:
+            messagebox.showinfo(config.DIALOG_TITLES["info"], "Срок хранения отчётов не задан")
+            return
+        try:
+            count = count_expired(cutoff)
+        except Exception as e:
+            self.show_task_error(e)
+            return
+        if not count:
+            messagebox.showinfo(config.DIALOG_TITLES["info"], f"Нет отчётов за {cutoff} год и раньше")
+            return
+        files = "удалены" if config.PURGE_FILES_ACTION == "delete" else f"перенесены в {config.PURGE_FILES_FOLDER}"
+        if not messagebox.askyesno(
+            config.DIALOG_TITLES["confirm_delete"],
+            f"Удалить {count} отчётов за {cutoff} год и раньше?\n\n"
+            f"Файлы Excel будут {files}. Отменить удаление нельзя."
+        ):
+            return
+
+        def run(task):
+            return purge_expired(progress=task.set_progress, task=task)
+
+        def on_done(result):
+            text = f"Удалено отчётов: {result['reports']}, файлов: {result['files']}"
+            if result['file_errors']:
+                text += "\n\nНе удалось обработать:\n" + "\n".join(result['file_errors'][:10])
+            messagebox.showinfo(config.DIALOG_TITLES["success"], text)
+            self.show_reports_archive()
+
+        self.tasks.run(
+            run,
+            title="Очистка архива...",
+            on_done=on_done,
+            on_error=self.show_task_error,
+            widgets=self.archive_buttons,
+            with_task=True
+        )
+
+    def create_reports_tree(self, reports, columns, widths=None, parent=None):
         """Создать таблицу отчётов"""
-        tree_frame = tk.Frame(self.main_frame)
+        tree_frame = tk.Frame(parent or self.main_frame)
         tree_frame.pack(pady=self.PADY * 2, padx=20, fill=tk.BOTH, expand=True)
 
         scrollbar = tk.Scrollbar(tree_frame)
@@ -761,7 +906,8 @@ class ReportApp:
                 report['form_name'],
                 report['month'],
                 report['year'],
-                report['created_at']
+                report['created_at'],
+                "✓" if report.get('telegram_sent') else ""
             ]
             tree.insert("", tk.END, values=values)
 
@@ -779,16 +925,26 @@ class ReportApp:
             return
 
         report_id = tree.item(selected[0])['values'][0]
-        report_data = self.logic.get_report_from_db(report_id)
 
-        if report_data:
-            self.view_report(report_data)
-        else:
-            messagebox.showerror(
-                config.DIALOG_TITLES["error"],
-                "Не удалось загрузить отчёт"
-            )
+        def on_loaded(report_data):
+            if report_data:
+                self.view_report(report_data)
+            else:
+                messagebox.showerror(
+                    config.DIALOG_TITLES["error"],
+                    "Не удалось загрузить отчёт"
+                )
 
+        self.tasks.run(
+            self.logic.get_report_from_db,
+            report_id,
+            title="Загрузка отчёта...",
+            on_done=on_loaded,
+            on_error=self.show_task_error,
+            widgets=self.archive_buttons
+        )
+
+    @checkpoint_after("просмотр отчёта")
     def view_report(self, report_data):
         """Просмотр отчёта"""
         self.clear_frame()
@@ -817,16 +973,12 @@ class ReportApp:
         )
         text_widget.pack(fill=tk.BOTH, expand=True)
 
-        for i, answer in enumerate(report_data['answers']):
-            text_widget.insert(tk.END, f"\n{i+1}. {answer['question_text']}\n", "bold")
-            text_widget.insert(tk.END, f"Ответ: {answer['answer_yes_no']}\n")
-            if answer['comment']:
-                text_widget.insert(tk.END, f"Комментарий: {answer['comment']}\n")
-            text_widget.insert(tk.END, "\n" + "-"*80 + "\n")
-
         text_widget.tag_config("bold", font=("Arial", self.FONT_SMALL - 1, "bold"))
         text_widget.config(state=tk.DISABLED)
 
+        # Первая порция ответов сразу, остальные — частями через after()
+        ReportRenderer(text_widget, report_data['answers']).start()
+
         tk.Button(
             self.main_frame,
             text="Назад",
@@ -835,6 +987,162 @@ class ReportApp:
             command=self.show_reports_archive
         ).pack(pady=20)
 
+    def compare_reports(self, tree):
+        """
+        Сравнить отчёты: два выделенных между собой,
+        один выделенный — с предыдущим отчётом той же формы
+        """
+        selected = tree.selection()
+        if not selected or len(selected) > 2:
+            messagebox.showwarning(
+                config.DIALOG_TITLES["warning"],
+                "Выберите один отчёт (сравнение с предыдущим) или два отчёта"
+            )
+            return
+
+        # Было/стало — по периоду, а не по порядку ввода (отчёты могут вноситься задним числом)
+        reports = sorted(
+            ({'id': values[0], 'form_name': values[1], 'month': values[2], 'year': values[3]}
+             for values in (tree.item(item)['values'] for item in selected)),
+            key=lambda report: (period_key(report), report['id'])
+        )
+        if len(reports) == 2:
+            if reports[0]['form_name'] != reports[1]['form_name']:
+                messagebox.showwarning(
+                    config.DIALOG_TITLES["warning"],
+                    "Сравнивать можно только отчёты одной формы"
+                )
+                return
+            task_args = (diff_reports, reports[0]['id'], reports[1]['id'])
+        else:
+            task_args = (diff_with_previous, reports[0]['id'])
+
+        def on_diff(diff):
+            if diff is None:
+                messagebox.showinfo(
+                    config.DIALOG_TITLES["info"],
+                    "Нет более раннего отчёта этой формы для сравнения"
+                )
+                return
+            self.show_report_diff(diff)
+
+        self.tasks.run(
+            *task_args,
+            title="Сравнение отчётов...",
+            on_done=on_diff,
+            on_error=self.show_task_error,
+            widgets=self.archive_buttons
+        )
+
+    @checkpoint_after("сравнение отчётов")
+    def show_report_diff(self, diff):
+        """Экран сравнения двух отчётов: было / стало по каждому вопросу"""
+        self.clear_frame()
+        old, new = diff['old'], diff['new']
+
+        tk.Label(
+            self.main_frame,
+            text=f"{new['form_name']}: {old['month']} {old['year']} → {new['month']} {new['year']}",
+            font=("Arial", self.FONT_MEDIUM, "bold")
+        ).pack(pady=20)
+
+        summary = ", ".join(
+            f"{DIFF_STATUS_TITLES[status]}: {count}" for status, count in diff['counts'].items() if count
+        )
+        tk.Label(
+            self.main_frame,
+            text=summary,
+            font=("Arial", self.FONT_SMALL)
+        ).pack(pady=self.PADY)
+
+        only_changes_var = tk.BooleanVar(value=True)
+
+        tree_frame = tk.Frame(self.main_frame)
+        tree_frame.pack(pady=self.PADY * 2, padx=20, fill=tk.BOTH, expand=True)
+
+        scrollbar = tk.Scrollbar(tree_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        columns = ["Вопрос", "Изменение", f"Было ({old['month']})", f"Стало ({new['month']})",
+                   "Комментарий было", "Комментарий стало"]
+        tree = ttk.Treeview(
+            tree_frame,
+            columns=columns,
+            show="headings",
+            yscrollcommand=scrollbar.set
+        )
+        scrollbar.config(command=tree.yview)
+        for col, width in zip(columns, [400, 150, 100, 100, 250, 250]):
+            tree.heading(col, text=col)
+            tree.column(col, width=width)
+        tree.pack(fill=tk.BOTH, expand=True)
+
+        tree.tag_configure("flipped", background="#F4CCCC")
+        tree.tag_configure("comment_changed", background="#FFF2CC")
+        tree.tag_configure("added", background="#CFE2F3")
+        tree.tag_configure("removed", background="#D9D9D9")
+
+        def fill_tree():
+            tree.delete(*tree.get_children())
+            for row in diff['rows']:
+                if only_changes_var.get() and row['status'] == "same":
+                    continue
+                tree.insert("", tk.END, tags=(row['status'],), values=[
+                    row['question_text'], DIFF_STATUS_TITLES[row['status']],
+                    row['old_answer'], row['new_answer'],
+                    row['old_comment'], row['new_comment']
+                ])
+
+        fill_tree()
+
+        btn_frame = tk.Frame(self.main_frame)
+        btn_frame.pack(pady=20)
+
+        tk.Checkbutton(
+            btn_frame,
+            text="Только изменения",
+            variable=only_changes_var,
+            font=("Arial", self.FONT_SMALL),
+            command=fill_tree
+        ).pack(side=tk.LEFT, padx=self.PADX)
+
+        def on_exported(path):
+            messagebox.showinfo(
+                config.DIALOG_TITLES["success"],
+                f"Сравнение сохранено:\n{path}"
+            )
+
+        def export_diff():
+            # openpyxl загружается только при первом экспорте
+            from export_excel import create_diff_report
+
+            self.tasks.run(
+                create_diff_report,
+                diff,
+                title="Экспорт сравнения в Excel...",
+                on_done=on_exported,
+                on_error=self.show_task_error,
+                widgets=[btn_export],
+                cancellable=False
+            )
+
+        btn_export = tk.Button(
+            btn_frame,
+            text="Экспорт в Excel",
+            font=("Arial", self.FONT_SMALL),
+            width=20,
+            command=export_diff
+        )
+        btn_export.pack(side=tk.LEFT, padx=self.PADX)
+
+        tk.Button(
+            btn_frame,
+            text="Назад",
+            font=("Arial", self.FONT_SMALL),
+            width=20,
+            command=self.show_reports_archive
+        ).pack(side=tk.LEFT, padx=self.PADX)
+
     def delete_report(self, tree):
         """Удалить отчёт"""
         selected = tree.selection()
@@ -881,7 +1189,8 @@ class ReportApp:
         # Получаем ID отчёта
         report_id = tree.item(selected[0])['values'][0]
 
-        # Создаём сервис Telegram
+        # Создаём сервис Telegram (ssl/urllib загружаются при первой отправке)
+        from telegram_service import TelegramService
         telegram = TelegramService()
 
         # Проверяем настройки
@@ -890,12 +1199,7 @@ class ReportApp:
             self.show_telegram_settings(report_id)
             return
 
-        # Отправляем отчёт
-        success, message = telegram.send_report(report_id)
-
-        if success:
-            messagebox.showinfo("Telegram", message)
-        else:
+        def on_failed(message):
             # Если ошибка - предлагаем настроить заново
             if messagebox.askyesno(
                 "Ошибка отправки",
@@ -903,6 +1207,35 @@ class ReportApp:
             ):
                 self.show_telegram_settings(report_id)
 
+        self.run_telegram_send(telegram, report_id, on_failed, widgets=self.archive_buttons)
+
+    def run_telegram_send(self, telegram, report_id, on_failed, widgets=(), force=False):
+        """
+        Отправить отчёт в фоне; если такой отчёт уже доставлен в этот чат,
+        спросить, отправить ли его повторно (force=True)
+        """
+        def on_sent(outcome):
+            success, message = outcome
+            if not success:
+                on_failed(message)
+            elif telegram.last_delivery is not None:
+                if messagebox.askyesno("Telegram", f"{message}\n\nОтправить отчёт повторно?"):
+                    self.run_telegram_send(telegram, report_id, on_failed, widgets, force=True)
+            else:
+                messagebox.showinfo("Telegram", message)
+
+        self.tasks.run(
+            telegram.send_report,
+            report_id,
+            force=force,
+            title="Отправка в Telegram...",
+            on_done=on_sent,
+            on_error=self.show_task_error,
+            widgets=widgets,
+            # Начатую отправку не прервать: часть сообщений уже ушла бы в чат без записи в журнал доставки
+            cancellable=False
+        )
+
     def show_telegram_settings(self, report_id=None):
         """Окно настроек Telegram"""
         settings_window = tk.Toplevel(self.root)
@@ -984,6 +1317,8 @@ class ReportApp:
             token = token_var.get().strip()
             chat_id = chat_id_var.get().strip()
 
+            from telegram_service import TelegramService, validate_settings
+
             # Валидация
             valid, error = validate_settings(token, chat_id)
             if not valid:
@@ -999,29 +1334,39 @@ class ReportApp:
 
             # Тестируем соединение
             telegram = TelegramService()
-            success, message = telegram.test_connection()
 
-            if success:
-                messagebox.showinfo("Успех", message)
-                settings_window.destroy()
-
-                # Если был передан report_id - отправляем отчёт
-                if report_id:
-                    success, msg = telegram.send_report(report_id)
-                    if success:
-                        messagebox.showinfo("Telegram", msg)
-                    else:
-                        messagebox.showerror("Ошибка", msg)
-            else:
-                messagebox.showerror("Ошибка", message)
+            def on_tested(outcome):
+                success, message = outcome
+                if success:
+                    messagebox.showinfo("Успех", message)
+                    settings_window.destroy()
+
+                    # Если был передан report_id - отправляем отчёт
+                    if report_id:
+                        self.run_telegram_send(
+                            telegram,
+                            report_id,
+                            lambda msg: messagebox.showerror("Ошибка", msg)
+                        )
+                else:
+                    messagebox.showerror("Ошибка", message)
+
+            self.tasks.run(
+                telegram.test_connection,
+                title="Проверка соединения с Telegram...",
+                on_done=on_tested,
+                on_error=self.show_task_error,
+                widgets=[save_button]
+            )
 
-        tk.Button(
+        save_button = tk.Button(
             buttons_frame,
             text="Тест соединения и сохранить",
             font=("Arial", self.FONT_SMALL),
             width=30,
             command=save_settings
-        ).pack(side=tk.LEFT, padx=5)
+        )
+        save_button.pack(side=tk.LEFT, padx=5)
 
         tk.Button(
             buttons_frame,
@@ -5,9 +5,14 @@
 
 import os
 import re
-import openpyxl
-from database import save_report_to_db, get_all_reports, get_report_by_id, delete_report
-from export_excel import create_excel_report
+from database import save_report_to_db, get_all_reports, get_report_by_id, delete_report, LIGHT_ANSWER_FIELDS
+from database import create_draft, get_latest_draft, delete_draft
+from database import find_previous_report, iter_report_answers, question_hash, save_draft_answers
+from drafts import DraftAutosaver
+from report_diff import key_by_question
+from metrics import timed
+from memory_diag import checkpoint_around
+from backup import notify_report_saved
 
 
 def sanitize_filename(filename):
@@ -89,6 +94,14 @@ class ReportLogic:
         self.answers_list = []
         self.current_question_index = 0
         self.questions_per_page = 5
+        self.form_file = None
+        self.draft_id = None
+        self.autosaver = None
+        self.prefill_source = None
+        self.prefill_flags = {}
+        self.last_report_id = None
+        # Полный путь к последнему созданному файлу Excel (папка зависит от года и формы)
+        self.last_file_path = None
 
     def load_forms_list(self):
         """Загрузка списка форм из папки 'формы/'"""
@@ -106,10 +119,13 @@ class ReportLogic:
             forms_set.add(base_name)
         return sorted(list(forms_set))
 
-    def load_questions_from_excel(self, file_path):
+    @timed("excel.load_questions")
+    def load_questions_from_excel(self, file_path, progress=None, task=None):
         """
         Загрузка вопросов из Excel файла
-        Возвращает True при успехе, False при ошибке
+        progress - необязательная функция progress(done, total) для индикатора
+        task - необязательный BackgroundTask: при отмене чтение прерывается
+        Возвращает True при успехе, False при ошибке или отмене
         """
         try:
             # Проверка существования файла
@@ -122,7 +138,8 @@ class ReportLogic:
                 print(f"Ошибка: неподдерживаемый формат файла. Ожидается .xlsx или .xls")
                 return False
 
-            # Загрузка Excel файла
+            # Загрузка Excel файла (openpyxl импортируется при первой загрузке формы)
+            import openpyxl
             try:
                 wb = openpyxl.load_workbook(file_path, data_only=True)
             except openpyxl.utils.exceptions.InvalidFileException:
@@ -143,9 +160,17 @@ class ReportLogic:
             self.questions_list = []
             rows_processed = 0
             rows_skipped = 0
+            total_rows = ws.max_row
 
             # Читаем данные начиная со 2-й строки (1-я строка - заголовки)
             for row_num, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
+                if row_num % 50 == 0:
+                    if task and task.cancelled:
+                        wb.close()
+                        return False
+                    if progress:
+                        progress(row_num, total_rows)
+
                 # Пропускаем полностью пустые строки
                 if not any(row):
                     continue
@@ -172,6 +197,7 @@ class ReportLogic:
                 print(f"Ошибка: в файле не найдено ни одного валидного вопроса")
                 return False
 
+            self.form_file = file_path
             print(f"Успешно загружено {rows_processed} вопросов")
             if rows_skipped > 0:
                 print(f"Пропущено {rows_skipped} строк без вопросов")
@@ -201,8 +227,52 @@ class ReportLogic:
         } for q in self.questions_list]
 
         self.current_question_index = 0
+        self.prefill_source = None
+        self.prefill_flags = {}
         return True
 
+    def prefill_from_previous(self):
+        """
+        Заполнить ответы по последнему отчёту той же формы за предыдущий период
+        Ответы сопоставляются по хэшу вопроса; перенесённые помечаются 'prefilled'
+        (требуют подтверждения), вопросы без пары в прошлом отчёте — 'new'
+        Возвращает словарь report, prefilled, new или None если прошлого отчёта нет
+        """
+        report = self.current_report_data
+        previous = find_previous_report(report['form_name'], report['year'], report['month'])
+        if not previous:
+            return None
+
+        previous_answers = dict(key_by_question(iter_report_answers(previous['id'])))
+
+        self.prefill_flags = {}
+        for index, (key, answer) in enumerate(key_by_question(self.answers_list)):
+            prev = previous_answers.get(key)
+            if prev is None:
+                self.prefill_flags[index] = 'new'
+                continue
+            answer['answer_yes_no'] = prev['answer_yes_no']
+            answer['comment'] = prev['comment'] or ''
+            self.prefill_flags[index] = 'prefilled'
+
+        self.prefill_source = previous
+        flags = list(self.prefill_flags.values())
+        return {
+            'report': previous,
+            'prefilled': flags.count('prefilled'),
+            'new': flags.count('new')
+        }
+
+    def unconfirmed_count(self):
+        """Число перенесённых из прошлого отчёта и ещё не подтверждённых ответов"""
+        return sum(1 for flag in self.prefill_flags.values() if flag == 'prefilled')
+
+    def confirm_prefilled(self, indices=None):
+        """Подтвердить перенесённые ответы (все или только indices)"""
+        for index in list(indices if indices is not None else self.prefill_flags):
+            if self.prefill_flags.get(index) == 'prefilled':
+                del self.prefill_flags[index]
+
     def get_current_block_questions(self):
         """Получить вопросы текущего блока"""
         start = self.current_question_index
@@ -214,9 +284,122 @@ class ReportLogic:
         if 0 <= question_index < len(self.answers_list):
             self.answers_list[question_index]['answer_yes_no'] = answer_yes_no
             self.answers_list[question_index]['comment'] = comment
+            self.prefill_flags.pop(question_index, None)
+            self._draft_changed(question_index)
+            return True
+        return False
+
+    def save_comment(self, question_index, comment):
+        """Сохранить только комментарий к вопросу"""
+        if 0 <= question_index < len(self.answers_list):
+            if self.answers_list[question_index]['comment'] != comment:
+                self.answers_list[question_index]['comment'] = comment
+                self._draft_changed(question_index)
             return True
         return False
 
+    def start_draft(self):
+        """Создать черновик текущего отчёта и запустить автосохранение"""
+        self.close_draft()
+        try:
+            self.draft_id = create_draft(self.current_report_data, self.form_file, len(self.questions_list))
+            self.autosaver = DraftAutosaver(self.draft_id)
+
+            # Уже заполненные ответы (например, из прошлого отчёта) сразу попадают в черновик
+            for index, answer in enumerate(self.answers_list):
+                if answer['answer_yes_no'] or answer['comment']:
+                    self._draft_changed(index)
+        except Exception as e:
+            # Без черновика отчёт всё равно можно заполнить
+            self.draft_id = None
+            print(f"Не удалось создать черновик: {e}")
+
+    def _draft_changed(self, question_index):
+        """Передать изменённый ответ в автосохранение"""
+        if self.autosaver:
+            answer = self.answers_list[question_index]
+            self.autosaver.mark_changed(question_index, question_hash(answer['question_text']),
+                                        answer['answer_yes_no'], answer['comment'])
+
+    def get_latest_draft(self):
+        """Последний незавершённый черновик или None"""
+        try:
+            return get_latest_draft()
+        except Exception as e:
+            print(f"Не удалось прочитать черновики: {e}")
+            return None
+
+    def resume_draft(self, draft):
+        """
+        Восстановить отчёт из черновика (загружает форму заново)
+        Ответы сопоставляются по хэшу вопроса, поэтому вставка или удаление вопросов
+        в форме не сдвигает их; если форма изменилась, черновик переписывается под неё
+        Возвращает (success, message); message содержит предупреждение если форма изменилась
+        """
+        if not self.load_questions_from_excel(draft['form_file']):
+            return False, f"Не удалось загрузить форму черновика:\n{draft['form_file']}"
+
+        self.init_report(draft['form_name'], draft['month'], draft['year'], draft['report_date'])
+
+        positions = {}
+        for index, answer in enumerate(self.answers_list):
+            positions.setdefault(question_hash(answer['question_text']), []).append(index)
+        form_changed = draft['question_count'] != len(self.questions_list)
+
+        restored = {}
+        lost = 0
+        rewrite = form_changed
+        for index, (q_hash, answer_yes_no, comment) in draft['answers'].items():
+            if q_hash is None:
+                # Черновик без хэшей (старая версия программы) — только по номеру
+                target = index if not form_changed and index < len(self.answers_list) else None
+            else:
+                candidates = [i for i in positions.get(q_hash, []) if i not in restored]
+                # Повторяющиеся вопросы: сначала тот же номер, затем первый свободный
+                target = index if index in candidates else (candidates[0] if candidates else None)
+            if target is None:
+                lost += 1
+                rewrite = True
+                continue
+            rewrite = rewrite or target != index or q_hash is None
+            self.answers_list[target]['answer_yes_no'] = answer_yes_no
+            self.answers_list[target]['comment'] = comment
+            restored[target] = (question_hash(self.answers_list[target]['question_text']), answer_yes_no, comment)
+
+        self.draft_id = draft['id']
+        if rewrite:
+            try:
+                save_draft_answers(self.draft_id, restored, question_count=len(self.questions_list))
+            except Exception as e:
+                print(f"Не удалось обновить черновик: {e}")
+        self.autosaver = DraftAutosaver(self.draft_id)
+
+        if form_changed or lost:
+            lost_note = f"Ответов без вопроса в новой форме: {lost}.\n" if lost else ""
+            return True, (f"Форма изменилась после сохранения черновика "
+                          f"({draft['question_count']} → {len(self.questions_list)} вопросов).\n"
+                          f"{lost_note}Проверьте ответы.")
+        return True, ""
+
+    def close_draft(self):
+        """Остановить автосохранение, дописав накопленные изменения"""
+        if self.autosaver:
+            self.autosaver.close()
+            self.autosaver = None
+
+    def discard_draft(self, draft_id=None):
+        """Удалить черновик (по умолчанию — текущий)"""
+        if draft_id is None:
+            self.close_draft()
+            draft_id = self.draft_id
+            self.draft_id = None
+        if draft_id is None:
+            return
+        try:
+            delete_draft(draft_id)
+        except Exception as e:
+            print(f"Не удалось удалить черновик: {e}")
+
     def check_all_answered(self):
         """Проверить что все вопросы отвечены"""
         for i, answer in enumerate(self.answers_list):
@@ -240,6 +423,7 @@ class ReportLogic:
         self.current_question_index = prev_start
         return True
 
+    @checkpoint_around("сохранение отчёта")
     def save_report(self):
         """Сохранение отчета в БД и экспорт в Excel"""
         try:
@@ -250,6 +434,7 @@ class ReportLogic:
 
             report_name = f"{clean_form_name}_{clean_month}_{clean_year}"
 
+            from export_excel import create_excel_report
             file_path = create_excel_report(
                 report_name=report_name,
                 form_name=self.current_report_data['form_name'],
@@ -259,6 +444,12 @@ class ReportLogic:
             )
 
             report_id = save_report_to_db(self.current_report_data, self.answers_list, file_path)
+            self.last_report_id = report_id
+            self.last_file_path = file_path
+            notify_report_saved()
+
+            # Отчёт сохранён — черновик больше не нужен
+            self.discard_draft()
 
             return True, os.path.basename(file_path)
 
@@ -269,9 +460,9 @@ class ReportLogic:
         """Получить все отчеты из БД"""
         return get_all_reports()
 
-    def get_report_from_db(self, report_id):
-        """Получить конкретный отчет из БД"""
-        return get_report_by_id(report_id)
+    def get_report_from_db(self, report_id, fields=LIGHT_ANSWER_FIELDS):
+        """Получить конкретный отчет из БД (по умолчанию без справочных текстов)"""
+        return get_report_by_id(report_id, fields=fields)
 
     def delete_report_from_db(self, report_id):
         """Удалить отчет из БД"""
@@ -281,8 +472,9 @@ class ReportLogic:
         except Exception as e:
             return False, str(e)
 
-    def export_report_to_word(self, report_data):
-        """Экспортировать отчет в Excel заново"""
+    @checkpoint_around("экспорт отчёта")
+    def export_report_to_word(self, report_data, out_dir=None):
+        """Экспортировать отчет в Excel заново (out_dir — папка вместо папки отчетов)"""
         try:
             # Очищаем имя от запрещённых символов
             clean_form_name = sanitize_filename(report_data['form_name'])
@@ -291,13 +483,16 @@ class ReportLogic:
 
             report_name = f"{clean_form_name}_{clean_month}_{clean_year}"
 
+            from export_excel import create_excel_report
             file_path = create_excel_report(
                 report_name=report_name,
                 form_name=report_data['form_name'],
                 month=report_data['month'],
                 year=report_data['year'],
-                answers=report_data['answers']
+                answers=report_data['answers'],
+                out_dir=out_dir
             )
+            self.last_file_path = file_path
 
             return True, os.path.basename(file_path)
         except Exception as e:
@@ -4,12 +4,20 @@
 Версия с правильным определением рабочей директории
 """
 
+import time
+
+# Отсчёт времени запуска — до импорта остальных модулей
+STARTUP_STARTED = time.perf_counter()
+
 import tkinter as tk
 import os
 import sys
 import config
 from gui import ReportApp
 from database import init_database
+from backup import start_scheduler as start_backup_scheduler, stop_scheduler as stop_backup_scheduler
+
+STARTUP_IMPORTED = time.perf_counter()
 
 
 def resolve_app_dir():
@@ -37,7 +45,7 @@ def resolve_app_dir():
 def setup_working_directory():
     """
     Настройка рабочей директории и создание необходимых папок
-    Returns: путь к рабочей директории
+    Returns: (путь к рабочей директории, список созданных папок)
     """
     try:
         # Определяем папку рядом с программой
@@ -65,49 +73,78 @@ def setup_working_directory():
         os.chdir(work_dir)
 
         # Создаём подпапки
-        folders_to_create = [
-            config.FORMS_FOLDER.rstrip('/'),
-            config.REPORTS_FOLDER.rstrip('/'),
-            config.TEMPLATES_FOLDER.rstrip('/')
-        ]
-
-        if config.BACKUP_FOLDER:
-            folders_to_create.append(config.BACKUP_FOLDER.rstrip('/'))
+        created = config.ensure_work_folders()
 
-        for folder in folders_to_create:
-            os.makedirs(folder, exist_ok=True)
-
-        return work_dir
+        return work_dir, created
 
     except Exception as e:
         print(f"Ошибка настройки рабочей директории: {e}")
         raise
 
 
+def report_startup_time(stages):
+    """Вывести время до первого окна по этапам и сравнить с бюджетом (режим отладки)"""
+    if not config.DEBUG_MODE:
+        return
+
+    total_ms = (time.perf_counter() - STARTUP_STARTED) * 1000
+    previous = STARTUP_STARTED
+    parts = []
+    for name, moment in stages:
+        parts.append(f"{name} {(moment - previous) * 1000:.0f}")
+        previous = moment
+
+    status = "в пределах бюджета" if total_ms <= config.STARTUP_BUDGET_MS else "БЮДЖЕТ ПРЕВЫШЕН"
+    print(f"Запуск: {total_ms:.0f} мс до первого окна ({status}, "
+          f"бюджет {config.STARTUP_BUDGET_MS} мс; {', '.join(parts)} мс)")
+
+
+def show_work_dir_info(work_dir):
+    """Показать пользователю где созданы папки (только при первом запуске)"""
+    from tkinter import messagebox
+    messagebox.showinfo(
+        "Рабочая директория",
+        f"Папки созданы в:\n{work_dir}\n\n"
+        f"Файлы форм (.xlsx) кладите в:\n{work_dir}/формы/\n\n"
+        f"Отчёты сохраняются в:\n{work_dir}/отчеты/"
+    )
+
+
 def main():
     """Главная функция запуска"""
     try:
+        stages = [("импорт", STARTUP_IMPORTED)]
+
+        if config.MEMORY_DIAGNOSTICS:
+            from memory_diag import tracker
+            tracker.start()
+
         # Настройка директорий
-        work_dir = setup_working_directory()
+        work_dir, created = setup_working_directory()
 
         # Инициализация БД
         init_database()
+        start_backup_scheduler()
+        stages.append(("папки и БД", time.perf_counter()))
 
         # Запуск GUI
         root = tk.Tk()
+        app = ReportApp(root)
+        stages.append(("окно", time.perf_counter()))
 
-        # Показываем пользователю где создались папки
-        from tkinter import messagebox
-        messagebox.showinfo(
-            "Рабочая директория",
-            f"Папки созданы в:\n{work_dir}\n\n"
-            f"Файлы форм (.xlsx) кладите в:\n{work_dir}/формы/\n\n"
-            f"Отчёты сохраняются в:\n{work_dir}/отчеты/"
-        )
+        def on_first_window():
+            stages.append(("отрисовка", time.perf_counter()))
+            report_startup_time(stages)
+            if created:
+                show_work_dir_info(work_dir)
 
-        app = ReportApp(root)
+        root.after_idle(on_first_window)
         root.mainloop()
 
+        # Дописать черновик незавершённого отчёта
+        app.logic.close_draft()
+        stop_backup_scheduler()
+
     except Exception as e:
         print(f"Критическая ошибка запуска: {e}")
 
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+memory_diag.py — диагностика роста памяти через tracemalloc
+
+Включается config.MEMORY_DIAGNOSTICS (или явно tracker.start()).
+Снимки делаются после каждого перехода между экранами ReportApp и до/после
+экспорта в Excel (декоратор checkpoint_after / checkpoint_around).
+Для каждого снимка печатаются текущий объём, пик, рост относительно
+прошлого снимка и места с наибольшим приростом выделений.
+"""
+
+import functools
+import threading
+import tracemalloc
+from collections import deque
+
+import config
+
+# Служебные выделения, которые не относятся к программе
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _mb(size):
+    return round(size / (1024 * 1024), 2)
+
+
+class MemoryTracker:
+    """Снимки памяти с историей и сравнением с предыдущим снимком"""
+
+    def __init__(self, top_sites):
+        self.top_sites = top_sites
+        self.history = deque(maxlen=config.MEMORY_HISTORY_MAX)
+        self._previous = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return tracemalloc.is_tracing()
+
+    def start(self, frames=None):
+        """Начать отслеживание выделений памяти"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames or config.MEMORY_TRACE_FRAMES)
+        self.checkpoint("старт", verbose=False)
+
+    def stop(self):
+        """Остановить отслеживание"""
+        tracemalloc.stop()
+        self._previous = None
+
+    def peak_mb(self):
+        """Пиковый объём отслеживаемой памяти с момента старта (МБ)"""
+        return _mb(tracemalloc.get_traced_memory()[1]) if self.active else 0.0
+
+    def checkpoint(self, label, verbose=None):
+        """
+        Снять снимок, сравнить с предыдущим и записать в историю
+        Returns: запись истории или None, если отслеживание выключено
+        """
+        if not self.active:
+            return None
+
+        with self._lock:
+            snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+            current, peak = tracemalloc.get_traced_memory()
+
+            if self._previous is not None:
+                diffs = snapshot.compare_to(self._previous, "lineno")
+                growth = [
+                    {'site': str(diff.traceback), 'size_diff_kb': round(diff.size_diff / 1024, 1),
+                     'count_diff': diff.count_diff}
+                    for diff in diffs[:self.top_sites] if diff.size_diff > 0
+                ]
+                previous_mb = self.history[-1]['current_mb'] if self.history else 0.0
+            else:
+                growth = []
+                previous_mb = _mb(current)
+
+            top = [
+                {'site': str(stat.traceback), 'size_kb': round(stat.size / 1024, 1), 'count': stat.count}
+                for stat in snapshot.statistics("lineno")[:self.top_sites]
+            ]
+
+            entry = {
+                'label': label,
+                'current_mb': _mb(current),
+                'peak_mb': _mb(peak),
+                'growth_mb': round(_mb(current) - previous_mb, 2),
+                'top_sites': top,
+                'growth_sites': growth
+            }
+            self.history.append(entry)
+            self._previous = snapshot
+
+        if verbose if verbose is not None else config.DEBUG_MODE:
+            print_entry(entry)
+        return entry
+
+
+def print_entry(entry):
+    """Напечатать снимок: объём, рост и места наибольшего прироста"""
+    print(f"[Память] {entry['label']}: {entry['current_mb']} МБ "
+          f"({entry['growth_mb']:+.2f}), пик {entry['peak_mb']} МБ")
+    for site in entry['growth_sites']:
+        print(f"    +{site['size_kb']} КБ ({site['count_diff']:+d} блоков) {site['site']}")
+
+
+tracker = MemoryTracker(config.MEMORY_TOP_SITES)
+
+
+def checkpoint_after(label):
+    """Декоратор: снимок после вызова (переход на экран)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            result = func(*args, **kwargs)
+            if tracker.active:
+                tracker.checkpoint(label)
+            return result
+        return wrapper
+    return decorator
+
+
+def checkpoint_around(label):
+    """Декоратор: снимки до и после вызова (экспорт), рост относится к самому вызову"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracker.active:
+                return func(*args, **kwargs)
+            tracker.checkpoint(f"{label}: до", verbose=False)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracker.checkpoint(f"{label}: после")
+        return wrapper
+    return decorator
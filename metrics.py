@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+metrics.py — замеры времени операций внутри процесса
+
+Декоратор timed() и контекстный менеджер measure() записывают длительность
+в общий реестр registry: число вызовов, ошибки, суммарное время и
+перцентили p50/p95/p99 по последним METRICS_MAX_SAMPLES замерам.
+Реестр выгружается в JSON/CSV и показывается на скрытом экране
+диагностики (Ctrl+Shift+D в главном окне).
+"""
+
+import csv
+import functools
+import inspect
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import config
+
+SNAPSHOT_FIELDS = ('name', 'count', 'errors', 'total_ms', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')
+
+
+def percentile(sorted_values, fraction):
+    """Перцентиль по методу ближайшего ранга (значения уже отсортированы)"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class _Metric:
+    __slots__ = ('count', 'errors', 'total', 'max', 'samples')
+
+    def __init__(self, max_samples):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=max_samples)
+
+
+class MetricsRegistry:
+    """Потокобезопасный реестр замеров по имени операции"""
+
+    def __init__(self, max_samples):
+        self.max_samples = max_samples
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, error=False):
+        """Записать один замер длительности (секунды)"""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = _Metric(self.max_samples)
+            metric.count += 1
+            metric.total += seconds
+            metric.samples.append(seconds)
+            if seconds > metric.max:
+                metric.max = seconds
+            if error:
+                metric.errors += 1
+
+    def snapshot(self):
+        """Сводка по всем операциям, по убыванию суммарного времени"""
+        with self._lock:
+            items = [(name, m.count, m.errors, m.total, m.max, sorted(m.samples))
+                     for name, m in self._metrics.items()]
+
+        rows = []
+        for name, count, errors, total, max_time, samples in items:
+            rows.append({
+                'name': name,
+                'count': count,
+                'errors': errors,
+                'total_ms': round(total * 1000, 3),
+                'mean_ms': round(total * 1000 / count, 3) if count else 0.0,
+                'p50_ms': round(percentile(samples, 0.50) * 1000, 3),
+                'p95_ms': round(percentile(samples, 0.95) * 1000, 3),
+                'p99_ms': round(percentile(samples, 0.99) * 1000, 3),
+                'max_ms': round(max_time * 1000, 3)
+            })
+        rows.sort(key=lambda row: -row['total_ms'])
+        return rows
+
+    def reset(self):
+        """Очистить реестр"""
+        with self._lock:
+            self._metrics.clear()
+
+    def dump_json(self, path):
+        """Сохранить сводку в JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        return path
+
+    def dump_csv(self, path):
+        """Сохранить сводку в CSV"""
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SNAPSHOT_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.snapshot())
+        return path
+
+
+registry = MetricsRegistry(config.METRICS_MAX_SAMPLES)
+
+
+@contextmanager
+def measure(name):
+    """Замерить блок кода: with measure("excel.save"): ..."""
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except GeneratorExit:
+        raise
+    except BaseException:
+        error = True
+        raise
+    finally:
+        registry.record(name, time.perf_counter() - started, error)
+
+
+def timed(name=None):
+    """
+    Декоратор замера функции; для генераторов учитывается время
+    от первого next() до исчерпания или закрытия
+    """
+    def decorator(func):
+        if not config.METRICS_ENABLED:
+            return func
+        metric_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                with measure(metric_name):
+                    return (yield from func(*args, **kwargs))
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            error = False
+            try:
+                return func(*args, **kwargs)
+            except BaseException:
+                error = True
+                raise
+            finally:
+                registry.record(metric_name, time.perf_counter() - started, error)
+        return wrapper
+
+    return decorator
+
+
+def instrument_module(namespace, prefix, exclude=()):
+    """
+    Обернуть timed() все функции, определённые в модуле (по его globals())
+    Вызывать в конце модуля, до того как другие модули импортируют его имена
+    """
+    module_name = namespace['__name__']
+    for attr, value in list(namespace.items()):
+        if (inspect.isfunction(value) and value.__module__ == module_name
+                and attr not in exclude):
+            namespace[attr] = timed(f"{prefix}{attr}")(value)
@@ -0,0 +1,515 @@
+# -*- coding: utf-8 -*-
+"""
+question_view.py — экран заполнения вопросов с переиспользованием виджетов
+
+Виджеты создаются один раз и при переходе Далее/Назад
+только перепривязываются к данным нового блока.
+Для больших форм — непрерывный список, в котором виджеты есть
+только у видимых строк (VirtualQuestionList).
+"""
+
+import tkinter as tk
+from bisect import bisect_right
+from itertools import accumulate
+import config
+
+
+class QuestionSlot:
+    """Виджеты одного вопроса, которые можно привязать к любому вопросу"""
+
+    def __init__(self, app, parent):
+        self.app = app
+        self.question_index = None
+        self.window_id = None
+
+        self.frame = tk.LabelFrame(
+            parent,
+            text="",
+            font=("Arial", app.FONT_MEDIUM, "bold"),
+            padx=app.PADX,
+            pady=app.PADY
+        )
+
+        top_frame = tk.Frame(self.frame)
+        top_frame.pack(fill=tk.X, pady=app.PADY // 2)
+
+        answer_frame = tk.Frame(top_frame)
+        answer_frame.pack(side=tk.LEFT, padx=(0, 15))
+
+        self.btn_yes = tk.Button(
+            answer_frame,
+            text="ДА",
+            font=("Arial", app.FONT_LARGE, "bold"),
+            width=5,
+            command=lambda: self.app.set_answer(self.question_index, "Да")
+        )
+        self.btn_yes.pack(side=tk.LEFT, padx=3)
+
+        self.btn_no = tk.Button(
+            answer_frame,
+            text="НЕТ",
+            font=("Arial", app.FONT_LARGE, "bold"),
+            width=5,
+            command=lambda: self.app.set_answer(self.question_index, "Нет")
+        )
+        self.btn_no.pack(side=tk.LEFT, padx=3)
+
+        self.question_label = tk.Label(
+            top_frame,
+            text="",
+            font=("Arial", app.FONT_LARGE),
+            wraplength=800,
+            justify=tk.LEFT,
+            anchor='w'
+        )
+        self.question_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        buttons_frame = tk.Frame(top_frame)
+        buttons_frame.pack(side=tk.RIGHT, padx=app.PADX)
+
+        tk.Button(
+            buttons_frame,
+            text="?",
+            font=("Arial", app.FONT_MEDIUM, "bold"),
+            width=3,
+            command=lambda: self.app.show_help(self.question)
+        ).pack(side=tk.LEFT, padx=2)
+
+        self.btn_documents = tk.Button(
+            buttons_frame,
+            text="📄",
+            font=("Arial", app.FONT_MEDIUM, "bold"),
+            width=3,
+            command=lambda: self.app.show_documents(self.question)
+        )
+
+        comment_frame = tk.Frame(self.frame)
+        comment_frame.pack(fill=tk.X, pady=app.PADY // 2)
+
+        tk.Label(
+            comment_frame,
+            text="Комментарий:",
+            font=("Arial", app.FONT_LARGE)
+        ).pack(side=tk.LEFT, padx=(0, app.PADX))
+
+        self.comment = tk.Text(
+            comment_frame,
+            height=app.COMMENT_HEIGHT,
+            font=("Arial", app.FONT_LARGE),
+            wrap=tk.WORD
+        )
+        self.comment.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.comment.bind('<KeyRelease>', self.on_comment_edited)
+
+    @property
+    def question(self):
+        return self.app.logic.questions_list[self.question_index]
+
+    def bind(self, question_index):
+        """Привязать слот к вопросу question_index"""
+        self.question_index = question_index
+        question = self.question
+        answer_data = self.app.logic.answers_list[question_index]
+
+        self.refresh_title()
+        self.question_label.config(text=question['question'])
+        self.show_answer(answer_data['answer_yes_no'])
+
+        if question.get('documents'):
+            self.btn_documents.pack(side=tk.LEFT, padx=2)
+        else:
+            self.btn_documents.pack_forget()
+
+        self.comment.delete("1.0", tk.END)
+        if answer_data['comment']:
+            self.comment.insert("1.0", answer_data['comment'])
+        self.adjust_height()
+
+    def refresh_title(self):
+        """Заголовок слота с пометкой предзаполнения из прошлого отчёта"""
+        flag = self.app.logic.prefill_flags.get(self.question_index)
+        title = f"Вопрос {self.question_index + 1}"
+        if flag == 'prefilled':
+            self.frame.config(text=f"{title} — ответ из прошлого отчёта, подтвердите", fg="darkorange")
+        elif flag == 'new':
+            self.frame.config(text=f"{title} — новый или изменённый вопрос", fg="blue")
+        else:
+            self.frame.config(text=title, fg="black")
+
+    def show_answer(self, answer):
+        """Раскрасить кнопки ДА/НЕТ по ответу"""
+        if answer == "Да":
+            self.btn_yes.config(bg="green", fg="white")
+            self.btn_no.config(bg="lightgray", fg="darkred")
+        elif answer == "Нет":
+            self.btn_yes.config(bg="lightgray", fg="darkgreen")
+            self.btn_no.config(bg="red", fg="white")
+        else:
+            self.btn_yes.config(bg="lightgray", fg="darkgreen")
+            self.btn_no.config(bg="lightgray", fg="darkred")
+
+    def store_comment(self):
+        """Перенести комментарий из поля в ReportLogic перед перепривязкой слота"""
+        if self.question_index is not None:
+            self.app.logic.save_comment(self.question_index, self.comment.get("1.0", tk.END).strip())
+
+    def on_comment_edited(self, event=None):
+        """Правка комментария: подогнать высоту и передать текст в ReportLogic (автосохранение)"""
+        self.adjust_height()
+        self.store_comment()
+
+    def adjust_height(self, event=None):
+        """Подогнать высоту поля комментария под текст"""
+        lines = self.comment.get("1.0", tk.END).count('\n')
+        self.comment.config(height=max(self.app.COMMENT_HEIGHT, min(6, lines + 1)))
+
+    def widgets(self):
+        """Словарь виджетов в формате ReportApp.current_block_widgets"""
+        return {
+            'btn_yes': self.btn_yes,
+            'btn_no': self.btn_no,
+            'comment': self.comment,
+            'slot': self
+        }
+
+
+def create_confirm_button(app, parent):
+    """Кнопка массового подтверждения ответов, перенесённых из прошлого отчёта"""
+    return tk.Button(
+        parent,
+        text="",
+        font=("Arial", app.FONT_LARGE),
+        command=app.confirm_prefilled_answers
+    )
+
+
+def update_confirm_button(app, button):
+    """Обновить счётчик на кнопке подтверждения или скрыть её"""
+    count = app.logic.unconfirmed_count()
+    if count:
+        button.config(text=f"✓ Подтвердить перенесённые ({count})")
+        if not button.winfo_ismapped():
+            button.pack(side=tk.LEFT, padx=app.PADX)
+    else:
+        button.pack_forget()
+
+
+class QuestionPageView:
+    """Экран блока вопросов: создаётся один раз на отчёт"""
+
+    def __init__(self, app, parent):
+        self.app = app
+
+        self.frame = tk.Frame(parent)
+        self.frame.pack(fill=tk.BOTH, expand=True)
+
+        self.header_label = tk.Label(
+            self.frame,
+            text="",
+            font=("Arial", app.FONT_MEDIUM, "bold")
+        )
+        self.header_label.pack(pady=app.PADY)
+
+        self.range_label = tk.Label(
+            self.frame,
+            text="",
+            font=("Arial", app.FONT_SMALL)
+        )
+        self.range_label.pack(pady=app.PADY // 2)
+
+        canvas_frame = tk.Frame(self.frame)
+        canvas_frame.pack(pady=app.PADY, fill=tk.BOTH, expand=True)
+
+        self.canvas = tk.Canvas(canvas_frame)
+        scrollbar = tk.Scrollbar(canvas_frame, orient="vertical", command=self.canvas.yview)
+        scrollable_frame = tk.Frame(self.canvas)
+
+        scrollable_frame.bind("<Configure>", lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
+        self.canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+
+        self.canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        self.slots = [
+            QuestionSlot(app, scrollable_frame)
+            for _ in range(app.logic.questions_per_page)
+        ]
+
+        btn_frame = tk.Frame(self.frame)
+        btn_frame.pack(pady=app.PADY * 2)
+
+        self.btn_prev = tk.Button(
+            btn_frame,
+            text="← Назад",
+            font=("Arial", app.FONT_LARGE),
+            width=15,
+            command=app.on_prev_block
+        )
+        self.btn_prev.pack(side=tk.LEFT, padx=app.PADX)
+
+        self.btn_next = tk.Button(
+            btn_frame,
+            text="Далее →",
+            font=("Arial", app.FONT_LARGE),
+            width=15,
+            command=app.on_next_block
+        )
+        self.btn_next.pack(side=tk.LEFT, padx=app.PADX)
+
+        self.btn_confirm = create_confirm_button(app, btn_frame)
+
+    def is_alive(self):
+        """True если виджеты экрана ещё не уничтожены clear_frame()"""
+        return bool(self.frame.winfo_exists())
+
+    def update_confirm_button(self):
+        """Показать кнопку подтверждения, пока есть неподтверждённые ответы"""
+        update_confirm_button(self.app, self.btn_confirm)
+
+    def show_block(self):
+        """Показать текущий блок вопросов ReportLogic"""
+        logic = self.app.logic
+        start, end = logic.get_current_block_questions()
+        total = len(logic.questions_list)
+        report = logic.current_report_data
+
+        self.header_label.config(text=f"Отчёт: {report['form_name']} {report['month']} {report['year']}")
+        self.range_label.config(text=f"Вопросы {start + 1}-{end} из {total}")
+
+        block_widgets = {}
+        for slot in self.slots:
+            slot.frame.pack_forget()
+        for offset, question_index in enumerate(range(start, end)):
+            slot = self.slots[offset]
+            slot.bind(question_index)
+            slot.frame.pack(pady=self.app.PADY, padx=20, fill=tk.X)
+            block_widgets[question_index] = slot.widgets()
+
+        self.btn_prev.config(state=tk.DISABLED if start == 0 else tk.NORMAL)
+        self.btn_next.config(text="Далее →" if end < total else "Завершить")
+        self.canvas.yview_moveto(0)
+        self.update_confirm_button()
+
+        return block_widgets
+
+
+class VirtualQuestionList:
+    """
+    Все вопросы формы одним прокручиваемым списком
+
+    Виджеты создаются только для строк в области видимости
+    (плюс запас config.VIRTUAL_LIST_BUFFER_ROWS) и переиспользуются при прокрутке.
+    Высота строки измеряется (winfo_reqheight) после привязки слота; пока строка
+    не показывалась, берётся оценка config.VIRTUAL_ROW_HEIGHT.
+    Ответы хранятся в ReportLogic.answers_list.
+    """
+
+    def __init__(self, app, parent):
+        self.app = app
+        self.slots = []
+        self.row_height = config.VIRTUAL_ROW_HEIGHT
+        self.heights = []
+        self.offsets = [0]
+
+        self.frame = tk.Frame(parent)
+        self.frame.pack(fill=tk.BOTH, expand=True)
+
+        self.header_label = tk.Label(
+            self.frame,
+            text="",
+            font=("Arial", app.FONT_MEDIUM, "bold")
+        )
+        self.header_label.pack(pady=app.PADY)
+
+        self.range_label = tk.Label(
+            self.frame,
+            text="",
+            font=("Arial", app.FONT_SMALL)
+        )
+        self.range_label.pack(pady=app.PADY // 2)
+
+        canvas_frame = tk.Frame(self.frame)
+        canvas_frame.pack(pady=app.PADY, fill=tk.BOTH, expand=True)
+
+        self.canvas = tk.Canvas(canvas_frame, highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(canvas_frame, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self.on_scroll)
+
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.canvas.bind("<Configure>", self.on_configure)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.bind_all(sequence, self.on_mousewheel)
+        self.frame.bind("<Destroy>", self.unbind_mousewheel)
+
+        btn_frame = tk.Frame(self.frame)
+        btn_frame.pack(pady=app.PADY * 2)
+
+        self.btn_next = tk.Button(
+            btn_frame,
+            text="Завершить",
+            font=("Arial", app.FONT_LARGE),
+            width=15,
+            command=app.on_finish_list
+        )
+        self.btn_next.pack(side=tk.LEFT, padx=app.PADX)
+        self.btn_prev = None
+
+        self.btn_confirm = create_confirm_button(app, btn_frame)
+
+    def is_alive(self):
+        """True если виджеты экрана ещё не уничтожены clear_frame()"""
+        return bool(self.frame.winfo_exists())
+
+    def update_confirm_button(self):
+        """Показать кнопку подтверждения, пока есть неподтверждённые ответы"""
+        update_confirm_button(self.app, self.btn_confirm)
+
+    def show_block(self):
+        """Показать список с начала (интерфейс совпадает с QuestionPageView)"""
+        report = self.app.logic.current_report_data
+        self.header_label.config(text=f"Отчёт: {report['form_name']} {report['month']} {report['year']}")
+
+        for slot in self.slots:
+            slot.question_index = None
+            self.canvas.itemconfigure(slot.window_id, state='hidden')
+
+        self.heights = [self.row_height] * len(self.app.logic.questions_list)
+        self.update_offsets()
+        self.update_scrollregion()
+        self.canvas.yview_moveto(0)
+        self.update_confirm_button()
+        return self.refresh()
+
+    def update_offsets(self):
+        """Верхние границы строк: offsets[i] — начало строки i, offsets[-1] — высота списка"""
+        self.offsets = [0] + list(accumulate(self.heights))
+
+    def update_scrollregion(self):
+        """Высота области прокрутки = сумма высот строк"""
+        width = max(self.canvas.winfo_width(), 1)
+        self.canvas.configure(scrollregion=(0, 0, width, self.offsets[-1]))
+
+    def create_slot(self):
+        """Создать новый слот в пуле (высоту окна задаёт содержимое строки)"""
+        slot = QuestionSlot(self.app, self.canvas)
+        slot.window_id = self.canvas.create_window(
+            0, 0,
+            window=slot.frame,
+            anchor="nw",
+            width=max(self.canvas.winfo_width() - 20, 1),
+            state='hidden'
+        )
+        slot.frame.bind("<Configure>", lambda event, s=slot: self.on_row_resized(s))
+        self.slots.append(slot)
+        return slot
+
+    def on_row_resized(self, slot):
+        """Строка выросла или уменьшилась (длинный вопрос, комментарий): сдвинуть строки ниже"""
+        index = slot.question_index
+        if index is None or index >= len(self.heights) or not slot.frame.winfo_exists():
+            return
+        height = slot.frame.winfo_reqheight() + self.app.PADY * 2
+        if height == self.heights[index]:
+            return
+
+        self.heights[index] = height
+        self.update_offsets()
+        for other in self.slots:
+            if other.question_index is not None:
+                self.canvas.coords(other.window_id, 10, self.offsets[other.question_index] + self.app.PADY)
+        self.update_scrollregion()
+
+    def visible_range(self):
+        """Диапазон индексов вопросов, которым нужны виджеты"""
+        total = len(self.heights)
+        top = self.canvas.canvasy(0)
+        height = max(self.canvas.winfo_height(), self.row_height)
+        buffer_rows = config.VIRTUAL_LIST_BUFFER_ROWS
+
+        first = max(0, bisect_right(self.offsets, top) - 1 - buffer_rows)
+        last = min(total, bisect_right(self.offsets, top + height) + buffer_rows)
+        return first, last
+
+    def refresh(self):
+        """Привязать слоты к строкам в области видимости"""
+        first, last = self.visible_range()
+        visible = range(first, last)
+
+        bound = {}
+        free = []
+        for slot in self.slots:
+            if slot.question_index is not None and slot.question_index in visible:
+                bound[slot.question_index] = slot
+            else:
+                free.append(slot)
+
+        for question_index in visible:
+            if question_index in bound:
+                continue
+            slot = free.pop() if free else self.create_slot()
+            slot.store_comment()
+            slot.bind(question_index)
+            self.canvas.coords(slot.window_id, 10, self.offsets[question_index] + self.app.PADY)
+            self.canvas.itemconfigure(slot.window_id, state='normal')
+            # <Configure> не придёт, если размер рамки не изменился — измерить после раскладки
+            self.canvas.after_idle(self.on_row_resized, slot)
+            bound[question_index] = slot
+
+        for slot in free:
+            slot.store_comment()
+            slot.question_index = None
+            self.canvas.itemconfigure(slot.window_id, state='hidden')
+
+        total = len(self.app.logic.questions_list)
+        answered = sum(1 for a in self.app.logic.answers_list if a['answer_yes_no'])
+        self.range_label.config(text=f"Всего вопросов: {total}, отвечено: {answered}")
+
+        self.app.current_block_widgets = {idx: slot.widgets() for idx, slot in bound.items()}
+        return self.app.current_block_widgets
+
+    def store_comments(self):
+        """Сохранить комментарии всех видимых строк в ReportLogic"""
+        for slot in self.slots:
+            slot.store_comment()
+
+    def scroll_to(self, question_index):
+        """Прокрутить список к вопросу"""
+        self.canvas.yview_moveto(self.offsets[question_index] / max(self.offsets[-1], 1))
+        self.refresh()
+
+    def on_scroll(self, first, last):
+        """yscrollcommand канвы: обновить ползунок и видимые строки"""
+        self.scrollbar.set(first, last)
+        self.refresh()
+
+    def on_configure(self, event):
+        """Изменение размера окна: подогнать ширину строк"""
+        for slot in self.slots:
+            self.canvas.itemconfigure(slot.window_id, width=max(event.width - 20, 1))
+        self.update_scrollregion()
+        self.refresh()
+
+    def unbind_mousewheel(self, event=None):
+        """Снять глобальную привязку колеса при уничтожении экрана"""
+        if event is not None and event.widget is not self.frame:
+            return
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.unbind_all(sequence)
+
+    def on_mousewheel(self, event):
+        """Прокрутка колесом мыши (Windows/macOS/Linux)"""
+        # Колесо над другими окнами (справка, настройки) не крутит список
+        if not str(event.widget).startswith(str(self.canvas)):
+            return
+        if getattr(event, 'num', None) == 4:
+            step = -1
+        elif getattr(event, 'num', None) == 5:
+            step = 1
+        elif abs(event.delta) >= 120:
+            step = -int(event.delta / 120)
+        else:
+            step = -event.delta
+        self.canvas.yview_scroll(step, "units")
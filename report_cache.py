@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+report_cache.py — LRU-кэш отчётов в памяти
+
+Ограничен и числом записей, и примерным объёмом в байтах.
+Используется database.get_report_by_id(); запись и удаление отчётов
+сбрасывают соответствующие записи.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+
+def estimate_report_size(report):
+    """Примерный объём отчёта в памяти (байты)"""
+    size = sys.getsizeof(report)
+    for value in report.values():
+        if isinstance(value, str):
+            size += sys.getsizeof(value)
+    for answer in report.get('answers', []):
+        size += sys.getsizeof(answer)
+        for value in answer.values():
+            if isinstance(value, str):
+                size += sys.getsizeof(value)
+    return size
+
+
+def copy_report(report):
+    """Копия отчёта, чтобы вызывающий код не мог испортить кэш"""
+    report_copy = dict(report)
+    report_copy['answers'] = [dict(answer) for answer in report.get('answers', [])]
+    return report_copy
+
+
+class ReportCache:
+    """Потокобезопасный LRU-кэш отчётов по ключу (report_id, поля)"""
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, report_id, fields):
+        """Отчёт из кэша (копия) или None"""
+        key = (report_id, fields)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy_report(entry[0])
+
+    def put(self, report_id, fields, report):
+        """Положить отчёт в кэш, вытеснив самые старые записи при переполнении"""
+        size = estimate_report_size(report)
+        if size > self.max_bytes:
+            return
+
+        key = (report_id, fields)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+
+            self._entries[key] = (copy_report(report), size)
+            self._total_bytes += size
+
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, report_id):
+        """Сбросить все варианты отчёта report_id"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == report_id]:
+                self._total_bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        """Очистить кэш"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """Статистика попаданий и заполненности"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes
+            }
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+report_diff.py — сравнение двух отчётов одной формы
+
+Ответы сопоставляются по хэшу нормализованного текста вопроса:
+старый отчёт читается потоком в словарь, новый — потоком сверяется с ним.
+"""
+
+import config
+from database import iter_report_answers, get_report_by_id, find_previous_report, question_hash
+
+# Статусы строк сравнения
+SAME = "same"
+FLIPPED = "flipped"
+COMMENT_CHANGED = "comment_changed"
+ADDED = "added"
+REMOVED = "removed"
+
+STATUS_TITLES = {
+    SAME: "Без изменений",
+    FLIPPED: "Ответ изменён",
+    COMMENT_CHANGED: "Комментарий изменён",
+    ADDED: "Новый вопрос",
+    REMOVED: "Вопрос удалён",
+}
+
+
+def period_key(item):
+    """Порядок периода (год, номер месяца) для отчёта или задания с полями year и month"""
+    month = str(item.get("month") or "").strip().capitalize()
+    month_index = config.MONTHS.index(month) if month in config.MONTHS else len(config.MONTHS)
+    year = str(item.get("year") or "").strip()
+    return int(year) if year.isdigit() else 0, month_index
+
+
+def key_by_question(answers):
+    """Ключ ответа: (хэш вопроса, номер повтора) — на случай одинаковых вопросов в форме"""
+    seen = {}
+    for answer in answers:
+        h = question_hash(answer['question_text'])
+        seen[h] = seen.get(h, 0) + 1
+        yield (h, seen[h]), answer
+
+
+def diff_answers(old_answers, new_answers):
+    """
+    Сравнить два потока ответов
+
+    Returns:
+        list: строки сравнения в порядке нового отчёта, удалённые вопросы в конце;
+        каждая строка — словарь status, question_text, old_answer, new_answer,
+        old_comment, new_comment, comment_changed
+    """
+    old = dict(key_by_question(old_answers))
+
+    rows = []
+    for key, new in key_by_question(new_answers):
+        prev = old.pop(key, None)
+        new_comment = (new.get('comment') or '').strip()
+        if prev is None:
+            rows.append({
+                'status': ADDED,
+                'question_text': new['question_text'],
+                'old_answer': '',
+                'new_answer': new['answer_yes_no'],
+                'old_comment': '',
+                'new_comment': new_comment,
+                'comment_changed': bool(new_comment)
+            })
+            continue
+
+        old_comment = (prev.get('comment') or '').strip()
+        comment_changed = old_comment != new_comment
+        if prev['answer_yes_no'] != new['answer_yes_no']:
+            status = FLIPPED
+        elif comment_changed:
+            status = COMMENT_CHANGED
+        else:
+            status = SAME
+
+        rows.append({
+            'status': status,
+            'question_text': new['question_text'],
+            'old_answer': prev['answer_yes_no'],
+            'new_answer': new['answer_yes_no'],
+            'old_comment': old_comment,
+            'new_comment': new_comment,
+            'comment_changed': comment_changed
+        })
+
+    for prev in old.values():
+        rows.append({
+            'status': REMOVED,
+            'question_text': prev['question_text'],
+            'old_answer': prev['answer_yes_no'],
+            'new_answer': '',
+            'old_comment': (prev.get('comment') or '').strip(),
+            'new_comment': '',
+            'comment_changed': False
+        })
+
+    return rows
+
+
+def diff_reports(old_report_id, new_report_id):
+    """
+    Сравнить два отчёта одной формы из БД
+
+    Returns:
+        dict: old, new (шапки отчётов), rows (см. diff_answers), counts по статусам
+    Raises: ValueError если отчёт не найден или отчёты разных форм
+    """
+    old_report = get_report_by_id(old_report_id, fields=('id',))
+    new_report = get_report_by_id(new_report_id, fields=('id',))
+    if not old_report or not new_report:
+        raise ValueError("Отчёт для сравнения не найден")
+    if old_report['form_name'] != new_report['form_name']:
+        raise ValueError(
+            f"Сравнивать можно только отчёты одной формы: "
+            f"«{old_report['form_name']}» и «{new_report['form_name']}»"
+        )
+
+    rows = diff_answers(
+        iter_report_answers(old_report_id),
+        iter_report_answers(new_report_id)
+    )
+
+    counts = {status: 0 for status in STATUS_TITLES}
+    for row in rows:
+        counts[row['status']] += 1
+
+    for report in (old_report, new_report):
+        del report['answers']
+
+    return {'old': old_report, 'new': new_report, 'rows': rows, 'counts': counts}
+
+
+def diff_with_previous(report_id):
+    """
+    Сравнить отчёт с предыдущим отчётом той же формы
+    Returns: результат diff_reports или None если предыдущего отчёта нет
+    """
+    report = get_report_by_id(report_id, fields=('id',))
+    if not report:
+        raise ValueError(f"Отчёт с ID {report_id} не найден")
+
+    previous = find_previous_report(report['form_name'], report['year'], report['month'])
+    if not previous:
+        return None
+    return diff_reports(previous['id'], report_id)
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+report_files.py — раскладка файлов отчетов по папкам и сверка с БД
+
+Новые файлы пишутся в отчеты/<год>/<форма>/ (config.REPORTS_SHARDED,
+см. export_excel.report_output_dir). migrate_layout() переносит уже
+сохраненные файлы в папки по той же схеме и порциями обновляет
+reports.file_path в рабочей базе и годовых архивах.
+
+reconcile() за один обход папки отчеты/ находит файлы, на которые
+не ссылается ни один отчет, и отчеты, файла которых нет на диске.
+
+Командная строка:
+    python report_files.py migrate
+    python report_files.py check
+"""
+
+import os
+import sys
+
+import config
+import database
+
+def _reports_root():
+    return os.path.join(os.getcwd(), config.REPORTS_FOLDER.rstrip('/'))
+
+
+def _key(path):
+    """Путь для сравнения (регистр и разделители по правилам ОС)"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def migrate_layout(batch_size=None, progress=None, task=None):
+    """
+    Перенести файлы отчетов в папки по текущей раскладке и обновить file_path
+    Файл сначала переносится, затем порция путей записывается одной транзакцией;
+    если перенос прервался до записи, повторный запуск найдет файл на новом месте.
+    Занятое другим файлом место не перезаписывается — это ошибка в errors
+    Args:
+        progress: вызывается как progress(просмотрено отчетов)
+        task: BackgroundTask для отмены
+    Returns: словарь moved, missing, errors
+    Raises: Exception при ошибке базы
+    """
+    from export_excel import report_output_dir
+
+    batch_size = batch_size or config.REPORTS_MIGRATE_BATCH_SIZE
+    result = {'moved': 0, 'missing': 0, 'errors': []}
+    seen = 0
+
+    conn = None
+    try:
+        conn = database.connect_file(database.DB_FILE)
+        for schema, _ in database.each_shard(conn):
+            last_id = 0
+            while not (task and task.cancelled):
+                rows = conn.execute(f'''
+                    SELECT id, form_name, year, file_path FROM {schema}.reports
+                    WHERE id > ? ORDER BY id LIMIT ?
+                ''', (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1]['id']
+
+                updates = []
+                for row in rows:
+                    old_path = row['file_path']
+                    new_dir = report_output_dir(row['year'], row['form_name'], create=False)
+                    new_path = os.path.join(new_dir, os.path.basename(old_path))
+                    if _key(old_path) == _key(new_path):
+                        continue
+                    try:
+                        if os.path.isfile(old_path):
+                            # Чужой файл с тем же именем не перезаписывается
+                            if os.path.exists(new_path):
+                                result['errors'].append(f"{old_path}: на новом месте уже есть файл {new_path}")
+                                continue
+                            # Папка создается только под реальный перенос
+                            os.makedirs(new_dir, exist_ok=True)
+                            os.replace(old_path, new_path)
+                        elif not os.path.isfile(new_path):
+                            result['missing'] += 1
+                            continue
+                        updates.append((new_path, row['id']))
+                    except OSError as e:
+                        result['errors'].append(f"{old_path}: {e}")
+
+                if updates:
+                    conn.executemany(f'UPDATE {schema}.reports SET file_path = ? WHERE id = ?', updates)
+                    conn.commit()
+                    for _, report_id in updates:
+                        database.report_cache.invalidate(report_id)
+                    result['moved'] += len(updates)
+
+                seen += len(rows)
+                if progress:
+                    progress(seen)
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+    if config.DEBUG_MODE:
+        print(f"Перенесено файлов отчетов: {result['moved']}")
+    return result
+
+
+def reconcile():
+    """
+    Сверить папку отчеты/ с БД (один обход папки, один проход по отчетам)
+    Returns: словарь orphan_files (файлы без отчета) и missing_files
+             (список словарей id, form_name, month, year, file_path)
+    Raises: Exception при ошибке базы
+    """
+    on_disk = {}
+    for folder, _, names in os.walk(_reports_root()):
+        for name in names:
+            if name.lower().endswith('.xlsx') and not name.startswith('~$'):
+                path = os.path.join(folder, name)
+                on_disk[_key(path)] = path
+
+    root = _key(_reports_root()) + os.sep
+    missing = []
+    conn = None
+    try:
+        conn = database.connect_file(database.DB_FILE)
+        for schema, _ in database.each_shard(conn):
+            for row in conn.execute(f'SELECT id, form_name, month, year, file_path FROM {schema}.reports'):
+                key = _key(row['file_path'])
+                if on_disk.pop(key, None) is not None:
+                    continue
+                # Файлы вне папки отчеты/ обход не видит — проверяются по отдельности
+                if not key.startswith(root) and os.path.isfile(row['file_path']):
+                    continue
+                missing.append(dict(row))
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+    return {'orphan_files': sorted(on_disk.values()), 'missing_files': missing}
+
+
+def main(argv):
+    """Командная строка: migrate | check"""
+    command = argv[1] if len(argv) > 1 else ""
+
+    if command == "migrate":
+        database.init_database()
+        result = migrate_layout(progress=lambda seen: print(f"\rПросмотрено отчетов: {seen}", end=""))
+        print(f"\nПеренесено: {result['moved']}, файлов не найдено: {result['missing']}")
+        for error in result['errors']:
+            print(f"Ошибка: {error}")
+        return 1 if result['errors'] else 0
+
+    if command == "check":
+        result = reconcile()
+        for path in result['orphan_files']:
+            print(f"Файл без отчета: {path}")
+        for report in result['missing_files']:
+            print(f"Нет файла отчета {report['id']} ({report['form_name']} {report['month']} {report['year']}): "
+                  f"{report['file_path']}")
+        print(f"Файлов без отчета: {len(result['orphan_files'])}, отчетов без файла: {len(result['missing_files'])}")
+        return 1 if result['orphan_files'] or result['missing_files'] else 0
+
+    print("Использование: python report_files.py migrate | check")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+report_view.py — быстрый вывод отчёта в текстовое поле
+
+Текст всех ответов готовится за один проход, первая порция вставляется
+сразу, остальные — частями через after(), чтобы окно не зависало.
+Справочные поля ответа читаются из БД только при раскрытии.
+"""
+
+import tkinter as tk
+import config
+from database import get_answer_reference
+
+
+class ReportRenderer:
+    """Порционная отрисовка ответов отчёта в tk.Text"""
+
+    def __init__(self, text_widget, answers):
+        self.text = text_widget
+        self.answers = answers
+        self.segments = self._build_segments()
+        self.position = 0
+        self.expanded = set()
+
+        self.text.tag_config("ref", foreground="blue", underline=True)
+        self.text.tag_bind("ref", "<Button-1>", self.on_ref_click)
+        self.text.tag_bind("ref", "<Enter>", lambda e: self.text.config(cursor="hand2"))
+        self.text.tag_bind("ref", "<Leave>", lambda e: self.text.config(cursor=""))
+        self.text.tag_config("reference", lmargin1=20, lmargin2=20, foreground="#444444")
+
+    def _build_segments(self):
+        """
+        Подготовить аргументы Text.insert для каждого ответа:
+        плоский список (текст, теги, текст, теги, ...)
+        """
+        segments = []
+        for i, answer in enumerate(self.answers):
+            parts = [
+                f"\n{i+1}. {answer['question_text']}\n", ("bold",),
+                f"Ответ: {answer['answer_yes_no']}\n", ()
+            ]
+            if answer['comment']:
+                parts += [f"Комментарий: {answer['comment']}\n", ()]
+            if answer.get('id'):
+                parts += ["▸ Справка", ("ref", f"ref_{i}"), "\n", ()]
+            parts += ["\n" + "-"*80 + "\n", ()]
+            segments.append(parts)
+        return segments
+
+    def start(self):
+        """Вставить первую порцию сразу, остальное — в фоне главного цикла"""
+        self._insert_chunk(config.VIEW_FIRST_CHUNK_ANSWERS)
+        if self.position < len(self.segments):
+            self.text.after(config.VIEW_CHUNK_DELAY_MS, self._continue)
+
+    def _continue(self):
+        if not self.text.winfo_exists():
+            return
+        self._insert_chunk(config.VIEW_CHUNK_ANSWERS)
+        if self.position < len(self.segments):
+            self.text.after(config.VIEW_CHUNK_DELAY_MS, self._continue)
+
+    def _insert_chunk(self, count):
+        """Вставить следующие count ответов одним вызовом Text.insert"""
+        chunk = self.segments[self.position:self.position + count]
+        self.position += len(chunk)
+        if not chunk:
+            return
+
+        args = []
+        for parts in chunk:
+            args.extend(parts)
+
+        self.text.config(state=tk.NORMAL)
+        self.text.insert(tk.END, *args)
+        self.text.config(state=tk.DISABLED)
+
+    def on_ref_click(self, event):
+        """Раскрыть справочную информацию ответа"""
+        index = self.text.index(f"@{event.x},{event.y}")
+        answer_number = None
+        for tag in self.text.tag_names(index):
+            if tag.startswith("ref_"):
+                answer_number = int(tag[4:])
+                break
+
+        if answer_number is None or answer_number in self.expanded:
+            return
+        self.expanded.add(answer_number)
+
+        try:
+            reference = get_answer_reference(self.answers[answer_number]['id'])
+        except Exception as e:
+            reference = None
+            if config.DEBUG_MODE:
+                print(f"Не удалось загрузить справку: {e}")
+
+        lines = []
+        if reference:
+            if reference['gost_text']:
+                lines.append(f"ГОСТ ИСО 9001: {reference['gost_text']}")
+            if reference['quality_text']:
+                lines.append(f"Руководство по качеству: {reference['quality_text']}")
+            if reference['documents_text']:
+                lines.append(f"Документы: {reference['documents_text']}")
+        if not lines:
+            lines.append("Информация отсутствует")
+
+        tag = f"ref_{answer_number}"
+        link_start, link_end = self.text.tag_ranges(tag)[:2]
+
+        self.text.config(state=tk.NORMAL)
+        self.text.delete(link_start, link_end)
+        self.text.insert(link_start, "▾ Справка", (tag,))
+        self.text.insert(f"{link_start} lineend +1c", "\n".join(lines) + "\n", ("reference",))
+        self.text.config(state=tk.DISABLED)
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+retention.py — удаление отчетов старше срока хранения
+
+Отчеты за годы не позже cutoff_year() удаляются порциями по PURGE_BATCH_SIZE
+отчетов: каждая порция — короткая транзакция (агрегаты question_stats
+вычитаются так же, как в database.delete_report), между порциями пауза.
+Удаляются отчеты и рабочей базы, и годовых архивов; опустевший файл архива
+удаляется целиком. Файлы Excel из отчеты/ удаляются или переносятся
+в PURGE_FILES_FOLDER (с теми же подпапками <год>/<форма>/) после фиксации
+порции; опустевшие папки отчеты/<год>/<форма>/ удаляются.
+
+Освободившееся место возвращается шагами PRAGMA incremental_vacuum, если база
+в режиме auto_vacuum = INCREMENTAL (новые базы создаются в нем; старую можно
+перевести командой --vacuum, это один полный VACUUM).
+
+Командная строка:
+    python retention.py status [--years N]
+    python retention.py purge [--years N] [--delete-files] [--vacuum]
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+import config
+import database
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def cutoff_year(retention_years=None):
+    """Последний год, отчеты которого подлежат удалению (None — срок не задан)"""
+    years = config.RETENTION_YEARS if retention_years is None else retention_years
+    if not years:
+        return None
+    return datetime.now().year - years
+
+
+def count_expired(cutoff):
+    """Число отчетов за годы до cutoff включительно (во всех базах)"""
+    conn = None
+    try:
+        conn = database.connect_file(database.DB_FILE)
+        total = 0
+        for schema, _ in database.each_shard(conn, cutoff):
+            total += conn.execute(
+                f'SELECT COUNT(*) FROM {schema}.reports WHERE year <= ?', (cutoff,)
+            ).fetchone()[0]
+        return total
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+def _reports_root():
+    return os.path.join(os.getcwd(), config.REPORTS_FOLDER.rstrip('/'))
+
+
+def _archive_target(path):
+    """Путь файла в PURGE_FILES_FOLDER: подпапки <год>/<форма>/ из отчеты/ сохраняются"""
+    folder = os.path.abspath(config.PURGE_FILES_FOLDER.rstrip('/'))
+    relative = os.path.relpath(os.path.abspath(path), _reports_root())
+    if relative.startswith(os.pardir):
+        relative = os.path.basename(path)
+    return os.path.join(folder, relative)
+
+
+def _dispose_file(path, action, result):
+    """Удалить или перенести файл отчета; ошибки копятся в result, а не прерывают очистку"""
+    if not path or not os.path.isfile(path):
+        result['missing_files'] += 1
+        return
+    try:
+        if action == "archive":
+            target = _archive_target(path)
+            # Файл с тем же именем в архиве не перезаписывается
+            if os.path.exists(target):
+                result['file_errors'].append(f"{path}: в архиве уже есть файл {target}")
+                return
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(path, target)
+        else:
+            os.remove(path)
+        result['files'] += 1
+    except OSError as e:
+        result['file_errors'].append(f"{path}: {e}")
+
+
+def _remove_empty_folders(paths):
+    """Удалить опустевшие папки отчеты/<год>/<форма>/ (и <год>/) после удаления файлов"""
+    root = os.path.normcase(_reports_root())
+    folders = {os.path.dirname(os.path.abspath(path)) for path in paths if path}
+    for folder in sorted(folders, key=len, reverse=True):
+        while os.path.normcase(folder).startswith(root + os.sep):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                # Папка не пуста (или уже удалена другим проходом)
+                if os.path.isdir(folder):
+                    break
+            folder = os.path.dirname(folder)
+
+
+def _purge_batch(conn, schema, cutoff, batch_size):
+    """
+    Удалить одну порцию просроченных отчетов из схемы (одна транзакция)
+    Returns: список удаленных строк reports (пустой — удалять больше нечего)
+    """
+    reports = conn.execute(f'''
+        SELECT id, form_name, month, year, file_path FROM {schema}.reports
+        WHERE year <= ? ORDER BY id LIMIT ?
+    ''', (cutoff, batch_size)).fetchall()
+    if not reports:
+        return []
+
+    ids = [row['id'] for row in reports]
+    placeholders = ', '.join('?' for _ in ids)
+    answers = {}
+    for row in conn.execute(f'''
+        SELECT report_id, question_text, answer_yes_no, comment FROM {schema}.answers
+        WHERE report_id IN ({placeholders})
+    ''', ids):
+        answers.setdefault(row['report_id'], []).append(row)
+
+    cursor = conn.cursor()
+    for report in reports:
+        database._update_question_stats(cursor, report['form_name'], report['year'],
+                                        report['month'], answers.get(report['id'], []), -1)
+    # Ответы и журнал доставки удаляются каскадно
+    cursor.execute(f'DELETE FROM {schema}.reports WHERE id IN ({placeholders})', ids)
+    conn.commit()
+
+    for report_id in ids:
+        database.report_cache.invalidate(report_id)
+    return reports
+
+
+def reclaim_space(conn, task=None):
+    """
+    Вернуть свободные страницы рабочей базы шагами incremental_vacuum
+    Returns: число освобожденных страниц (0, если база не в режиме INCREMENTAL)
+    """
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+        if config.DEBUG_MODE:
+            print("База не в режиме auto_vacuum = INCREMENTAL: место вернет python retention.py purge --vacuum")
+        return 0
+
+    freed = 0
+    while not (task and task.cancelled):
+        free_pages = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if not free_pages:
+            break
+        conn.execute(f'PRAGMA incremental_vacuum({config.PURGE_VACUUM_PAGES})').fetchall()
+        freed += min(free_pages, config.PURGE_VACUUM_PAGES)
+        time.sleep(config.PURGE_BATCH_PAUSE_SEC)
+    return freed
+
+
+def vacuum_full():
+    """Перевести рабочую базу в auto_vacuum = INCREMENTAL и сжать (требует монопольного доступа)"""
+    conn = None
+    try:
+        conn = database.connect_file(database.DB_FILE)
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('VACUUM')
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+def purge_expired(retention_years=None, batch_size=None, files_action=None, progress=None, task=None):
+    """
+    Удалить отчеты старше срока хранения вместе с файлами
+    Args:
+        files_action: "delete" или "archive" (по умолчанию PURGE_FILES_ACTION)
+        progress: вызывается как progress(удалено, всего)
+        task: BackgroundTask для отмены (удаленные порции не восстанавливаются)
+    Returns: словарь reports, files, missing_files, file_errors, archives_removed, pages_freed
+    Raises: Exception при ошибке базы (текущая порция откатывается)
+    """
+    result = {'reports': 0, 'files': 0, 'missing_files': 0, 'file_errors': [],
+              'archives_removed': [], 'pages_freed': 0}
+    cutoff = cutoff_year(retention_years)
+    if cutoff is None:
+        return result
+
+    batch_size = batch_size or config.PURGE_BATCH_SIZE
+    files_action = files_action or config.PURGE_FILES_ACTION
+    total = count_expired(cutoff)
+
+    conn = None
+    try:
+        conn = database.connect_file(database.DB_FILE)
+        empty_archives = []
+        for schema, year in database.each_shard(conn, cutoff):
+            if task and task.cancelled:
+                break
+
+            while not (task and task.cancelled):
+                reports = _purge_batch(conn, schema, cutoff, batch_size)
+                if not reports:
+                    break
+                for report in reports:
+                    _dispose_file(report['file_path'], files_action, result)
+                _remove_empty_folders(report['file_path'] for report in reports)
+
+                result['reports'] += len(reports)
+                if progress:
+                    progress(result['reports'], total)
+                time.sleep(config.PURGE_BATCH_PAUSE_SEC)
+
+            if year is not None and not conn.execute(f'SELECT 1 FROM {schema}.reports LIMIT 1').fetchone():
+                empty_archives.append(year)
+
+        # Файлы удаляются, когда все архивы уже отключены
+        for year in empty_archives:
+            try:
+                os.remove(database.archive_path(year))
+                result['archives_removed'].append(year)
+            except OSError as e:
+                result['file_errors'].append(f"{database.archive_path(year)}: {e}")
+
+        result['pages_freed'] = reclaim_space(conn, task)
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+    # Удаленные файлы архива не должны оставаться в представлениях all_*
+    database.refresh_archives()
+    if config.DEBUG_MODE:
+        print(f"Удалено отчетов старше {cutoff} года: {result['reports']}, файлов: {result['files']}")
+    return result
+
+
+def _option(args, name, default=None):
+    """Значение ключа вида --years N"""
+    if name in args and args.index(name) + 1 < len(args):
+        return int(args[args.index(name) + 1])
+    return default
+
+
+def main(argv):
+    """Командная строка: status | purge [--years N] [--delete-files] [--vacuum]"""
+    args = argv[1:]
+    command = args[0] if args else ""
+    years = _option(args, "--years")
+
+    if command == "status":
+        cutoff = cutoff_year(years)
+        if cutoff is None:
+            print("Срок хранения не задан (RETENTION_YEARS = 0)")
+        else:
+            print(f"Отчетов за {cutoff} год и раньше: {count_expired(cutoff)}")
+        return 0
+
+    if command == "purge":
+        database.init_database()
+        result = purge_expired(
+            retention_years=years,
+            files_action="delete" if "--delete-files" in args else None,
+            progress=lambda done, total: print(f"\rУдалено {done}/{total}", end="")
+        )
+        print(f"\nОтчетов: {result['reports']}, файлов: {result['files']}, "
+              f"файлов не найдено: {result['missing_files']}, страниц освобождено: {result['pages_freed']}")
+        for year in result['archives_removed']:
+            print(f"Удален архив {year} года")
+        for error in result['file_errors']:
+            print(f"Ошибка: {error}")
+        if "--vacuum" in args:
+            vacuum_full()
+            print("Рабочая база сжата")
+        return 1 if result['file_errors'] else 0
+
+    print("Использование: python retention.py status | purge [--years N] [--delete-files] [--vacuum]")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
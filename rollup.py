@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+rollup.py — сводка месячных отчётов формы за квартал или год
+
+Статистика по вопросам берётся из агрегатов question_stats,
+комментарии читаются потоком только за месяцы периода —
+полные отчёты в память не загружаются.
+"""
+
+import config
+from database import (
+    get_question_stats, count_period_reports, iter_period_comments,
+    question_hash, normalize_question
+)
+from logic import get_report_type_by_month
+from analytics import month_order, question_trends
+
+
+def quarter_months(quarter):
+    """Месяцы квартала 1-4"""
+    start = (quarter - 1) * 3
+    return config.MONTHS[start:start + 3]
+
+
+def period_title(year, months):
+    """Название периода для заголовков и имён файлов"""
+    if len(months) == 12:
+        return f"{year} год"
+    for quarter in range(1, 5):
+        if list(months) == quarter_months(quarter):
+            return f"{quarter} квартал {year}"
+    return f"{', '.join(months)} {year}"
+
+
+def rollup_period_for(month, year):
+    """
+    Период сводки для отчёта за month/year по типу отчёта
+    Квартальный — месяцы текущего квартала, годовой (январь) — весь предыдущий год
+
+    Returns: (year, months) или None для месячного отчёта
+    """
+    report_type = get_report_type_by_month(month)
+    year = int(year)
+    if report_type == 2:
+        quarter = config.MONTHS.index(month.capitalize()) // 3 + 1
+        return year, quarter_months(quarter)
+    if report_type == 3:
+        return year - 1, list(config.MONTHS)
+    return None
+
+
+def build_rollup(form_name, year, months, min_repeats=2):
+    """
+    Построить сводку формы за период
+
+    Returns:
+        dict: form_name, year, months, title, report_counts,
+        questions (статистика по вопросам, по убыванию числа "Нет"),
+        recurring_comments (замечания, повторявшиеся не менее min_repeats раз)
+    """
+    months = list(months)
+
+    question_list = question_trends(form_name, year, months)
+    for item in question_list:
+        item['no_rate'] = item['no'] / item['answers'] if item['answers'] else 0.0
+
+    comments = {}
+    for row in iter_period_comments(form_name, year, months):
+        key = (question_hash(row['question_text']), normalize_question(row['comment']))
+        item = comments.setdefault(key, {
+            'question_text': row['question_text'],
+            'comment': row['comment'].strip(),
+            'count': 0,
+            'no_count': 0,
+            'months': set()
+        })
+        item['count'] += 1
+        if row['answer_yes_no'] == 'Нет':
+            item['no_count'] += 1
+        item['months'].add(row['month'])
+
+    recurring = []
+    for item in comments.values():
+        if item['count'] >= min_repeats:
+            item['months'] = sorted(item['months'], key=month_order)
+            recurring.append(item)
+    recurring.sort(key=lambda item: (-item['count'], item['question_text']))
+
+    return {
+        'form_name': form_name,
+        'year': year,
+        'months': months,
+        'title': period_title(year, months),
+        'report_counts': count_period_reports(form_name, year, months),
+        'questions': question_list,
+        'recurring_comments': recurring
+    }
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+server.py — серверный режим: один reports.db на несколько рабочих мест
+
+HTTP/JSON-сервис на стандартной библиотеке (ThreadingHTTPServer).
+Клиенты обслуживаются параллельно, все обращения к БД идут через одно
+общее соединение (database.open_shared_connection).
+
+    python server.py --workdir <папка> [--host 0.0.0.0] [--port 8765]
+
+Запросы:
+    GET  /api/forms                               список форм
+    GET  /api/forms/<форма>/questions?month=Март  вопросы формы для месяца
+    POST /api/reports                             создать отчёт(ы), тело — задание cli.py или список
+    GET  /api/reports?limit=&before_id=&form_name=&year=&month=   страница архива
+    GET  /api/reports/<id>[?full=1]               отчёт с ответами
+    GET  /api/reports/<id>/export                 файл Excel отчёта
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+
+import backup
+import config
+import database
+from logic import ReportLogic, find_form_file
+from cli import FormCache, run_job
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class ApiError(Exception):
+    """Ошибка запроса с HTTP-статусом"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """Обработчик API; общее состояние — в self.server"""
+
+    server_version = "ReportServer/1.0"
+
+    # --- Маршрутизация ---
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        try:
+            if parts[:1] != ["api"]:
+                raise ApiError(404, "Неизвестный адрес")
+            route = parts[1:]
+
+            if method == "GET" and route == ["forms"]:
+                self._send_json(ReportLogic().load_forms_list())
+            elif method == "GET" and len(route) == 3 and route[0] == "forms" and route[2] == "questions":
+                self._send_json(self._questions(route[1], query))
+            elif method == "POST" and route == ["reports"]:
+                self._send_json(self._submit(self._read_json()))
+            elif method == "GET" and route == ["reports"]:
+                self._send_json(self._archive_page(query))
+            elif method == "GET" and len(route) == 2 and route[0] == "reports":
+                self._send_json(self._report(route[1], query))
+            elif method == "GET" and len(route) == 3 and route[0] == "reports" and route[2] == "export":
+                self._send_export(route[1])
+            else:
+                raise ApiError(404, "Неизвестный адрес")
+
+        except ApiError as e:
+            self._send_json({"error": str(e)}, status=e.status)
+        except Exception as e:
+            if config.DEBUG_MODE:
+                print(f"Ошибка обработки {method} {self.path}: {e}", file=sys.stderr)
+            self._send_json({"error": str(e)}, status=500)
+
+    # --- Обработчики ---
+
+    def _questions(self, form_name, query):
+        month = query.get("month", "").capitalize()
+        if month not in config.MONTHS:
+            raise ApiError(400, f"Неизвестный месяц: {month}")
+
+        file_path, filename = find_form_file(form_name, month)
+        if not file_path:
+            raise ApiError(404, f"Файл формы не найден: {form_name} ({month})")
+
+        questions = self.server.forms.questions(file_path)
+        return {"form_name": form_name, "month": month, "form_file": filename, "questions": questions}
+
+    def _submit(self, payload):
+        jobs = payload if isinstance(payload, list) else [payload]
+        results = [run_job(job, self.server.forms) for job in jobs]
+        succeeded = sum(1 for r in results if r["status"] == "ok")
+        return {
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "reports": results
+        }
+
+    def _archive_page(self, query):
+        try:
+            limit = min(int(query.pop("limit", config.SERVER_PAGE_SIZE)), 500)
+            before_id = query.pop("before_id", None)
+            before_id = int(before_id) if before_id else None
+        except ValueError:
+            raise ApiError(400, "limit и before_id должны быть числами")
+
+        filters = {k: v for k, v in query.items() if k in database.REPORT_FILTERS}
+        reports, next_before_id = database.get_reports_page(limit, before_id, filters)
+        return {"reports": reports, "next_before_id": next_before_id}
+
+    def _load_report(self, report_id, fields):
+        try:
+            report_id = int(report_id)
+        except ValueError:
+            raise ApiError(400, f"Некорректный ID отчета: {report_id}")
+
+        report = database.get_report_by_id(report_id, fields=fields)
+        if report is None:
+            raise ApiError(404, f"Отчет {report_id} не найден")
+        return report
+
+    def _report(self, report_id, query):
+        fields = None if query.get("full") == "1" else database.LIGHT_ANSWER_FIELDS
+        return self._load_report(report_id, fields)
+
+    def _send_export(self, report_id):
+        report = self._load_report(report_id, None)
+
+        # Отдается сохраненный файл отчета; если его нет, файл собирается
+        # во временной папке и удаляется — в отчеты/ ничего не добавляется
+        if report['file_path'] and os.path.isfile(report['file_path']):
+            message = os.path.basename(report['file_path'])
+            with open(report['file_path'], "rb") as f:
+                body = f.read()
+        else:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                logic = ReportLogic()
+                success, message = logic.export_report_to_word(report, out_dir=tmp_dir)
+                if not success:
+                    raise ApiError(500, message)
+                with open(logic.last_file_path, "rb") as f:
+                    body = f.read()
+
+        self.send_response(200)
+        self.send_header("Content-Type", XLSX_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(message)}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    # --- Ввод/вывод ---
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            return json.loads(self.rfile.read(length).decode("utf-8"))
+        except ValueError as e:
+            raise ApiError(400, f"Некорректный JSON: {e}")
+
+    def _send_json(self, data, status=200):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if config.DEBUG_MODE:
+            super().log_message(format, *args)
+
+
+class ReportServer(ThreadingHTTPServer):
+    """HTTP-сервер с общим кэшем форм"""
+
+    daemon_threads = True
+
+    def __init__(self, address):
+        super().__init__(address, ReportRequestHandler)
+        self.forms = FormCache()
+
+
+def main(argv=None):
+    """Точка входа серверного режима"""
+    parser = argparse.ArgumentParser(description="Серверный режим системы отчётов")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--workdir", help="рабочая директория с reports.db, формы/ и отчеты/")
+    args = parser.parse_args(argv)
+
+    if args.workdir:
+        os.chdir(args.workdir)
+    config.ensure_work_folders()
+
+    database.init_database()
+    database.open_shared_connection()
+    backup.start_scheduler()
+
+    server = ReportServer((args.host, args.port))
+    print(f"Сервер отчётов: http://{args.host}:{args.port}/api/forms")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        backup.stop_scheduler()
+        database.close_shared_connection()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+sql_trace.py — трассировка SQL на соединениях database.py
+
+TracedConnection подключается через sqlite3.connect(factory=...):
+- при config.PRINT_SQL_QUERIES каждый оператор печатается с длительностью
+  (текст с подставленными параметрами — через set_trace_callback);
+- операторы дольше config.SLOW_QUERY_MS пишутся в ротируемый журнал
+  config.SLOW_QUERY_LOG, а для каждого нового медленного оператора один раз
+  выполняется EXPLAIN QUERY PLAN (видно SCAN без индекса и временные B-деревья
+  для ORDER BY).
+
+Время считается до возврата execute(): для SELECT это подготовка и первый
+шаг выборки, чтение остальных строк fetch*() не учитывается.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+import config
+
+# Операторы, для которых имеет смысл план запроса
+_EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE|INSERT|REPLACE)\b', re.IGNORECASE)
+
+_slow_logger = None
+_explained = set()
+_lock = threading.Lock()
+
+
+def tracing_enabled():
+    """Нужна ли обёртка соединения при текущих настройках"""
+    return bool(config.PRINT_SQL_QUERIES or config.SLOW_QUERY_MS)
+
+
+def _normalize_sql(sql):
+    """Текст оператора без лишних пробелов — ключ для однократного EXPLAIN"""
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def _get_slow_logger():
+    """Журнал медленных запросов с ротацией (создаётся при первой записи)"""
+    global _slow_logger
+    with _lock:
+        if _slow_logger is None:
+            logger = logging.getLogger("reports.slow_sql")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = RotatingFileHandler(
+                config.SLOW_QUERY_LOG,
+                maxBytes=config.SLOW_QUERY_LOG_MAX_BYTES,
+                backupCount=config.SLOW_QUERY_LOG_BACKUPS,
+                encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+            _slow_logger = logger
+        return _slow_logger
+
+
+def _first_explain(sql):
+    """True, если план для этого оператора ещё не снимался"""
+    key = _normalize_sql(sql)
+    with _lock:
+        if key in _explained:
+            return False
+        _explained.add(key)
+        return True
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Курсор с замером времени execute/executemany/executescript"""
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters, many=True)
+
+    def executescript(self, sql_script):
+        return self._timed(super().executescript, sql_script, None)
+
+    def _timed(self, method, sql, parameters, many=False):
+        conn = self.connection
+        conn._statements = []
+        started = time.perf_counter()
+        try:
+            return method(sql, parameters) if parameters is not None else method(sql)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            statements, conn._statements = conn._statements, None
+            conn._after_statement(sql, None if many else parameters, statements, elapsed_ms)
+
+
+class TracedConnection(sqlite3.Connection):
+    """Соединение, все курсоры которого трассируются"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._statements = None
+        if config.PRINT_SQL_QUERIES:
+            self.set_trace_callback(self._on_trace)
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    # Connection.execute*() создают курсор в C, минуя cursor() — перенаправляем явно
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+    def _on_trace(self, statement):
+        # Внутри execute текст копится и печатается вместе с длительностью,
+        # остальное (COMMIT, неявный BEGIN) печатается сразу
+        if self._statements is not None:
+            self._statements.append(_normalize_sql(statement))
+        else:
+            print(f"SQL: {_normalize_sql(statement)}")
+
+    def _after_statement(self, sql, parameters, statements, elapsed_ms):
+        if config.PRINT_SQL_QUERIES:
+            statements = statements or [_normalize_sql(sql)]
+            # Неявный BEGIN перед оператором печатается без отдельного времени
+            for statement in statements[:-1]:
+                print(f"SQL: {statement}")
+            print(f"SQL [{elapsed_ms:.1f} мс]: {statements[-1]}")
+
+        if config.SLOW_QUERY_MS and elapsed_ms >= config.SLOW_QUERY_MS:
+            self._log_slow(sql, parameters, elapsed_ms)
+
+    def _log_slow(self, sql, parameters, elapsed_ms):
+        logger = _get_slow_logger()
+        logger.info(f"{elapsed_ms:.1f} мс: {_normalize_sql(sql)}")
+
+        if parameters is None or not _EXPLAINABLE.match(sql) or not _first_explain(sql):
+            return
+        try:
+            # Базовый курсор, чтобы EXPLAIN сам не попадал в трассировку
+            plan = sqlite3.Cursor(self).execute(f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+            for row in plan:
+                logger.info(f"    план: {row[-1]}")
+        except sqlite3.Error as e:
+            logger.info(f"    план недоступен: {e}")
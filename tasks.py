@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+tasks.py — выполнение тяжёлых операций в фоне для Tk GUI
+
+Функция выполняется в пуле потоков, а результат возвращается в главный
+поток через опрос root.after() — Tk нельзя трогать из других потоков.
+"""
+
+import threading
+import tkinter as tk
+from tkinter import ttk
+from concurrent.futures import ThreadPoolExecutor
+import config
+
+
+class BackgroundTask:
+    """Состояние фоновой задачи: отмена и прогресс"""
+
+    def __init__(self, title):
+        self.title = title
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._progress = None
+
+    def cancel(self):
+        """Запросить отмену задачи"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        """True если пользователь отменил задачу"""
+        return self._cancel_event.is_set()
+
+    def set_progress(self, done, total):
+        """Сообщить прогресс (вызывается из рабочего потока)"""
+        with self._lock:
+            self._progress = (done, total)
+
+    def get_progress(self):
+        """Текущий прогресс (done, total) или None"""
+        with self._lock:
+            return self._progress
+
+
+class TaskRunner:
+    """Запуск функций в пуле потоков с окном прогресса"""
+
+    def __init__(self, root):
+        self.root = root
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.TASK_MAX_WORKERS,
+            thread_name_prefix="report-task"
+        )
+
+    def run(self, func, *args, title="Выполняется...", on_done=None, on_error=None,
+            widgets=(), cancellable=True, with_task=False, **kwargs):
+        """
+        Выполнить func(*args, **kwargs) в фоне
+
+        Args:
+            title: текст в окне прогресса
+            on_done: вызывается в главном потоке с результатом функции
+            on_error: вызывается в главном потоке с исключением
+            widgets: кнопки, которые блокируются на время выполнения
+            cancellable: показывать ли кнопку "Отмена"
+            with_task: передать функции объект BackgroundTask через аргумент task=
+
+        Returns:
+            BackgroundTask
+        """
+        task = BackgroundTask(title)
+        if with_task:
+            kwargs['task'] = task
+
+        disabled = []
+        for widget in widgets:
+            if widget is not None and widget.winfo_exists():
+                disabled.append((widget, widget.cget('state')))
+                widget.config(state=tk.DISABLED)
+
+        dialog = self._create_dialog(task, cancellable)
+        future = self.executor.submit(func, *args, **kwargs)
+        self.root.after(config.TASK_POLL_INTERVAL_MS, self._poll, future, task, dialog, disabled, on_done, on_error)
+        return task
+
+    def _poll(self, future, task, dialog, disabled, on_done, on_error):
+        """Проверка готовности задачи (в главном потоке)"""
+        if task.cancelled:
+            # Ещё не начатая задача снимается с очереди; начатая доработает до
+            # ближайшей проверки task.cancelled, до тех пор кнопки остаются заблокированными
+            future.cancel()
+        if not future.done():
+            if task.cancelled:
+                self._show_cancelling(dialog)
+            else:
+                self._update_dialog(dialog, task)
+            self.root.after(config.TASK_POLL_INTERVAL_MS, self._poll, future, task, dialog, disabled, on_done, on_error)
+            return
+
+        if dialog['window'].winfo_exists():
+            dialog['window'].destroy()
+
+        for widget, state in disabled:
+            if widget.winfo_exists():
+                widget.config(state=state)
+
+        if task.cancelled:
+            # Результат отменённой задачи игнорируется
+            if config.DEBUG_MODE:
+                print(f"Задача отменена: {task.title}")
+            return
+
+        error = future.exception()
+        if error is not None:
+            if config.DEBUG_MODE:
+                print(f"Ошибка фоновой задачи '{task.title}': {type(error).__name__}: {error}")
+            if on_error:
+                on_error(error)
+            return
+
+        if on_done:
+            on_done(future.result())
+
+    def _create_dialog(self, task, cancellable):
+        """Окно с индикатором выполнения"""
+        window = tk.Toplevel(self.root)
+        window.title(config.APP_TITLE)
+        window.resizable(False, False)
+        window.transient(self.root)
+        window.protocol("WM_DELETE_WINDOW", task.cancel if cancellable else (lambda: None))
+
+        tk.Label(window, text=task.title, font=("Arial", 12)).pack(padx=30, pady=(20, 10))
+
+        progress_bar = ttk.Progressbar(window, mode='indeterminate', length=300)
+        progress_bar.pack(padx=30, pady=5)
+        progress_bar.start(15)
+
+        status = tk.Label(window, text="", font=("Arial", 10))
+        status.pack(padx=30)
+
+        cancel_button = None
+        if cancellable:
+            cancel_button = tk.Button(window, text="Отмена", width=15, command=task.cancel)
+            cancel_button.pack(pady=(10, 20))
+        else:
+            tk.Frame(window, height=20).pack()
+
+        return {'window': window, 'progress': progress_bar, 'status': status, 'cancel': cancel_button}
+
+    def _show_cancelling(self, dialog):
+        """Окно остаётся открытым, пока отменённая задача не остановится"""
+        if not dialog['window'].winfo_exists():
+            return
+        dialog['status'].config(text="Отмена...")
+        if dialog['cancel'] is not None:
+            dialog['cancel'].config(state=tk.DISABLED)
+
+    def _update_dialog(self, dialog, task):
+        """Обновить индикатор по прогрессу задачи"""
+        progress = task.get_progress()
+        if progress is None or not dialog['window'].winfo_exists():
+            return
+
+        done, total = progress
+        bar = dialog['progress']
+        if str(bar.cget('mode')) != 'determinate':
+            bar.stop()
+            bar.config(mode='determinate')
+        bar.config(maximum=max(total, 1), value=done)
+        dialog['status'].config(text=f"{done} из {total}")
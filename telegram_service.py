@@ -3,11 +3,13 @@
 telegram_service.py — отправка отчётов в Telegram
 """
 
+import hashlib
 import json
 import ssl
 from urllib import request, error, parse
-from database import get_report_by_id
+from database import get_report_by_id, find_delivery, record_delivery, LIGHT_ANSWER_FIELDS
 import config
+from metrics import timed
 
 
 class TelegramService:
@@ -18,51 +20,76 @@ class TelegramService:
         self.bot_token = getattr(config, 'TELEGRAM_BOT_TOKEN', '')
         self.chat_id = getattr(config, 'TELEGRAM_CHAT_ID', '')
         self.api_url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
+        # Запись журнала, по которой последняя отправка была пропущена (иначе None)
+        self.last_delivery = None
 
     def is_configured(self):
         """Проверка что токен и chat_id заполнены"""
         return bool(self.bot_token.strip() and self.chat_id.strip())
 
-    def send_report(self, report_id):
+    @timed("telegram.send_report")
+    def send_report(self, report_id, force=False):
         """
         Отправить отчёт в Telegram
 
+        Повторная отправка того же содержимого в тот же чат пропускается
+        по журналу доставки, если не указан force=True. Если прошлая отправка
+        длинного отчёта оборвалась, досылаются только недоставленные части
+
         Args:
             report_id: ID отчёта из базы данных
+            force: отправить даже если такой отчёт уже был доставлен
 
         Returns:
-            tuple: (success: bool, message: str)
+            tuple: (success: bool, message: str); если отправка пропущена,
+            запись журнала доступна в self.last_delivery
         """
+        self.last_delivery = None
+
         # Проверка настроек
         if not self.is_configured():
             return False, "Telegram не настроен. Заполните токен бота и chat_id в настройках."
 
         try:
             # Получаем данные отчёта из БД
-            report_data = get_report_by_id(report_id)
+            report_data = get_report_by_id(report_id, fields=LIGHT_ANSWER_FIELDS)
 
             if not report_data:
                 return False, f"Отчёт с ID {report_id} не найден в базе данных"
 
             # Форматируем сообщение
             message_text = self._format_message(report_data)
+            content_hash = self._content_hash(message_text)
 
-            # Проверяем длину (лимит Telegram 4096 символов)
-            if len(message_text) > 4096:
-                # Если слишком длинное, отправляем частями
-                return self._send_long_message(message_text)
+            # Лимит Telegram 4096 символов: длинный отчёт отправляется частями
+            parts = [message_text] if len(message_text) <= 4096 else split_message(message_text)
 
-            # Отправляем в Telegram
-            success = self._send_to_telegram(message_text)
+            # Проверяем журнал доставки: в нём id уже доставленных частей
+            message_ids = []
+            if not force:
+                delivery = find_delivery(report_id, self.chat_id, content_hash)
+                if delivery and len(delivery['message_ids']) >= len(parts):
+                    self.last_delivery = delivery
+                    return True, f"ℹ️ Отчёт уже был отправлен в этот чат ({delivery['sent_at']}), повторная отправка пропущена"
+                if delivery:
+                    message_ids = delivery['message_ids']
 
-            if success:
-                return True, "✅ Отчёт успешно отправлен в Telegram"
-            else:
-                return False, "❌ Ошибка при отправке в Telegram"
+            delivered_before = len(message_ids)
+            success, message, message_ids = self._send_parts(parts, message_ids)
+
+            # Доставленные части записываются и при обрыве, чтобы повтор их не дублировал
+            if len(message_ids) > delivered_before:
+                record_delivery(report_id, self.chat_id, content_hash, message_ids)
+
+            return success, message
 
         except Exception as e:
             return False, f"Ошибка: {str(e)}"
 
+    def _content_hash(self, text):
+        """Хэш содержимого сообщения для журнала доставки"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
     def _format_message(self, report_data):
         """
         Форматировать отчёт в красивый текст для Telegram
@@ -112,6 +139,7 @@ class TelegramService:
 
         return "\n".join(lines)
 
+    @timed("telegram.send_message")
     def _send_to_telegram(self, text):
         """
         Отправить текст в Telegram через Bot API
@@ -120,7 +148,7 @@ class TelegramService:
             text: текст сообщения
 
         Returns:
-            bool: True если успешно, False если ошибка
+            int: message_id отправленного сообщения или None если ошибка
         """
         try:
             # Подготовка данных
@@ -147,59 +175,51 @@ class TelegramService:
                 if config.DEBUG_MODE:
                     print(f"Telegram API response: {result}")
 
-                return result.get('ok', False)
+                if not result.get('ok', False):
+                    return None
+                return result.get('result', {}).get('message_id', 0)
 
         except error.HTTPError as e:
             error_body = e.read().decode('utf-8') if e.fp else ""
             if config.DEBUG_MODE:
                 print(f"HTTP ошибка {e.code}: {e.reason}")
                 print(f"Детали: {error_body}")
-            return False
+            return None
         except error.URLError as e:
             if config.DEBUG_MODE:
                 print(f"Ошибка сети: {e.reason}")
-            return False
+            return None
         except Exception as e:
             if config.DEBUG_MODE:
                 print(f"Неизвестная ошибка: {type(e).__name__}: {e}")
-            return False
+            return None
 
-    def _send_long_message(self, text):
+    def _send_parts(self, parts, message_ids):
         """
-        Отправить длинное сообщение частями
+        Отправить части сообщения, начиная с первой недоставленной
 
         Args:
-            text: длинный текст
+            parts: части текста (см. split_message)
+            message_ids: id уже доставленных частей (по порядку)
 
         Returns:
-            tuple: (success: bool, message: str)
+            tuple: (success: bool, message: str, message_ids: list) — message_ids
+                   всех доставленных частей, в том числе при ошибке
         """
-        # Разбиваем по 4000 символов (с запасом)
-        max_length = 4000
-        parts = []
-
-        while text:
-            if len(text) <= max_length:
-                parts.append(text)
-                break
-
-            # Ищем последний перенос строки в пределах лимита
-            split_pos = text.rfind('\n', 0, max_length)
-            if split_pos == -1:
-                split_pos = max_length
-
-            parts.append(text[:split_pos])
-            text = text[split_pos:].lstrip()
-
-        # Отправляем части
-        for i, part in enumerate(parts, 1):
+        message_ids = list(message_ids)
+        for i, part in enumerate(parts[len(message_ids):], len(message_ids) + 1):
             header = f"[Часть {i}/{len(parts)}]\n\n" if len(parts) > 1 else ""
-            success = self._send_to_telegram(header + part)
+            message_id = self._send_to_telegram(header + part)
 
-            if not success:
-                return False, f"Ошибка при отправке части {i} из {len(parts)}"
+            if message_id is None:
+                if len(parts) == 1:
+                    return False, "❌ Ошибка при отправке в Telegram", message_ids
+                return False, f"Ошибка при отправке части {i} из {len(parts)}", message_ids
+            message_ids.append(message_id)
 
-        return True, f"✅ Отчёт отправлен в Telegram ({len(parts)} сообщений)"
+        if len(parts) == 1:
+            return True, "✅ Отчёт успешно отправлен в Telegram", message_ids
+        return True, f"✅ Отчёт отправлен в Telegram ({len(parts)} сообщений)", message_ids
 
     def test_connection(self):
         """
@@ -262,6 +282,29 @@ class TelegramService:
 
 
 # Вспомогательные функции для GUI
+def split_message(text, max_length=4000):
+    """
+    Разбить текст на части не длиннее max_length (4000 — с запасом до лимита
+    Telegram), по возможности по переносу строки
+    """
+    parts = []
+
+    while text:
+        if len(text) <= max_length:
+            parts.append(text)
+            break
+
+        # Ищем последний перенос строки в пределах лимита
+        split_pos = text.rfind('\n', 0, max_length)
+        if split_pos == -1:
+            split_pos = max_length
+
+        parts.append(text[:split_pos])
+        text = text[split_pos:].lstrip()
+
+    return parts
+
+
 def get_telegram_service():
     """Получить экземпляр TelegramService"""
     return TelegramService()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+text_codec.py — сжатие длинных текстов ответов в БД
+
+Комментарий и справочные поля (ГОСТ, руководство, документы) длиннее
+config.TEXT_COMPRESS_MIN_BYTES хранятся как BLOB: байт-маркер и данные zlib.
+Короткие тексты и тексты, которые не уменьшились при сжатии, остаются
+обычным TEXT, поэтому старые базы читаются без миграции.
+
+Текст из SQLite всегда приходит строкой, а сжатое значение — байтами,
+так что маркер не спутать с содержимым комментария.
+
+Командная строка (сжатие уже сохраненных ответов, см. database.compress_answer_texts):
+    python text_codec.py compress [--vacuum]
+"""
+
+import sys
+import zlib
+
+import config
+
+# Версия формата: первый байт сжатого значения
+COMPRESSED_MARKER = b'\x01'
+
+# Поля answers, которые сжимаются
+COMPRESSED_FIELDS = ('comment', 'gost_text', 'quality_text', 'documents_text')
+
+
+def pack_text(value):
+    """Текст для записи в БД: сжатый BLOB для длинных строк, иначе без изменений"""
+    if not isinstance(value, str) or not config.TEXT_COMPRESS_MIN_BYTES:
+        return value
+    data = value.encode('utf-8')
+    if len(data) < config.TEXT_COMPRESS_MIN_BYTES:
+        return value
+    packed = COMPRESSED_MARKER + zlib.compress(data, config.TEXT_COMPRESS_LEVEL)
+    return packed if len(packed) < len(data) else value
+
+
+def unpack_text(value):
+    """Текст из значения БД (сжатого или обычного)"""
+    if isinstance(value, bytes) and value[:1] == COMPRESSED_MARKER:
+        return zlib.decompress(value[1:]).decode('utf-8')
+    return value
+
+
+def main(argv):
+    """Командная строка: compress [--vacuum]"""
+    import database
+
+    if len(argv) > 1 and argv[1] == "compress":
+        database.init_database()
+        total = database.compress_answer_texts(
+            progress=lambda path, done: print(f"\r{path}: ответов {done}", end=""),
+            vacuum="--vacuum" in argv
+        )
+        print(f"\nСжато значений: {total}")
+        return 0
+
+    print("Использование: python text_codec.py compress [--vacuum]")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
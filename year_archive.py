@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+year_archive.py — перенос отчетов закрытых лет в годовые файлы архива
+
+Отчеты года (вместе с ответами и журналом Telegram) переносятся из reports.db
+в YEAR_ARCHIVE_FOLDER/reports_<год>.db порциями по ARCHIVE_BATCH_SIZE отчетов:
+каждая порция — отдельная короткая транзакция, между порциями пауза, поэтому
+программа и сервер не блокируются надолго. Идентификаторы отчетов сохраняются.
+
+database.py подключает файлы архива через ATTACH и читает отчеты через
+представления all_reports / all_answers / all_deliveries, так что архив,
+сводки и предзаполнение видят все годы. Агрегаты question_stats остаются
+в рабочей базе и при переносе не меняются.
+
+Командная строка:
+    python year_archive.py list
+    python year_archive.py move [год ...] [--vacuum]   (без года — все закрытые годы)
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+import config
+import database
+
+
+def closed_years():
+    """Годы рабочей базы, которые пора перенести в архив (по возрастанию)"""
+    last_closed = datetime.now().year - config.ARCHIVE_HOT_YEARS
+    conn = None
+    try:
+        conn = database.get_connection()
+        rows = conn.execute(
+            'SELECT DISTINCT year FROM main.reports WHERE year <= ? ORDER BY year', (last_closed,)
+        ).fetchall()
+        return [row[0] for row in rows]
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+def archive_summary():
+    """
+    Сводка по базам: рабочая и годовые архивы
+    Returns: список словарей shard, reports (рабочая база — первой)
+    """
+    conn = None
+    try:
+        conn = database.get_connection()
+        rows = conn.execute('''
+            SELECT shard, COUNT(*) AS cnt FROM all_reports GROUP BY shard ORDER BY shard
+        ''').fetchall()
+        counts = {row['shard']: row['cnt'] for row in rows}
+        summary = [{'shard': 'main', 'reports': counts.pop('main', 0)}]
+        summary += [{'shard': shard, 'reports': cnt} for shard, cnt in sorted(counts.items())]
+        return summary
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+def _ensure_shard(conn, year):
+    """Подключить файл архива года (создав его при необходимости) и таблицы в нем"""
+    schema = database.archive_schema(year)
+    os.makedirs(config.YEAR_ARCHIVE_FOLDER.rstrip('/'), exist_ok=True)
+    conn.execute(f"ATTACH DATABASE ? AS {schema}", (database.archive_path(year),))
+
+    # Та же структура, что в рабочей базе; внешние ключи ссылаются на таблицы архива
+    conn.executescript(f'''
+        CREATE TABLE IF NOT EXISTS {schema}.reports (
+            id INTEGER PRIMARY KEY,
+            form_name TEXT NOT NULL,
+            month TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            report_date TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            file_path TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS {schema}.answers (
+            id INTEGER PRIMARY KEY,
+            report_id INTEGER NOT NULL,
+            question_text TEXT NOT NULL,
+            answer_yes_no TEXT NOT NULL,
+            comment TEXT,
+            gost_text TEXT,
+            quality_text TEXT,
+            documents_text TEXT,
+            FOREIGN KEY (report_id) REFERENCES reports (id) ON DELETE CASCADE
+        );
+        CREATE TABLE IF NOT EXISTS {schema}.telegram_deliveries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            report_id INTEGER NOT NULL,
+            chat_id TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            message_ids TEXT NOT NULL,
+            sent_at TEXT NOT NULL,
+            FOREIGN KEY (report_id) REFERENCES reports (id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS {schema}.idx_answers_report_id ON answers(report_id);
+        CREATE INDEX IF NOT EXISTS {schema}.idx_reports_created_at ON reports(created_at);
+        CREATE INDEX IF NOT EXISTS {schema}.idx_reports_form_period ON reports(form_name, year, month);
+        CREATE UNIQUE INDEX IF NOT EXISTS {schema}.idx_deliveries_key
+            ON telegram_deliveries(report_id, chat_id, content_hash);
+    ''')
+    return schema
+
+
+def archive_year(year, batch_size=None, progress=None, task=None):
+    """
+    Перенести отчеты года из рабочей базы в архив порциями
+    Args:
+        progress: вызывается как progress(перенесено, всего)
+        task: BackgroundTask для отмены (перенесенные порции остаются в архиве)
+    Returns: число перенесенных отчетов
+    Raises: Exception при ошибке (текущая порция откатывается) или если
+            архивов уже столько, сколько можно подключить (max_archive_years)
+    """
+    batch_size = batch_size or config.ARCHIVE_BATCH_SIZE
+    report_columns = ', '.join(database.REPORT_COLUMNS)
+    answer_columns = ', '.join(database.ANSWER_COLUMNS)
+    delivery_columns = ', '.join(database.DELIVERY_COLUMNS)
+
+    conn = None
+    moved = 0
+    try:
+        conn = database.connect_file(database.DB_FILE)
+        archived = database.list_archive_years()
+        if year not in archived and len(archived) >= database.max_archive_years(conn):
+            raise ValueError(
+                f"Уже {len(archived)} годовых архивов — больше подключить нельзя, "
+                f"{year} год остается в рабочей базе"
+            )
+        schema = _ensure_shard(conn, year)
+        total = conn.execute('SELECT COUNT(*) FROM main.reports WHERE year = ?', (year,)).fetchone()[0]
+
+        while not (task and task.cancelled):
+            ids = [row[0] for row in conn.execute(
+                'SELECT id FROM main.reports WHERE year = ? ORDER BY id LIMIT ?', (year, batch_size)
+            )]
+            if not ids:
+                break
+
+            placeholders = ', '.join('?' for _ in ids)
+            conn.execute(f'''
+                INSERT INTO {schema}.reports ({report_columns})
+                SELECT {report_columns} FROM main.reports WHERE id IN ({placeholders})
+            ''', ids)
+            conn.execute(f'''
+                INSERT INTO {schema}.answers ({answer_columns})
+                SELECT {answer_columns} FROM main.answers WHERE report_id IN ({placeholders})
+            ''', ids)
+            conn.execute(f'''
+                INSERT INTO {schema}.telegram_deliveries ({delivery_columns})
+                SELECT {delivery_columns} FROM main.telegram_deliveries WHERE report_id IN ({placeholders})
+            ''', ids)
+            # Ответы и журнал доставки удаляются каскадно
+            conn.execute(f'DELETE FROM main.reports WHERE id IN ({placeholders})', ids)
+            conn.commit()
+
+            moved += len(ids)
+            if progress:
+                progress(moved, total)
+            time.sleep(config.ARCHIVE_BATCH_PAUSE_SEC)
+
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+    # Новый файл архива должен попасть в представления all_* общего соединения
+    database.refresh_archives()
+    if config.DEBUG_MODE:
+        print(f"В архив {year} года перенесено отчетов: {moved}")
+    return moved
+
+
+def vacuum_main():
+    """Сжать рабочую базу после переноса (требует монопольного доступа)"""
+    conn = None
+    try:
+        conn = database.connect_file(database.DB_FILE)
+        conn.execute('VACUUM')
+    except Exception as e:
+        raise Exception(f"{config.ERROR_MESSAGES['db_error']}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+
+def archive_closed_years(progress=None, task=None):
+    """
+    Перенести в архив все закрытые годы
+    Returns: словарь {год: перенесено отчетов}
+    """
+    result = {}
+    for year in closed_years():
+        if task and task.cancelled:
+            break
+        result[year] = archive_year(
+            year,
+            progress=(lambda done, total, y=year: progress(y, done, total)) if progress else None,
+            task=task
+        )
+    return result
+
+
+def main(argv):
+    """Командная строка: list | move [год ...] [--vacuum]"""
+    args = argv[1:]
+    command = args[0] if args else ""
+
+    if command == "list":
+        for item in archive_summary():
+            name = "рабочая база" if item['shard'] == 'main' else f"архив {item['shard'][1:]}"
+            print(f"{name}: отчетов {item['reports']}")
+        closed = closed_years()
+        if closed:
+            print(f"К переносу: {', '.join(map(str, closed))}")
+        return 0
+
+    if command == "move":
+        database.init_database()
+        years = [int(arg) for arg in args[1:] if arg.isdigit()] or closed_years()
+        for year in years:
+            moved = archive_year(
+                year, progress=lambda done, total, y=year: print(f"\r{y}: {done}/{total}", end="")
+            )
+            print(f"\r{year}: перенесено отчетов {moved}")
+        if "--vacuum" in args:
+            vacuum_main()
+            print("Рабочая база сжата")
+        return 0
+
+    print("Использование: python year_archive.py list | move [год ...] [--vacuum]")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))